@@ -0,0 +1,215 @@
+"""
+Runs the deep research graph end to end offline and writes the measurements as JSON.
+
+The graph is compiled from `components/graph.py` with a SQLite checkpointer in a
+temporary directory, a deterministic fake chat model and a fake Tavily client. For each
+concurrency level it runs that many sessions at once and records their latency, the
+throughput, model and search calls, wall time per node, checkpoint size and peak RSS.
+
+Usage:
+    PYTHONPATH=src python benchmarks/deep_research.py --concurrency 1,4,16 \\
+        --output benchmark.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from fakes import FakeChatModel, FakeSearchClient
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def node_seconds(node_duration) -> Dict[str, Dict[str, float]]:
+    with node_duration.lock:
+        return {
+            label_values[0]: {"runs": int(totals[1]), "seconds": totals[0]}
+            for label_values, (_, totals) in node_duration.values.items()
+        }
+
+
+def total_runs(duration) -> int:
+    return int(sum(totals["runs"] for totals in node_seconds(duration).values()))
+
+
+async def run_level(
+    args: argparse.Namespace,
+    directory: str,
+    sessions: int,
+    search_client: FakeSearchClient,
+) -> Dict[str, Any]:
+    from a2a_server.deep_research.components.checkpoint import SQLiteSaver
+    from a2a_server.deep_research.components.graph import builder
+    from a2a_server.deep_research.components.metrics import (
+        LLM_DURATION,
+        NODE_DURATION,
+        MetricsCallbackHandler,
+    )
+
+    saver = SQLiteSaver(
+        os.path.join(directory, f"checkpoints-{sessions}.sqlite"),
+        maintenance_interval_seconds=0,
+    )
+    graph = builder.compile(checkpointer=saver)
+    handler = MetricsCallbackHandler()
+    nodes_before = node_seconds(NODE_DURATION)
+    llm_calls_before = total_runs(LLM_DURATION)
+    search_calls_before = search_client.calls
+
+    async def run_session(index: int) -> float:
+        config = {
+            "configurable": {
+                "thread_id": f"benchmark-{sessions}-{index}",
+                "max_queries": args.queries,
+                "search_depth": args.search_depth,
+                "num_reflections": args.reflections,
+                "max_parallel_sections": args.parallel_sections,
+                "llm_cache_enabled": args.caches,
+                "llm_cache_path": os.path.join(directory, "llm.sqlite"),
+                "search_cache_enabled": args.caches,
+                "search_cache_path": os.path.join(directory, "search.sqlite"),
+                "llm_requests_per_minute": 0,
+                "llm_tokens_per_minute": 0,
+                "search_requests_per_minute": 0,
+            },
+            "callbacks": [handler],
+        }
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [("user", f"{args.topic} ({index})")]}, config)
+        state = (await graph.aget_state(config)).values
+        if state["structured_response"].status != "completed":
+            raise RuntimeError(f"Session {index} did not complete")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(run_session(i) for i in range(sessions)))
+    wall_seconds = time.perf_counter() - start
+
+    nodes_after = node_seconds(NODE_DURATION)
+    checkpoint_stats = await asyncio.to_thread(saver.stats)
+    saver.close()
+    return {
+        "sessions": sessions,
+        "wall_seconds": wall_seconds,
+        "sessions_per_minute": sessions / wall_seconds * 60,
+        "latency_seconds": {
+            "mean": statistics.mean(latencies),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "max": max(latencies),
+        },
+        "llm_calls": total_runs(LLM_DURATION) - llm_calls_before,
+        "search_calls": search_client.calls - search_calls_before,
+        "node_seconds": {
+            node: {
+                "runs": totals["runs"] - nodes_before.get(node, {}).get("runs", 0),
+                "seconds": totals["seconds"]
+                - nodes_before.get(node, {}).get("seconds", 0),
+            }
+            for node, totals in sorted(nodes_after.items())
+        },
+        "checkpoint_bytes": checkpoint_stats["size_bytes"],
+        "checkpoint_bytes_per_session": checkpoint_stats["size_bytes"] / sessions,
+        "checkpoints": checkpoint_stats["checkpoints"],
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+async def run(args: argparse.Namespace, directory: str) -> Dict[str, Any]:
+    # The stores read their location on first use, so it is set before the graph loads
+    os.environ["BLOB_STORE_PATH"] = os.path.join(directory, "blobs")
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(directory, "artifacts")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+    from a2a_server.deep_research.components.artifact_store import get_artifact_store
+    from a2a_server.deep_research.components.llm import set_chat_model_factory
+    from a2a_server.deep_research.components.search import set_search_client
+
+    search_client = FakeSearchClient(
+        latency_seconds=args.search_latency, page_chars=args.page_chars
+    )
+    set_search_client(search_client)
+    set_chat_model_factory(
+        lambda model, temperature, **kwargs: FakeChatModel(
+            latency_seconds=args.llm_latency,
+            tokens_per_second=args.tokens_per_second,
+            output_tokens=args.output_tokens,
+            sections=args.sections,
+            queries=args.queries,
+            **kwargs,
+        )
+    )
+
+    levels = []
+    for sessions in args.concurrency:
+        levels.append(await run_level(args, directory, sessions, search_client))
+        print(
+            f"{sessions} sessions: {levels[-1]['wall_seconds']:.2f} s, "
+            f"p50 {levels[-1]['latency_seconds']['p50']:.2f} s",
+            file=sys.stderr,
+        )
+    get_artifact_store().flush()
+    return {"parameters": vars(args), "levels": levels}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 4],
+        help="Comma separated numbers of concurrent sessions to run",
+    )
+    parser.add_argument("--topic", default="The state of solid state batteries")
+    parser.add_argument("--sections", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=2)
+    parser.add_argument("--search-depth", type=int, default=2)
+    parser.add_argument("--reflections", type=int, default=1)
+    parser.add_argument("--parallel-sections", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=500)
+    parser.add_argument("--output-tokens", type=int, default=300)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--page-chars", type=int, default=20000)
+    parser.add_argument(
+        "--caches", action="store_true", help="Enable the LLM and search caches"
+    )
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+    output = args.output
+    del args.output
+
+    # The nodes print their progress, which would corrupt JSON written to stdout
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(
+        sys.stderr
+    ):
+        results = asyncio.run(run(args, directory))
+
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Deterministic stand-ins for the chat model and Tavily used by the offline benchmarks.
+
+Both fakes sleep to simulate latency and derive their output from a hash of their
+input, so the same run produces the same graph, queries and pages every time.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+WORDS = (
+    "research analysis system model data method result evidence study impact "
+    "performance design process network signal theory practice policy market energy "
+    "climate health learning memory quantum material protocol security economy"
+).split()
+
+
+def digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def make_text(seed: str, words: int) -> str:
+    rng = random.Random(digest(seed))
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that answers after a simulated delay with deterministic content.
+
+    Each call waits `latency_seconds` plus `output_tokens` at `tokens_per_second` and
+    reports token usage, so rate limiting, metrics and budgets see realistic numbers.
+    Structured output goes through tool calling like the Gemini client, producing
+    valid instances of the graph's schemas with `sections` sections and `queries`
+    queries per query generation.
+    """
+
+    latency_seconds: float = 0.2
+    tokens_per_second: float = 500
+    output_tokens: int = 300
+    sections: int = 4
+    queries: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _respond(
+        self, messages: List[BaseMessage], tools: Optional[List[Dict[str, Any]]]
+    ) -> AIMessage:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = prompt[-2000:]
+        if tools:
+            name = tools[0]["function"]["name"]
+            args = self._structured_output(name, seed)
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": name, "args": args, "id": f"call_{digest(seed)}"}],
+            )
+            output_tokens = len(json.dumps(args)) // 4 + 1
+        else:
+            message = AIMessage(content=make_text(seed, self.output_tokens))
+            output_tokens = self.output_tokens
+        input_tokens = len(prompt) // 4 + 1
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return message
+
+    def _structured_output(self, name: str, seed: str) -> Dict[str, Any]:
+        if name == "Route":
+            return {"step": "do_research"}
+        if name == "Sections":
+            return {
+                "sections": [
+                    {
+                        "section_name": f"Section {i + 1} {make_text(f'{seed}{i}', 2)}",
+                        "sub_sections": [
+                            make_text(f"{seed}{i}{j}", 24) for j in range(3)
+                        ],
+                    }
+                    for i in range(self.sections)
+                ]
+            }
+        if name == "Queries":
+            return {
+                "queries": [
+                    {"query": f"{make_text(f'{seed}{i}', 5)} {digest(seed) % 10000}"}
+                    for i in range(self.queries)
+                ]
+            }
+        if name == "Feedback":
+            return {"feedback": True}
+        if name == "SectionSummary":
+            return {
+                "summary": make_text(seed, 100),
+                "references": [f"Reference {i + 1}" for i in range(3)],
+            }
+        if name == "ConclusionAndReferences":
+            return {
+                "conclusion": make_text(seed, self.output_tokens),
+                "references": [f"Reference {i + 1}" for i in range(5)],
+            }
+        raise ValueError(f"No fake output for {name}")
+
+    def _delay(self, message: AIMessage) -> float:
+        return (
+            self.latency_seconds
+            + message.usage_metadata["output_tokens"] / self.tokens_per_second
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools"))
+        time.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools"))
+        await asyncio.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeSearchClient:
+    """
+    A Tavily stand-in returning synthetic pages of `page_chars` characters.
+
+    Pages depend only on the query and their position, so repeated queries return the
+    same pages and exercise the search cache and deduplication.
+    """
+
+    def __init__(self, latency_seconds: float = 0.5, page_chars: int = 20000):
+        self.latency_seconds = latency_seconds
+        self.page_chars = page_chars
+        self.calls = 0
+
+    async def ainvoke(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_seconds)
+        query = params["query"]
+        return {
+            "results": [
+                {
+                    "url": f"https://example.com/{digest(query) % 100000}/{i}",
+                    "title": f"{query} ({i + 1})",
+                    "raw_content": self._page(f"{query}|{i}"),
+                }
+                for i in range(params.get("max_results", 2))
+            ]
+        }
+
+    def _page(self, seed: str) -> str:
+        paragraphs = []
+        size = 0
+        while size < self.page_chars:
+            paragraph = make_text(f"{seed}|{len(paragraphs)}", 120)
+            paragraphs.append(paragraph)
+            size += len(paragraph) + 2
+        return "\n\n".join(paragraphs)[: self.page_chars]
@@ -0,0 +1,97 @@
+"""
+Measures how long the BM25 passage index takes to build and query.
+
+Synthetic pages are generated from a fixed vocabulary, added to the index in batches
+the way the search node adds them, and then queried with section descriptions.
+
+Usage:
+    PYTHONPATH=src python benchmarks/passage_index.py --pages 1000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from a2a_server.deep_research.components.passage_index import BM25Index
+from a2a_server.deep_research.components.struct import (
+    Query,
+    SearchResult,
+    SearchResults,
+    Section,
+)
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(4, 10)))
+        for _ in range(size)
+    ]
+
+
+def make_page(vocabulary: list, rng: random.Random, paragraphs: int) -> str:
+    return "\n\n".join(
+        " ".join(rng.choices(vocabulary, k=rng.randint(80, 200)))
+        for _ in range(paragraphs)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--paragraphs", type=int, default=6)
+    parser.add_argument("--batch", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(20000, rng)
+    batches = [
+        [
+            SearchResults(
+                query=Query(query=f"query {batch}"),
+                results=[
+                    SearchResult(
+                        url=f"https://example.com/{batch}/{page}",
+                        title=f"Page {batch}/{page}",
+                        raw_content=make_page(vocabulary, rng, args.paragraphs),
+                    )
+                    for page in range(args.batch)
+                ],
+            )
+        ]
+        for batch in range(args.pages // args.batch)
+    ]
+
+    index = BM25Index()
+    start = time.perf_counter()
+    for batch in batches:
+        index.add_search_results(batch)
+    build_seconds = time.perf_counter() - start
+
+    sections = [
+        Section(
+            section_name=" ".join(rng.choices(vocabulary, k=3)),
+            sub_sections=[" ".join(rng.choices(vocabulary, k=12)) for _ in range(3)],
+        )
+        for _ in range(args.queries)
+    ]
+    timings = []
+    for section in sections:
+        start = time.perf_counter()
+        index.search_section(section, args.top_k)
+        timings.append(time.perf_counter() - start)
+
+    print(f"passages:          {len(index)}")
+    print(f"terms:             {len(index.postings)}")
+    print(f"build:             {build_seconds * 1000:.1f} ms")
+    print(f"build per passage: {build_seconds / len(index) * 1e6:.1f} us")
+    print(f"section query p50: {statistics.median(timings) * 1000:.2f} ms")
+    print(f"section query max: {max(timings) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Kills a deep research run mid-report and checks that the restarted process resumes it.
+
+A child process streams a report through `DeepResearchAgent` with a SQLite checkpointer,
+the fake chat model and the fake Tavily client. Once it has streamed `--kill-after`
+sections it is killed with SIGKILL, and a new child resumes the session from its last
+checkpoint. The results show how many sections each process researched, so sections
+finished before the kill must not be researched again.
+
+Usage:
+    PYTHONPATH=src python benchmarks/resume.py --sections 6 --kill-after 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict
+
+SESSION_ID = "resume-benchmark"
+
+
+async def run_child(args: argparse.Namespace) -> None:
+    os.environ["CHECKPOINT_PATH"] = os.path.join(args.directory, "checkpoints.sqlite")
+    os.environ["BLOB_STORE_PATH"] = os.path.join(args.directory, "blobs")
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(args.directory, "artifacts")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(args.directory, "llm.sqlite")
+    os.environ["SEARCH_CACHE_PATH"] = os.path.join(args.directory, "search.sqlite")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+    sys.path.insert(
+        0,
+        os.path.join(
+            os.path.dirname(__file__), "..", "src", "a2a_server", "deep_research"
+        ),
+    )
+
+    from agent import DeepResearchAgent
+    from components.llm import set_chat_model_factory
+    from components.metrics import NODE_DURATION
+    from components.search import set_search_client
+    from fakes import FakeChatModel, FakeSearchClient
+
+    # The agent turns tracing on, which would try to reach LangSmith
+    os.environ["LANGSMITH_TRACING"] = "false"
+
+    search_client = FakeSearchClient(latency_seconds=args.search_latency)
+    set_search_client(search_client)
+    set_chat_model_factory(
+        lambda model, temperature, **kwargs: FakeChatModel(
+            latency_seconds=args.llm_latency, sections=args.sections, **kwargs
+        )
+    )
+
+    agent = DeepResearchAgent()
+    state = await agent.graph.aget_state(agent.get_config(SESSION_ID))
+    sections_checkpointed = len(state.values.get("final_section_content", []))
+    if args.child == "resume":
+        items = agent.resume(args.topic, SESSION_ID)
+    else:
+        items = agent.stream(args.topic, SESSION_ID)
+
+    # The nodes print their progress, so results go to the real stdout only
+    results = sys.stdout
+    report_chunks = 0
+    status = "working"
+    with contextlib.redirect_stdout(sys.stderr):
+        async for item in items:
+            if item.get("is_artifact_chunk"):
+                report_chunks += 1
+                print(json.dumps({"report_chunks": report_chunks}), file=results)
+                results.flush()
+            elif item["is_task_complete"]:
+                status = "completed"
+            elif item["require_user_input"]:
+                status = "input_required"
+
+    with NODE_DURATION.lock:
+        sections_researched = sum(
+            int(totals[1])
+            for label_values, (_, totals) in NODE_DURATION.values.items()
+            if label_values[0] == "final_section_formatter"
+        )
+    print(
+        json.dumps(
+            {
+                "status": status,
+                "report_chunks": report_chunks,
+                "sections_checkpointed": sections_checkpointed,
+                "sections_researched": sections_researched,
+                "search_calls": search_client.calls,
+            }
+        ),
+        flush=True,
+    )
+
+
+def start_child(args: argparse.Namespace, mode: str, directory: str):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            __file__,
+            "--child",
+            mode,
+            "--directory",
+            directory,
+            "--topic",
+            args.topic,
+            "--sections",
+            str(args.sections),
+            "--llm-latency",
+            str(args.llm_latency),
+            "--search-latency",
+            str(args.search_latency),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+def run(args: argparse.Namespace, directory: str) -> Dict[str, Any]:
+    child = start_child(args, "stream", directory)
+    streamed_sections = 0
+    for line in child.stdout:
+        streamed_sections = json.loads(line).get("report_chunks", streamed_sections)
+        if streamed_sections >= args.kill_after:
+            break
+    child.send_signal(signal.SIGKILL)
+    child.wait()
+    print(f"Killed the run after {streamed_sections} sections", file=sys.stderr)
+
+    child = start_child(args, "resume", directory)
+    lines = [json.loads(line) for line in child.stdout]
+    if child.wait() != 0:
+        raise RuntimeError("The resumed run failed")
+    resumed = lines[-1]
+    print(
+        f"Resumed run researched {resumed['sections_researched']} sections",
+        file=sys.stderr,
+    )
+    return {
+        "parameters": vars(args),
+        "sections_streamed_before_kill": streamed_sections,
+        "resumed": resumed,
+        # Sections checkpointed before the kill that the resumed run formatted again
+        "sections_redone": resumed["sections_researched"]
+        + resumed["sections_checkpointed"]
+        - args.sections,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--topic", default="The state of solid state batteries")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--kill-after", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--child", choices=["stream", "resume"], help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(run_child(args))
+        return
+
+    del args.child, args.directory
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(args, directory)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
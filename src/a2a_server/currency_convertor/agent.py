@@ -3,15 +3,20 @@ from collections.abc import AsyncIterable
 from typing import Any, Literal
 
 import httpx
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel
 
-memory = MemorySaver()
+from a2a_server.deep_research.components.checkpoint import get_checkpointer
+from a2a_server.deep_research.components.metrics import MetricsCallbackHandler
+
+memory = get_checkpointer("cache/currency_checkpoints.sqlite")
+callbacks: list[BaseCallbackHandler] = [MetricsCallbackHandler()]
 
 
 def get_api_key() -> str:
@@ -65,7 +70,10 @@ class CurrencyAgent:
                 response_format=ResponseFormat,
             )
 
-            config = {"configurable": {"thread_id": sessionId}}
+            config: RunnableConfig = {
+                "configurable": {"thread_id": sessionId},
+                "callbacks": callbacks,
+            }
             await self.graph.ainvoke({"messages": [("user", query)]}, config)
             return self.get_agent_response(config)
 
@@ -90,7 +98,10 @@ class CurrencyAgent:
             )
 
             inputs = {"messages": [("user", query)]}
-            config = {"configurable": {"thread_id": sessionId}}
+            config: RunnableConfig = {
+                "configurable": {"thread_id": sessionId},
+                "callbacks": callbacks,
+            }
 
             async for item in self.graph.astream(inputs, config, stream_mode="values"):
                 message = item["messages"][-1]
@@ -14,6 +14,8 @@ from common.utils.push_notification_auth import PushNotificationSenderAuth
 from dotenv import load_dotenv
 from task_manager import AgentTaskManager
 
+from a2a_server.deep_research.components.metrics import handle_metrics_endpoint
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -65,6 +67,7 @@ def main(host, port):
             notification_sender_auth.handle_jwks_endpoint,
             methods=["GET"],
         )
+        server.app.add_route("/metrics", handle_metrics_endpoint, methods=["GET"])
 
         logger.info(f"Starting server on {host}:{port}")
         server.start()
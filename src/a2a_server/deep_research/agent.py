@@ -1,14 +1,19 @@
 import os
 import uuid
 from collections.abc import AsyncIterable
-from typing import Any
+from typing import Any, Optional
 
+from components.budget import Budget, attach_budget, get_budget
+from components.checkpoint import get_checkpointer
+from components.configuration import Configuration
 from components.graph import builder
+from components.metrics import MetricsCallbackHandler
+from components.streaming import TextCoalescer
 from components.struct import ResponseFormat
-from langchain_core.messages import AIMessage, ToolMessage
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import AIMessage, HumanMessage, convert_to_messages
 
-memory = MemorySaver()
+memory = get_checkpointer()
+metrics_handler = MetricsCallbackHandler()
 
 os.environ["LANGSMITH_TRACING"] = "true"
 
@@ -18,55 +23,228 @@ class DeepResearchAgent:
     def __init__(self):
         self.graph = builder.compile(checkpointer=memory)
 
-    def invoke(self, query, sessionId) -> str:
-        config = {
-            "configurable": {
-                "thread_id": sessionId,
-                "max_queries": 2,
-                "search_depth": 2,
-                "num_reflections": 2,
-                "temperature": 0.7,
-            }
-        }
+    async def invoke(self, query, sessionId) -> str:
+        config = self.get_config(sessionId)
 
-        self.graph.invoke({"messages": [("user", query)]}, config)
-        return self.get_agent_response(config)
+        await self.graph.ainvoke({"messages": [("user", query)]}, config)
+        return await self.get_agent_response(config)
 
     async def stream(self, query, sessionId) -> AsyncIterable[dict[str, Any]]:
         inputs = {"messages": [("user", query)]}
-        config = {
+        async for item in self._stream(inputs, self.get_config(sessionId)):
+            yield item
+
+    async def resume(self, query: str, sessionId: str) -> AsyncIterable[dict[str, Any]]:
+        """
+        Continues the session's interrupted run from its last checkpoint.
+
+        Sections finished before the interruption are not researched again; they are
+        streamed first and the run picks up where it stopped, charged with what the
+        interrupted run spent of its budget. A run that finished before its task was
+        marked as done only returns its saved response. A session without a run of the
+        query, e.g. because the process stopped before its first checkpoint, starts the
+        query again.
+        """
+        config = self.get_config(sessionId)
+        current_state = await self.get_saved_state(config)
+
+        # A step whose tasks all finished before the interruption has no next nodes
+        # but still has tasks, whose saved writes are applied when the run continues
+        if not current_state.tasks:
+            if self.has_answered(current_state.values, query):
+                yield await self.get_agent_response(config)
+                return
+            async for item in self.stream(query, sessionId):
+                yield item
+            return
+
+        finished_sections = {
+            section_content.section_index: section_content.content
+            for section_content in current_state.values.get("final_section_content", [])
+        }
+        async for item in self._stream(None, config, finished_sections):
+            yield item
+
+    async def _stream(
+        self,
+        inputs: Optional[dict[str, Any]],
+        config: dict[str, Any],
+        finished_sections: Optional[dict[int, str]] = None,
+    ) -> AsyncIterable[dict[str, Any]]:
+        configurable = Configuration.from_runnable_config(config)
+        coalescer = TextCoalescer(
+            configurable.token_stream_chunk_chars,
+            configurable.token_stream_interval_seconds,
+        )
+        token_nodes = (
+            self.TOKEN_STREAMING_NODES if configurable.token_stream_chunk_chars else ()
+        )
+
+        # Sections may finish out of order when they run in parallel, so each one
+        # is held back until every section before it has been streamed.
+        finished_sections = dict(finished_sections or {})
+        next_section_index = 0
+        for chunk in self.pop_report_chunks(finished_sections, next_section_index):
+            next_section_index += 1
+            yield chunk
+
+        async for namespace, mode, data in self.graph.astream(
+            inputs, config, stream_mode=["messages", "updates"], subgraphs=True
+        ):
+            if mode == "messages":
+                message, metadata = data
+                node = metadata.get("langgraph_node")
+                section_index = metadata.get("section_index")
+                if (
+                    node in token_nodes
+                    and isinstance(message, AIMessage)
+                    and isinstance(message.content, str)
+                    and message.content
+                ):
+                    text = coalescer.add(
+                        (node, namespace, section_index), message.content
+                    )
+                    if text:
+                        yield self.get_text_chunk(node, text, section_index)
+                continue
+
+            # A node has finished, so the rest of its streamed text is released
+            for (node, _, section_index), text in coalescer.flush():
+                yield self.get_text_chunk(node, text, section_index)
+
+            # Only the parent graph's updates carry finished sections
+            if namespace:
+                continue
+
+            for node, values in data.items():
+                if not isinstance(values, dict):
+                    continue
+                if node == "research_agent":
+                    for section_content in values.get("final_section_content", []):
+                        finished_sections[section_content.section_index] = (
+                            section_content.content
+                        )
+                    for chunk in self.pop_report_chunks(
+                        finished_sections, next_section_index
+                    ):
+                        next_section_index += 1
+                        yield chunk
+                elif node == "finalizer":
+                    yield self.get_report_chunk(
+                        "\n\n" + values["report_conclusion"],
+                        last_chunk=True,
+                        metadata=self.get_budget_metadata(config),
+                    )
+
+        yield await self.get_agent_response(config)
+
+    async def get_saved_state(self, config: dict[str, Any]) -> Any:
+        """Returns the session's saved state, charging its budget usage to `config`."""
+        current_state = await self.graph.aget_state(config)
+        budget_usage = current_state.values.get("budget_usage")
+        if budget_usage:
+            get_budget(config).restore(budget_usage)
+        return current_state
+
+    def has_answered(self, values: dict[str, Any], query: str) -> bool:
+        """
+        Returns whether the saved state holds the response of a finished run of `query`.
+
+        The state of a session outlives its runs, so a response only counts when the
+        query is the session's last user message, and not one of an earlier run.
+        """
+        if not values.get("structured_response"):
+            return False
+        user_messages = [
+            message
+            for message in convert_to_messages(values.get("messages", []))
+            if isinstance(message, HumanMessage)
+        ]
+        return bool(user_messages) and user_messages[-1].content == query
+
+    def pop_report_chunks(
+        self, finished_sections: dict[int, str], next_section_index: int
+    ) -> list[dict[str, Any]]:
+        """Removes the finished sections that can be streamed next and wraps them."""
+        chunks = []
+        while next_section_index in finished_sections:
+            content = finished_sections.pop(next_section_index)
+            chunks.append(
+                self.get_report_chunk(
+                    content if next_section_index == 0 else "\n\n" + content,
+                    last_chunk=False,
+                )
+            )
+            next_section_index += 1
+        return chunks
+
+    def get_text_chunk(
+        self, node: str, content: str, section_index: Optional[int] = None
+    ) -> dict[str, Any]:
+        """
+        Wraps text streamed by a node's LLM as a progress update of the task.
+
+        Text written for a section carries the section's index, since sections formatted
+        in parallel stream their text at the same time.
+        """
+        metadata: dict[str, Any] = {"node": node}
+        if section_index is not None:
+            metadata["section_index"] = section_index
+        return {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": content,
+            "is_text_chunk": True,
+            "metadata": metadata,
+        }
+
+    def get_report_chunk(
+        self,
+        content: str,
+        last_chunk: bool,
+        metadata: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """
+        Wraps part of the report for streaming as a chunk of the report artifact.
+
+        Joining the content of every chunk gives the final report.
+        """
+        return {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": content,
+            "is_artifact_chunk": True,
+            "last_chunk": last_chunk,
+            "metadata": metadata,
+        }
+
+    def get_budget_metadata(self, config: dict[str, Any]) -> dict[str, Any]:
+        """Reports what the run used against its budget, and which limit ended it."""
+        return {"budget": get_budget(config).usage()}
+
+    def get_config(self, sessionId: str) -> dict[str, Any]:
+        config: dict[str, Any] = {
             "configurable": {
                 "thread_id": sessionId,
                 "max_queries": 2,
                 "search_depth": 2,
                 "num_reflections": 2,
                 "temperature": 0.7,
-            }
+            },
+            "callbacks": [metrics_handler],
         }
 
-        for item in self.graph.stream(inputs, config, stream_mode="values"):
-            message = item["messages"][-1]
-            if (
-                isinstance(message, AIMessage)
-                and message.tool_calls
-                and len(message.tool_calls) > 0
-            ):
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Looking up the exchange rates...",
-                }
-            elif isinstance(message, ToolMessage):
-                yield {
-                    "is_task_complete": False,
-                    "require_user_input": False,
-                    "content": "Processing the exchange rates..",
-                }
+        # Each run of the graph gets a fresh budget, so time spent waiting for the
+        # user's feedback on the report structure is not charged; only a resumed run
+        # is charged with what the run it continues spent
+        budgeted_config: dict[str, Any] = attach_budget(
+            config,
+            Budget.from_configuration(Configuration.from_runnable_config(config)),
+        )
+        return budgeted_config
 
-        yield self.get_agent_response(config)
-
-    def get_agent_response(self, config):
-        current_state = self.graph.get_state(config)
+    async def get_agent_response(self, config):
+        current_state = await self.graph.aget_state(config)
         structured_response = current_state.values.get("structured_response")
 
         if structured_response and isinstance(structured_response, ResponseFormat):
@@ -84,6 +262,7 @@ class DeepResearchAgent:
                     "is_task_complete": True,
                     "require_user_input": False,
                     "content": structured_response.message,
+                    "metadata": self.get_budget_metadata(config),
                 }
 
         return {
@@ -93,3 +272,6 @@ class DeepResearchAgent:
         }
 
     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
+
+    # Nodes whose LLM output is streamed token by token while it is generated
+    TOKEN_STREAMING_NODES = ("report_structure_planner", "final_section_formatter")
@@ -0,0 +1,191 @@
+import atexit
+import gzip
+import logging
+import os
+import queue
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import REGISTRY, stats_collector
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    """
+    Stores the files produced by research tasks, one directory per task.
+
+    Writes are queued and return immediately; a background thread writes them in
+    batches, keeping only the last write of a file within a batch, so nodes never block
+    the event loop on disk I/O. With `compress` the files are gzipped and stored with a
+    .gz suffix. Reads wait for the queued writes first, so they always see the latest
+    content.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        compress: bool = False,
+        batch_size: int = 64,
+        flush_interval_seconds: float = 0.5,
+    ):
+        self.root = os.path.abspath(root)
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.writes = 0
+        self.batches = 0
+        self.queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self.thread = threading.Thread(
+            target=self._run, name="artifact-store-writer", daemon=True
+        )
+        self.thread.start()
+
+    def path(self, namespace: str, name: str) -> str:
+        """
+        Returns the file path of an artifact, inside the namespace directory.
+
+        Raises:
+            ValueError: If `name` points outside of the namespace
+        """
+        directory = os.path.join(self.root, re.sub(r"[^\w.-]|^\.", "_", namespace))
+        path = os.path.normpath(os.path.join(directory, name))
+        if not path.startswith(directory + os.sep) or not name:
+            raise ValueError(f"Invalid artifact name: {name}")
+        return path + ".gz" if self.compress else path
+
+    def write(self, namespace: str, name: str, content: str) -> None:
+        """Queues `content` to be written as the artifact `name` of `namespace`."""
+        self.queue.put((self.path(namespace, name), content))
+
+    def read(self, namespace: str, name: str) -> Optional[str]:
+        """Returns the content of an artifact, or None if it does not exist."""
+        try:
+            path = self.path(namespace, name)
+        except ValueError:
+            return None
+        self.flush()
+        try:
+            if self.compress:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    return f.read()
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list(self, namespace: str) -> List[str]:
+        """Returns the names of the artifacts stored for `namespace`."""
+        directory = os.path.dirname(self.path(namespace, "artifact"))
+        self.flush()
+        names = []
+        for parent, _, files in os.walk(directory):
+            for file in files:
+                name = os.path.relpath(os.path.join(parent, file), directory)
+                if self.compress:
+                    name = name.removesuffix(".gz")
+                names.append(name.replace(os.sep, "/"))
+        return sorted(names)
+
+    def flush(self) -> None:
+        """Waits until every queued write is on disk."""
+        self.queue.join()
+
+    def close(self) -> None:
+        """Writes the queued artifacts and stops the writer thread."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "queued": self.queue.qsize(),
+        }
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            items = [item]
+            # Batch whatever else arrives shortly after, up to the batch size
+            while item is not None and len(items) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=self.flush_interval_seconds)
+                except queue.Empty:
+                    break
+                items.append(item)
+
+            pending: Dict[str, str] = {}
+            for item in items:
+                if item is not None:
+                    path, content = item
+                    pending[path] = content
+            for path, content in pending.items():
+                # A failed write must not stop the thread, or flushes would wait forever
+                try:
+                    self._write_file(path, content)
+                except Exception:
+                    logger.exception(f"Could not write artifact {path}")
+            self.writes += len(pending)
+            self.batches += 1
+            for _ in items:
+                self.queue.task_done()
+            if items[-1] is None:
+                return
+
+    def _write_file(self, path: str, content: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        if self.compress:
+            with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+                f.write(content)
+        else:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+        os.replace(temp_path, path)
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """
+    Returns the process-wide artifact store.
+
+    ARTIFACT_STORE_PATH sets its directory (logs by default) and ARTIFACT_STORE_COMPRESS
+    set to true gzips the stored files. Queued writes are flushed when the process
+    exits.
+    """
+    global _artifact_store
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore(
+                os.environ.get("ARTIFACT_STORE_PATH") or "logs",
+                compress=os.environ.get("ARTIFACT_STORE_COMPRESS", "").lower()
+                in ("1", "true", "yes"),
+            )
+            atexit.register(_artifact_store.close)
+        return _artifact_store
+
+
+def _artifact_store_stats() -> Dict[tuple, Dict[str, int]]:
+    # The store is only created once a task writes an artifact
+    store = _artifact_store
+    return {} if store is None else {(store.root,): store.stats()}
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_artifact_store",
+        ["path"],
+        _artifact_store_stats,
+        {
+            "writes": ("counter", "Artifact files written to disk"),
+            "batches": ("counter", "Batches of artifact writes"),
+            "queued": ("gauge", "Artifact writes waiting to be written"),
+        },
+    )
+)
@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+
+from .metrics import REGISTRY, stats_collector
+from .struct import SearchResult, SearchResults
+
+logger = logging.getLogger(__name__)
+
+# A blob's handle is the hex SHA-256 of its content
+HANDLE = re.compile("[0-9a-f]{64}")
+
+
+class BlobStore:
+    """
+    A content-addressed store for large text, kept out of the graph state.
+
+    Each blob is written once to `<root>/<first two hex digits>/<sha256>` as raw UTF-8,
+    so storing the same page again is free and the handle of a blob never changes.
+    Blobs are read with mmap and the most recently read ones are kept decoded in memory
+    up to `max_cached_chars` characters, so nodes that resolve the same pages again do
+    not go back to disk. Blobs nothing refers to any more are removed by `collect`.
+    """
+
+    def __init__(self, root: str, max_cached_chars: int = 8_000_000):
+        self.root = root
+        self.max_cached_chars = max_cached_chars
+        self.cached: OrderedDict[str, str] = OrderedDict()
+        self.cached_chars = 0
+        self.writes = 0
+        self.bytes_written = 0
+        self.reads = 0
+        self.hits = 0
+        self.deleted = 0
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, handle: str) -> str:
+        return os.path.join(self.root, handle[:2], handle)
+
+    def put(self, content: str) -> str:
+        """Stores `content` if it is not stored yet and returns its handle."""
+        data = content.encode("utf-8")
+        handle = hashlib.sha256(data).hexdigest()
+        path = self.path(handle)
+        try:
+            # Storing a blob again makes it recent, so `collect` gives the new
+            # reference time to be checkpointed
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a temporary name first so readers never see a partial blob
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            with self.lock:
+                self.writes += 1
+                self.bytes_written += len(data)
+        self._remember(handle, content)
+        return handle
+
+    def get(self, handle: str) -> str:
+        """Returns the content stored under `handle`, or raises KeyError."""
+        with self.lock:
+            content = self.cached.get(handle)
+            if content is not None:
+                self.cached.move_to_end(handle)
+                self.hits += 1
+                return content
+
+        try:
+            with open(self.path(handle), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    content = ""
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        content = data[:].decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(handle) from None
+
+        with self.lock:
+            self.reads += 1
+        self._remember(handle, content)
+        return content
+
+    def __contains__(self, handle: str) -> bool:
+        return os.path.exists(self.path(handle))
+
+    def collect(self, referenced: Set[str], min_age_seconds: float) -> int:
+        """
+        Deletes the blobs whose handles are not in `referenced` and returns how many.
+
+        Blobs stored in the last `min_age_seconds` are kept, since the state that
+        refers to them may not be checkpointed yet.
+        """
+        cutoff = time.time() - min_age_seconds
+        deleted = 0
+        for directory in os.listdir(self.root):
+            directory_path = os.path.join(self.root, directory)
+            if len(directory) != 2 or not os.path.isdir(directory_path):
+                continue
+            for handle in os.listdir(directory_path):
+                if not HANDLE.fullmatch(handle) or handle in referenced:
+                    continue
+                path = os.path.join(directory_path, handle)
+                try:
+                    if min_age_seconds > 0 and os.path.getmtime(path) > cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                deleted += 1
+                with self.lock:
+                    content = self.cached.pop(handle, None)
+                    if content is not None:
+                        self.cached_chars -= len(content)
+        with self.lock:
+            self.deleted += deleted
+        return deleted
+
+    def _remember(self, handle: str, content: str) -> None:
+        if len(content) > self.max_cached_chars:
+            return
+        with self.lock:
+            if handle in self.cached:
+                self.cached.move_to_end(handle)
+                return
+            self.cached[handle] = content
+            self.cached_chars += len(content)
+            while self.cached_chars > self.max_cached_chars:
+                _, evicted = self.cached.popitem(last=False)
+                self.cached_chars -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "writes": self.writes,
+                "bytes_written": self.bytes_written,
+                "reads": self.reads,
+                "hits": self.hits,
+                "deleted": self.deleted,
+                "cached_chars": self.cached_chars,
+            }
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """
+    Returns the process-wide blob store.
+
+    Its location is read from BLOB_STORE_PATH (cache/blobs by default). Handles stored
+    in durable checkpoints refer to it, so it must not change between restarts.
+    """
+    global _blob_store
+    with _blob_store_lock:
+        if _blob_store is None:
+            _blob_store = BlobStore(os.environ.get("BLOB_STORE_PATH") or "cache/blobs")
+        return _blob_store
+
+
+def _blob_store_stats() -> Dict[tuple, Dict[str, int]]:
+    # The store is only created once a run offloads content
+    store = _blob_store
+    return {} if store is None else {(store.root,): store.stats()}
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_blob_store",
+        ["path"],
+        _blob_store_stats,
+        {
+            "writes": ("counter", "Blobs written to the store"),
+            "bytes_written": ("counter", "Bytes of blobs written to the store"),
+            "reads": ("counter", "Blobs read back from disk"),
+            "hits": ("counter", "Blob reads served from memory"),
+            "deleted": ("counter", "Unreferenced blobs deleted from the store"),
+            "cached_chars": ("gauge", "Characters of blobs kept in memory"),
+        },
+    )
+)
+
+
+def resolve_content(result: SearchResult) -> str:
+    """
+    Returns the raw content of a search result, loading it from the blob store.
+
+    A result whose blob is missing, for example because the store was deleted while a
+    checkpoint still refers to it, is treated as a page without content.
+    """
+    if result.raw_content is not None:
+        return result.raw_content
+    if result.content_ref is None:
+        return ""
+    try:
+        return get_blob_store().get(result.content_ref)
+    except KeyError:
+        logger.warning(f"Content of {result.url} is missing from the blob store")
+        return ""
+
+
+def offload_search_results(
+    search_results: List[SearchResults], store: BlobStore
+) -> List[SearchResults]:
+    """Moves the raw content of every result into `store`, leaving only its handle."""
+    return [
+        query_results.model_copy(
+            update={
+                "results": [
+                    (
+                        result
+                        if result.raw_content is None
+                        else result.model_copy(
+                            update={
+                                "raw_content": None,
+                                "content_ref": store.put(result.raw_content),
+                            }
+                        )
+                    )
+                    for result in query_results.results
+                ]
+            }
+        )
+        for query_results in search_results
+    ]
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+
+from .configuration import Configuration
+from .llm_cache import is_cached
+from .metrics import get_token_usage
+
+
+class Budget(BaseCallbackHandler):
+    """
+    Token, model call, search call and wall-clock limits for a single research task.
+
+    The budget is attached to the run config with `attach_budget`, as a callback that
+    counts every chat model call not served from the LLM cache and the tokens it
+    reports, and in the configurable so nodes can charge searches and check whether it
+    is used up. A limit of 0 disables it. Limits are checked between calls, so a task
+    can overshoot by the calls in flight. Nodes save the usage in the graph state, so a
+    resumed run can `restore` what the interrupted one spent.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        max_tokens: int = 0,
+        max_llm_calls: int = 0,
+        max_search_calls: int = 0,
+        max_seconds: float = 0,
+    ):
+        self.max_tokens = max_tokens
+        self.max_llm_calls = max_llm_calls
+        self.max_search_calls = max_search_calls
+        self.max_seconds = max_seconds
+        self.started_at = time.monotonic()
+        self.tokens = 0
+        self.llm_calls = 0
+        self.search_calls = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_configuration(cls, configurable: Configuration) -> "Budget":
+        return cls(
+            max_tokens=configurable.budget_max_tokens,
+            max_llm_calls=configurable.budget_max_llm_calls,
+            max_search_calls=configurable.budget_max_search_calls,
+            max_seconds=configurable.budget_max_seconds,
+        )
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        tokens = get_token_usage(response)["total_tokens"]
+        cached = is_cached(response)
+        with self.lock:
+            self.tokens += tokens
+            if not cached:
+                self.llm_calls += 1
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        # The failed call still reached the model
+        with self.lock:
+            self.llm_calls += 1
+
+    def restore(self, usage: Dict[str, Any]) -> None:
+        """Charges what an interrupted run of the task used, as returned by `usage`."""
+        with self.lock:
+            self.tokens += usage.get("tokens", 0)
+            self.llm_calls += usage.get("llm_calls", 0)
+            self.search_calls += usage.get("search_calls", 0)
+            self.started_at -= usage.get("elapsed_seconds", 0)
+
+    def charge_searches(self, calls: int) -> None:
+        with self.lock:
+            self.search_calls += calls
+
+    def remaining_searches(self) -> Optional[int]:
+        """Returns how many more searches fit in the budget, or None without a limit."""
+        if not self.max_search_calls:
+            return None
+        with self.lock:
+            return max(0, self.max_search_calls - self.search_calls)
+
+    def exhausted_reason(self) -> Optional[str]:
+        """Returns which limit is used up, or None while the task is within budget."""
+        elapsed_seconds = time.monotonic() - self.started_at
+        with self.lock:
+            if self.max_tokens and self.tokens >= self.max_tokens:
+                return "tokens"
+            if self.max_llm_calls and self.llm_calls >= self.max_llm_calls:
+                return "llm_calls"
+            if self.max_search_calls and self.search_calls >= self.max_search_calls:
+                return "search_calls"
+        if self.max_seconds and elapsed_seconds >= self.max_seconds:
+            return "deadline"
+        return None
+
+    def usage(self) -> Dict[str, Any]:
+        """Returns what the task used against each limit, for the report metadata."""
+        elapsed_seconds = time.monotonic() - self.started_at
+        exhausted_reason = self.exhausted_reason()
+        with self.lock:
+            return {
+                "tokens": self.tokens,
+                "llm_calls": self.llm_calls,
+                "search_calls": self.search_calls,
+                "elapsed_seconds": round(elapsed_seconds, 3),
+                "max_tokens": self.max_tokens,
+                "max_llm_calls": self.max_llm_calls,
+                "max_search_calls": self.max_search_calls,
+                "max_seconds": self.max_seconds,
+                "exhausted": exhausted_reason,
+            }
+
+
+def attach_budget(config: RunnableConfig, budget: Budget) -> RunnableConfig:
+    """Returns a copy of `config` that charges its runs to `budget`."""
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.copy()
+        callbacks.add_handler(budget)
+    else:
+        callbacks = [*(callbacks or []), budget]
+    return {
+        **config,
+        "configurable": {**config.get("configurable", {}), "budget": budget},
+        "callbacks": callbacks,
+    }
+
+
+def get_budget(config: RunnableConfig) -> Optional[Budget]:
+    """Returns the budget attached to the run config, if any."""
+    return config.get("configurable", {}).get("budget")
+
+
+def get_budget_usage(config: RunnableConfig) -> Optional[Dict[str, Any]]:
+    """Returns what the run used against its budget, or None without a budget."""
+    budget = get_budget(config)
+    return None if budget is None else budget.usage()
+
+
+def budget_exhausted(config: RunnableConfig) -> Optional[str]:
+    """Returns which limit of the run's budget is used up, or None."""
+    budget = get_budget(config)
+    return None if budget is None else budget.exhausted_reason()
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .metrics import REGISTRY, stats_collector
+
+
+class SQLiteCache:
+    """
+    A small persistent key-value cache stored in a local SQLite file.
+
+    Entries expire `ttl_seconds` after they were written (0 keeps them forever) and
+    once more than `max_entries` are stored the least recently used ones are evicted.
+    The cache is safe to share between threads and keeps hit, miss and eviction
+    counters for the lifetime of the process.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 0, max_entries: int = 0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)"
+        )
+        self.connection.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row: Optional[Tuple[str, float]] = self.connection.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.connection.commit()
+                self.misses += 1
+                return None
+
+            self.connection.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.connection.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.max_entries:
+                (count,) = self.connection.execute(
+                    "SELECT COUNT(*) FROM entries"
+                ).fetchone()
+                if count > self.max_entries:
+                    self.connection.execute(
+                        "DELETE FROM entries WHERE key IN ("
+                        "SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+                    self.evictions += count - self.max_entries
+            self.connection.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            (entries,) = self.connection.execute(
+                "SELECT COUNT(*) FROM entries"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+
+_caches: Dict[str, SQLiteCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path: str, ttl_seconds: float = 0, max_entries: int = 0) -> SQLiteCache:
+    """Returns the process-wide cache stored at `path`, updating its limits."""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = SQLiteCache(path, ttl_seconds, max_entries)
+        else:
+            cache.ttl_seconds = ttl_seconds
+            cache.max_entries = max_entries
+        return cache
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_cache",
+        ["path"],
+        lambda: {(path,): cache.stats() for path, cache in list(_caches.items())},
+        {
+            "hits": ("counter", "Cache lookups that found a fresh entry"),
+            "misses": ("counter", "Cache lookups that found no fresh entry"),
+            "evictions": ("counter", "Cache entries evicted to stay within the limit"),
+            "entries": ("gauge", "Entries stored in the cache"),
+        },
+    )
+)
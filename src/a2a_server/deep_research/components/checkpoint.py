@@ -0,0 +1,644 @@
+import asyncio
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+from .blob_store import BlobStore, get_blob_store
+from .metrics import REGISTRY, stats_collector
+
+# Blob store handles show up verbatim in the serialized values
+BLOB_HANDLE = re.compile(rb"[0-9a-f]{64}")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    channel_versions TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_created_at ON checkpoints (created_at);
+"""
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """
+    A LangGraph checkpointer stored in a local SQLite file.
+
+    Channel values are stored once per version, as the in-memory saver does, so a
+    checkpoint only writes the channels that changed. To keep the file bounded, only
+    the last `max_checkpoints` checkpoints of every thread and namespace are kept, and
+    threads that have not been checkpointed for `thread_ttl_seconds` are deleted (0
+    disables either limit). A background thread removes channel values no checkpoint
+    refers to any more, expires threads and returns free pages to the file system every
+    `maintenance_interval_seconds`. Given the `blob_store` that search results were
+    offloaded to, it also deletes the blobs no stored channel value or pending write
+    refers to, once they are `blob_grace_seconds` old.
+
+    The async methods run the same queries in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_checkpoints: int = 20,
+        thread_ttl_seconds: float = 0,
+        maintenance_interval_seconds: float = 600,
+        blob_store: Optional[BlobStore] = None,
+        blob_grace_seconds: float = 3600,
+    ):
+        super().__init__()
+        self.path = path
+        self.blob_store = blob_store
+        self.blob_grace_seconds = blob_grace_seconds
+        # The latest checkpoint reads the pending sends of its parent
+        self.max_checkpoints = max(max_checkpoints, 2) if max_checkpoints else 0
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.pruned_checkpoints = 0
+        self.expired_threads = 0
+        self.collected_blobs = 0
+        self.maintenance_runs = 0
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # Only takes effect on a new file, before any table is created
+        self.connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+        self.stopped = threading.Event()
+        self.maintenance_thread = None
+        if maintenance_interval_seconds > 0:
+            self.maintenance_thread = threading.Thread(
+                target=self._maintenance_loop,
+                args=(maintenance_interval_seconds,),
+                name="checkpoint-maintenance",
+                daemon=True,
+            )
+            self.maintenance_thread.start()
+
+        with _savers_lock:
+            _savers[path] = self
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self.lock:
+            if checkpoint_id:
+                row = self.connection.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                    "metadata_type, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.connection.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                    "metadata_type, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._load_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        conditions: List[str] = []
+        parameters: List[Any] = []
+        if config:
+            conditions.append("thread_id = ?")
+            parameters.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                conditions.append("checkpoint_ns = ?")
+                parameters.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                parameters.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            parameters.append(before_checkpoint_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self.lock:
+            rows = self.connection.execute(query, parameters).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.serde.loads_typed((row[4], row[5]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            with self.lock:
+                checkpoint_tuple = self._load_tuple(thread_id, checkpoint_ns, row)
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        stored: Dict[str, Any] = dict(checkpoint)
+        stored.pop("pending_sends", None)
+        values: Dict[str, Any] = stored.pop("channel_values")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO blobs "
+                "(thread_id, checkpoint_ns, channel, version, type, blob) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        str(version),
+                        *(
+                            self.serde.dumps_typed(values[channel])
+                            if channel in values
+                            else ("empty", b"")
+                        ),
+                    )
+                    for channel, version in new_versions.items()
+                ],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, "
+                "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, "
+                "metadata, channel_versions, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                    json.dumps(
+                        {
+                            channel: str(version)
+                            for channel, version in checkpoint[
+                                "channel_versions"
+                            ].items()
+                        }
+                    ),
+                    time.time(),
+                ),
+            )
+            if self.max_checkpoints:
+                self._prune(thread_id, checkpoint_ns)
+            self.connection.commit()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, index),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for index, (channel, value) in enumerate(writes)
+        ]
+        with self.lock:
+            # Special writes (errors, interrupts, ...) have negative indexes and are
+            # replaced, regular writes are only stored once, as in the in-memory saver.
+            for verb, selected in (
+                ("IGNORE", [row for row in rows if row[4] >= 0]),
+                ("REPLACE", [row for row in rows if row[4] < 0]),
+            ):
+                self.connection.executemany(
+                    f"INSERT OR {verb} INTO writes (thread_id, checkpoint_ns, "
+                    "checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    selected,
+                )
+            self.connection.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            self._delete_threads([thread_id])
+            self.connection.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+    def run_maintenance(self) -> None:
+        """
+        Expires idle threads, collects unreferenced channel values and vacuums the file.
+
+        Unreferenced blobs of the blob store are deleted afterwards. Runs periodically
+        in the background and can also be called directly.
+        """
+        with self.lock:
+            if self.thread_ttl_seconds:
+                expired = [
+                    thread_id
+                    for (thread_id,) in self.connection.execute(
+                        "SELECT thread_id FROM checkpoints GROUP BY thread_id "
+                        "HAVING MAX(created_at) < ?",
+                        (time.time() - self.thread_ttl_seconds,),
+                    )
+                ]
+                self._delete_threads(expired)
+                self.expired_threads += len(expired)
+
+            referenced = set()
+            for thread_id, checkpoint_ns, channel_versions in self.connection.execute(
+                "SELECT thread_id, checkpoint_ns, channel_versions FROM checkpoints"
+            ):
+                for channel, version in json.loads(channel_versions).items():
+                    referenced.add((thread_id, checkpoint_ns, channel, version))
+            unreferenced = [
+                key
+                for key in self.connection.execute(
+                    "SELECT thread_id, checkpoint_ns, channel, version FROM blobs"
+                )
+                if key not in referenced
+            ]
+            self.connection.executemany(
+                "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                unreferenced,
+            )
+            self.collected_blobs += len(unreferenced)
+            self.connection.commit()
+
+            self.connection.execute("PRAGMA incremental_vacuum")
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.maintenance_runs += 1
+
+        if self.blob_store is not None:
+            # Every open saver offloading to the same store may refer to its blobs
+            with _savers_lock:
+                savers = [self] + [
+                    saver
+                    for saver in _savers.values()
+                    if saver is not self and saver.blob_store is self.blob_store
+                ]
+            handles: Set[str] = set()
+            for saver in savers:
+                handles |= saver.referenced_blobs()
+            self.blob_store.collect(handles, self.blob_grace_seconds)
+
+    def referenced_blobs(self) -> Set[str]:
+        """Returns the blob store handles found in the stored values and writes."""
+        referenced: Set[str] = set()
+        with self.lock:
+            for (value,) in self.connection.execute(
+                "SELECT blob FROM blobs UNION ALL SELECT value FROM writes"
+            ):
+                referenced.update(
+                    match.decode("ascii") for match in BLOB_HANDLE.findall(value)
+                )
+        return referenced
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the size of the store and counters of what retention removed."""
+        with self.lock:
+            (threads,) = self.connection.execute(
+                "SELECT COUNT(DISTINCT thread_id) FROM checkpoints"
+            ).fetchone()
+            counts = {
+                table: self.connection.execute(
+                    f"SELECT COUNT(*) FROM {table}"
+                ).fetchone()[0]
+                for table in ("checkpoints", "blobs", "writes")
+            }
+            (page_count,) = self.connection.execute("PRAGMA page_count").fetchone()
+            (page_size,) = self.connection.execute("PRAGMA page_size").fetchone()
+            (free_pages,) = self.connection.execute("PRAGMA freelist_count").fetchone()
+        return {
+            "threads": threads,
+            **counts,
+            "size_bytes": page_count * page_size,
+            "free_bytes": free_pages * page_size,
+            "pruned_checkpoints": self.pruned_checkpoints,
+            "expired_threads": self.expired_threads,
+            "collected_blobs": self.collected_blobs,
+            "maintenance_runs": self.maintenance_runs,
+        }
+
+    def close(self) -> None:
+        with _savers_lock:
+            if _savers.get(self.path) is self:
+                del _savers[self.path]
+        self.stopped.set()
+        if self.maintenance_thread is not None:
+            self.maintenance_thread.join()
+        with self.lock:
+            self.connection.close()
+
+    def _maintenance_loop(self, interval_seconds: float) -> None:
+        while not self.stopped.wait(interval_seconds):
+            try:
+                self.run_maintenance()
+            except (sqlite3.Error, OSError):
+                # A failed run is retried at the next interval
+                pass
+
+    def _load_tuple(
+        self, thread_id: str, checkpoint_ns: str, row: Sequence[Any]
+    ) -> CheckpointTuple:
+        (
+            checkpoint_id,
+            parent_checkpoint_id,
+            checkpoint_type,
+            checkpoint_blob,
+            metadata_type,
+            metadata_blob,
+        ) = row
+        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self.connection.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+
+        pending_sends = []
+        if parent_checkpoint_id:
+            pending_sends = [
+                self.serde.loads_typed((value_type, value))
+                for value_type, value in self.connection.execute(
+                    "SELECT type, value FROM writes WHERE thread_id = ? "
+                    "AND checkpoint_ns = ? AND checkpoint_id = ? AND channel = ? "
+                    "ORDER BY task_path, task_id, idx",
+                    (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+                )
+            ]
+
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((value_type, value)))
+            for task_id, channel, value_type, value in self.connection.execute(
+                "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? "
+                "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY rowid",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+        checkpoint["channel_values"] = channel_values
+        checkpoint["pending_sends"] = pending_sends
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            pending_writes=pending_writes,
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        pruned = [
+            checkpoint_id
+            for (checkpoint_id,) in self.connection.execute(
+                "SELECT checkpoint_id FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.max_checkpoints),
+            )
+        ]
+        for table in ("checkpoints", "writes"):
+            self.connection.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in pruned],
+            )
+        self.pruned_checkpoints += len(pruned)
+
+    def _delete_threads(self, thread_ids: List[str]) -> None:
+        for table in ("checkpoints", "blobs", "writes"):
+            self.connection.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ?",
+                [(thread_id,) for thread_id in thread_ids],
+            )
+
+
+# The open savers by path, whose stats are exposed as metrics
+_savers: Dict[str, SQLiteSaver] = {}
+_savers_lock = threading.Lock()
+
+
+def get_checkpointer(
+    default_path: str = "cache/checkpoints.sqlite",
+) -> BaseCheckpointSaver:
+    """
+    Builds the checkpointer configured by environment variables.
+
+    CHECKPOINT_PATH overrides the SQLite file checkpoints are stored in, and an empty
+    value keeps them in memory instead. CHECKPOINT_MAX_PER_THREAD,
+    CHECKPOINT_THREAD_TTL_SECONDS and CHECKPOINT_MAINTENANCE_INTERVAL_SECONDS set the
+    retention of the SQLite store, whose maintenance also deletes the blobs of the
+    process-wide blob store that no checkpoint refers to.
+    """
+    path = os.environ.get("CHECKPOINT_PATH", default_path)
+    if not path:
+        return MemorySaver()
+    return SQLiteSaver(
+        path,
+        max_checkpoints=int(os.environ.get("CHECKPOINT_MAX_PER_THREAD", 20)),
+        thread_ttl_seconds=float(
+            os.environ.get("CHECKPOINT_THREAD_TTL_SECONDS", 7 * 86400)
+        ),
+        maintenance_interval_seconds=float(
+            os.environ.get("CHECKPOINT_MAINTENANCE_INTERVAL_SECONDS", 600)
+        ),
+        blob_store=get_blob_store(),
+    )
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_checkpoint",
+        ["path"],
+        lambda: {(path,): saver.stats() for path, saver in list(_savers.items())},
+        {
+            "threads": ("gauge", "Threads stored in the checkpointer"),
+            "checkpoints": ("gauge", "Checkpoints stored in the checkpointer"),
+            "blobs": ("gauge", "Channel values stored in the checkpointer"),
+            "writes": ("gauge", "Pending writes stored in the checkpointer"),
+            "size_bytes": ("gauge", "Size of the checkpoint file"),
+            "free_bytes": ("gauge", "Free space in the checkpoint file"),
+            "pruned_checkpoints": ("counter", "Checkpoints removed by retention"),
+            "expired_threads": ("counter", "Idle threads deleted by maintenance"),
+            "collected_blobs": (
+                "counter",
+                "Unreferenced channel values deleted by maintenance",
+            ),
+            "maintenance_runs": ("counter", "Maintenance runs of the checkpointer"),
+        },
+    )
+)
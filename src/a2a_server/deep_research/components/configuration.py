@@ -7,11 +7,76 @@ from langchain_core.runnables import RunnableConfig
 
 @dataclass(kw_only=True)
 class Configuration:
+    model: str = "gemini-2.0-flash-lite"
     temperature: float = 0.5
     max_queries: int = 3
     search_depth: int = 2
+    search_concurrency: int = 5
+    search_timeout_seconds: float = 30
+    search_cache_enabled: bool = True
+    search_cache_path: str = "cache/search.sqlite"
+    search_cache_ttl_seconds: float = 86400
+    search_cache_max_entries: int = 10000
     num_reflections: int = 2
-    section_delay_seconds: int = 3
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "cache/llm.sqlite"
+    llm_cache_ttl_seconds: float = 604800
+    llm_cache_max_entries: int = 10000
+    # Comma-separated names of nodes that always call the model, e.g.
+    # "final_section_formatter"
+    llm_cache_excluded_nodes: str = ""
+    # Process-wide quotas shared by every session, 0 disables the limit
+    llm_requests_per_minute: int = 30
+    llm_tokens_per_minute: int = 1000000
+    search_requests_per_minute: int = 100
+    # 1 keeps the serial section loop, 0 fans out every section at once and any
+    # other value researches the sections in waves of at most that many.
+    max_parallel_sections: int = 1
+    # Approximate token budget for the search results given to the result
+    # accumulator, filled with the passages most relevant to the section. 0 sends
+    # every search result as is.
+    context_token_budget: int = 8000
+    # Number of passages retrieved from the task's BM25 index for each sub-section
+    # and given to the result accumulator and final section formatter. 0 disables
+    # retrieval and the accumulator reads the section's own search results.
+    passage_top_k: int = 4
+    # Generated queries at least this similar (shingle Jaccard) to a query already
+    # searched for the section are not searched again. 0 only drops exact repeats.
+    query_similarity_threshold: float = 0.7
+    # After the first round, only merge the new round's search results into the
+    # accumulated content instead of re-reading every result of the section.
+    incremental_accumulation: bool = True
+    # Streamed LLM tokens are sent to the client in chunks of about this many
+    # characters, or sooner once the interval has passed. 0 disables token streaming.
+    token_stream_chunk_chars: int = 200
+    token_stream_interval_seconds: float = 0.5
+    # Keep the raw content of search results in the content-addressed blob store at
+    # BLOB_STORE_PATH and only its handle in the graph state and checkpoints.
+    blob_store_enabled: bool = True
+    # Generate a section's internal knowledge alongside its first queries instead of
+    # before them. Only the final section formatter reads the knowledge.
+    parallel_section_knowledge: bool = True
+    # Generate the knowledge of every section in one batch right after the sections are
+    # formatted, so no section waits for its own knowledge call.
+    batch_section_knowledge: bool = False
+    # Summarize each section while it is formatted and write the conclusion from the
+    # summaries and the sources they selected instead of from every section and search
+    # result. The summary words are split between the sections, at least 50 each, so
+    # the finalizer's prompt stays about the same size however many sections there are.
+    map_reduce_finalizer: bool = False
+    finalizer_summary_words: int = 1200
+    section_summary_references: int = 3
+    # Route obvious replies to the report structure, such as "looks good", and replies
+    # to the same agent message whose route the LLM already decided, without asking
+    # the LLM again.
+    human_feedback_fast_path: bool = True
+    # Per-task limits, 0 disables a limit. Once one is used up no more searches or
+    # reflection rounds are started and the report is finalized with the research
+    # gathered so far.
+    budget_max_tokens: int = 0
+    budget_max_llm_calls: int = 0
+    budget_max_search_calls: int = 0
+    budget_max_seconds: float = 0
 
     @classmethod
     def from_runnable_config(cls, config: RunnableConfig) -> "Configuration":
@@ -21,9 +86,25 @@ class Configuration:
         )
 
         values: dict[str, Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name, f.default))
+            f.name: _coerce(
+                f.type,
+                os.environ.get(f.name.upper(), configurable.get(f.name, f.default)),
+            )
             for f in fields(cls)
             if f.init
         }
 
         return cls(**values)
+
+
+def _coerce(field_type: Any, value: Any) -> Any:
+    """Converts string values coming from environment variables to the field type."""
+    if not isinstance(value, str) or field_type in (str, "str"):
+        return value
+    if field_type in (bool, "bool"):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if field_type in (int, "int"):
+        return int(value)
+    if field_type in (float, "float"):
+        return float(value)
+    return value
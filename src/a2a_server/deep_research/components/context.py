@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from .blob_store import resolve_content
+from .struct import SearchResults, Section
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the "
+    "their this to was were what when where which who why will with".split()
+)
+
+
+@dataclass
+class Passage:
+    """A chunk of a search result's raw content, keeping where it came from."""
+
+    query: str
+    url: str
+    title: str
+    text: str
+    position: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimates the number of tokens in a text, at 4 characters per token."""
+    return len(text) // 4 + 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases a text and splits it into words, dropping stopwords."""
+    return [
+        token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS
+    ]
+
+
+def split_passages(text: str, max_chars: int = 1200) -> List[str]:
+    """
+    Splits raw page content into passages of at most about `max_chars` characters.
+
+    Paragraphs are kept together where possible and short ones are merged, so a
+    passage is a readable unit rather than an arbitrary slice of the page.
+    """
+    passages: List[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(". ", 0, max_chars)
+            cut = cut + 1 if cut > max_chars // 2 else max_chars
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+
+        if current and len(current) + len(paragraph) + 1 > max_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current} {paragraph}".strip()
+
+    if current:
+        passages.append(current)
+    return passages
+
+
+def extract_passages(
+    search_results: Iterable[SearchResults], max_chars: int = 1200
+) -> List[Passage]:
+    """Splits every search result into passages tagged with its query, URL and title."""
+    passages: List[Passage] = []
+    for query_results in search_results:
+        for result in query_results.results:
+            for text in split_passages(resolve_content(result), max_chars):
+                passages.append(
+                    Passage(
+                        query=query_results.query.query,
+                        url=result.url,
+                        title=result.title,
+                        text=text,
+                        position=len(passages),
+                    )
+                )
+    return passages
+
+
+def section_terms(section: Section) -> List[str]:
+    """Returns the terms describing what a section and its sub-sections are about."""
+    return tokenize(" ".join([section.section_name, *section.sub_sections]))
+
+
+def score_passages(passages: List[Passage], terms: List[str]) -> List[float]:
+    """
+    Scores passages by how often they mention the given terms.
+
+    Rare terms weigh more than terms found in most passages, and the score is
+    normalized by passage length so long passages are not favored just for their size.
+    """
+    passage_terms = [Counter(tokenize(passage.text)) for passage in passages]
+    query_terms = set(terms)
+    document_frequency = Counter(
+        term for counts in passage_terms for term in query_terms if term in counts
+    )
+
+    scores = []
+    for counts in passage_terms:
+        score = sum(
+            counts[term] * math.log(1 + len(passages) / document_frequency[term])
+            for term in query_terms
+            if term in counts
+        )
+        scores.append(score / math.sqrt(sum(counts.values()) or 1))
+    return scores
+
+
+def pack_passages(passages: List[Passage], scores: List[float], budget: int) -> str:
+    """
+    Fills a token budget with the best scoring passages and renders their sources.
+
+    Selected passages are grouped by query and source and kept in their original order,
+    so the packed context reads like the search results it was taken from. A budget of
+    0 keeps every passage.
+    """
+    selected: List[Passage] = []
+    used = 0
+    for score, passage in sorted(
+        zip(scores, passages), key=lambda scored: (-scored[0], scored[1].position)
+    ):
+        tokens = estimate_tokens(passage.text)
+        if budget and used + tokens > budget:
+            continue
+        selected.append(passage)
+        used += tokens
+
+    sources: Dict[Tuple[str, str, str], List[str]] = {}
+    for passage in sorted(selected, key=lambda passage: passage.position):
+        sources.setdefault((passage.query, passage.url, passage.title), []).append(
+            passage.text
+        )
+
+    blocks = []
+    for (query, url, title), texts in sources.items():
+        blocks.append(
+            f"Query: {query}\nSource: {title} ({url})\n" + "\n...\n".join(texts)
+        )
+    return "\n\n".join(blocks)
+
+
+def pack_search_results(
+    search_results: List[SearchResults], section: Section, budget: int
+) -> str:
+    """Packs the search result passages most relevant to `section` into `budget`."""
+    passages = extract_passages(search_results)
+    return pack_passages(
+        passages, score_passages(passages, section_terms(section)), budget
+    )
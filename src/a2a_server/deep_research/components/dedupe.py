@@ -0,0 +1,140 @@
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .blob_store import get_blob_store
+from .struct import SearchResult, SearchResults
+
+TRACKING_PARAMETERS = frozenset(
+    ["fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid", "yclid"]
+)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes a URL so different spellings of the same page compare equal.
+
+    The scheme and host are lowercased, "www." and default ports are dropped, the
+    fragment and tracking parameters (utm_*, fbclid, ...) are removed, the remaining
+    query parameters are sorted and trailing slashes are stripped from the path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith("utm_")
+            and key.lower() not in TRACKING_PARAMETERS
+        )
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), query, ""))
+
+
+def content_hash(content: str) -> str:
+    """Hashes page content ignoring case and whitespace, to catch mirrored pages."""
+    return hashlib.sha256(" ".join(content.lower().split()).encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _stored_content_hash(content_ref: str) -> str:
+    try:
+        return content_hash(get_blob_store().get(content_ref))
+    except KeyError:
+        # A lost page can not be compared, so it only matches itself
+        return content_ref
+
+
+def result_content_hash(result: SearchResult) -> str:
+    """
+    Returns the content hash of a search result.
+
+    The reducer hashes every stored page on every step, so the hashes of pages kept in
+    the blob store are remembered by handle instead of loading the page each time.
+    """
+    if result.raw_content is None and result.content_ref is not None:
+        return _stored_content_hash(result.content_ref)
+    return content_hash(result.raw_content or "")
+
+
+def merge_search_results(
+    left: List[SearchResults], right: List[SearchResults]
+) -> List[SearchResults]:
+    """
+    Reducer that merges new search results into the stored ones, keeping each page once.
+
+    Results for the same query are merged into a single SearchResults. A page is stored
+    under the first query that found it; later queries that return the same page, by
+    canonical URL or by content, only list its URL in `duplicate_urls`. Merging results
+    that are already stored changes nothing.
+    """
+    merged: Dict[str, SearchResults] = {}
+    stored_urls: Dict[str, Set[str]] = {}
+    seen_urls: Set[str] = set()
+    seen_hashes: Set[str] = set()
+
+    for search_results in [*(left or []), *(right or [])]:
+        query = search_results.query.query
+        entry = merged.get(query)
+        if entry is None:
+            entry = merged[query] = SearchResults(
+                query=search_results.query, results=[]
+            )
+            stored_urls[query] = set()
+
+        for result in search_results.results:
+            url = canonical_url(result.url)
+            digest = result_content_hash(result)
+            if url in seen_urls or digest in seen_hashes:
+                if url not in stored_urls[query] and url not in entry.duplicate_urls:
+                    entry.duplicate_urls.append(url)
+                continue
+            seen_urls.add(url)
+            seen_hashes.add(digest)
+            stored_urls[query].add(url)
+            entry.results.append(result)
+
+        for url in search_results.duplicate_urls:
+            if url not in stored_urls[query] and url not in entry.duplicate_urls:
+                entry.duplicate_urls.append(url)
+
+    return list(merged.values())
+
+
+def search_result_urls(search_results: List[SearchResults]) -> List[str]:
+    """Returns the canonical URLs of the pages stored in `search_results`."""
+    return [
+        canonical_url(result.url)
+        for query_results in search_results
+        for result in query_results.results
+    ]
+
+
+def exclude_search_results(
+    search_results: List[SearchResults], urls: Set[str]
+) -> List[SearchResults]:
+    """Returns the search results whose pages' canonical URLs are not in `urls`."""
+    remaining = []
+    for query_results in search_results:
+        results = [
+            result
+            for result in query_results.results
+            if canonical_url(result.url) not in urls
+        ]
+        if results:
+            remaining.append(
+                SearchResults(
+                    query=query_results.query,
+                    results=results,
+                    duplicate_urls=query_results.duplicate_urls,
+                )
+            )
+    return remaining
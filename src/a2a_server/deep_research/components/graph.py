@@ -11,8 +11,12 @@ from .nodes import (
     reflection_feedback_node,
     report_structure_planner_node,
     result_accumulator_node,
+    route_after_section_knowledge,
+    route_section_research,
     section_formatter_node,
+    section_knowledge_batch_node,
     section_knowledge_node,
+    section_summarizer_node,
     tavily_search_node,
 )
 from .state import AgentState, ResearchState
@@ -28,13 +32,19 @@ research_builder.add_node("tavily_search", tavily_search_node)
 research_builder.add_node("result_accumulator", result_accumulator_node)
 research_builder.add_node("reflection", reflection_feedback_node)
 research_builder.add_node("final_section_formatter", final_section_formatter_node)
+research_builder.add_node("section_summarizer", section_summarizer_node)
 
-research_builder.add_edge(START, "section_knowledge")
-research_builder.add_edge("section_knowledge", "query_generator")
+research_builder.add_conditional_edges(
+    START, route_section_research, ["section_knowledge", "query_generator"]
+)
+research_builder.add_conditional_edges(
+    "section_knowledge", route_after_section_knowledge, ["query_generator"]
+)
 research_builder.add_edge("query_generator", "tavily_search")
 research_builder.add_edge("tavily_search", "result_accumulator")
 research_builder.add_edge("result_accumulator", "reflection")
 research_builder.add_edge("final_section_formatter", END)
+research_builder.add_edge("section_summarizer", END)
 
 
 builder = StateGraph(AgentState)
@@ -42,6 +52,7 @@ builder = StateGraph(AgentState)
 builder.add_node("report_structure_planner", report_structure_planner_node)
 builder.add_node("human_feedback", human_feedback_node)
 builder.add_node("section_formatter", section_formatter_node)
+builder.add_node("section_knowledge_batch", section_knowledge_batch_node)
 builder.add_node("queue_next_section", queue_next_section_node)
 builder.add_node("research_agent", research_builder.compile())
 builder.add_node("finalizer", finalizer_node)
@@ -49,7 +60,6 @@ builder.add_node("output", output)
 
 builder.set_entry_point("report_structure_planner")
 builder.add_edge("report_structure_planner", "human_feedback")
-builder.add_edge("section_formatter", "queue_next_section")
 builder.add_edge("research_agent", "queue_next_section")
 builder.add_edge("finalizer", "output")
 builder.add_edge("output", END)
@@ -0,0 +1,129 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from dotenv import load_dotenv
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel
+
+from .configuration import Configuration
+from .llm_cache import SQLiteLLMCache, get_llm_cache
+from .rate_limiter import RateLimiter, TokenUsageCallbackHandler, get_rate_limiter
+
+load_dotenv()
+
+_chat_models: Dict[Tuple[Hashable, ...], BaseChatModel] = {}
+_chains: Dict[Tuple[Hashable, ...], Runnable] = {}
+_registry_lock = threading.Lock()
+_chat_model_factory: Optional[Callable[..., BaseChatModel]] = None
+
+
+def create_chat_model(model: str, temperature: float, **kwargs: Any) -> BaseChatModel:
+    """Builds a new chat model client, once per configuration in the registry."""
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, **kwargs)
+
+
+def set_chat_model_factory(
+    factory: Optional[Callable[..., BaseChatModel]],
+) -> None:
+    """
+    Replaces the function that builds chat model clients, None restores the default.
+
+    The factory is called like `create_chat_model`, so benchmarks and tests can run the
+    graph on a fake model. Clients and chains built by the previous factory are dropped.
+    """
+    global _chat_model_factory
+    with _registry_lock:
+        _chat_model_factory = factory
+        _chat_models.clear()
+        _chains.clear()
+
+
+def get_llm_rate_limiter(configurable: Configuration) -> RateLimiter:
+    """Returns the process-wide rate limiter shared by every LLM call."""
+    return get_rate_limiter(
+        "google",
+        requests_per_minute=configurable.llm_requests_per_minute,
+        tokens_per_minute=configurable.llm_tokens_per_minute,
+    )
+
+
+def get_node_llm_cache(
+    configurable: Configuration, node_name: str
+) -> Optional[SQLiteLLMCache]:
+    """
+    Returns the LLM response cache for a node.
+
+    Returns None when the cache is disabled or the node is listed in
+    `llm_cache_excluded_nodes`.
+    """
+    excluded_nodes = {
+        excluded_node.strip()
+        for excluded_node in configurable.llm_cache_excluded_nodes.split(",")
+    }
+    if not configurable.llm_cache_enabled or node_name in excluded_nodes:
+        return None
+    return get_llm_cache(
+        configurable.llm_cache_path,
+        ttl_seconds=configurable.llm_cache_ttl_seconds,
+        max_entries=configurable.llm_cache_max_entries,
+    )
+
+
+def get_llm(configurable: Configuration, node_name: str) -> BaseChatModel:
+    """
+    Returns the shared chat model for a node, with the configured model and temperature.
+
+    Clients are built once per (model, temperature, cache) and reused by every session.
+    Calls that miss the cache acquire from the shared LLM rate limiter and charge it
+    with the tokens they used.
+    """
+    rate_limiter = get_llm_rate_limiter(configurable)
+    llm_cache = get_node_llm_cache(configurable, node_name)
+    key = (
+        configurable.model,
+        configurable.temperature,
+        None if llm_cache is None else llm_cache.cache.path,
+    )
+
+    with _registry_lock:
+        chat_model = _chat_models.get(key)
+        if chat_model is None:
+            factory = _chat_model_factory or create_chat_model
+            chat_model = _chat_models[key] = factory(
+                configurable.model,
+                configurable.temperature,
+                cache=False if llm_cache is None else llm_cache,
+                rate_limiter=rate_limiter,
+                callbacks=[TokenUsageCallbackHandler(rate_limiter)],
+            )
+        return chat_model
+
+
+def get_chain(
+    configurable: Configuration,
+    node_name: str,
+    prompt: ChatPromptTemplate,
+    schema: Optional[Type[BaseModel]] = None,
+) -> Runnable:
+    """
+    Returns the pre-composed `prompt | llm` chain for a node.
+
+    When `schema` is given the model is asked for structured output of that type.
+    Chains are built once per node, prompt, schema and model client and shared by
+    every session, so nodes only pay for rendering the prompt and the model call.
+    """
+    chat_model = get_llm(configurable, node_name)
+    key = (node_name, id(prompt), schema, id(chat_model))
+
+    with _registry_lock:
+        chain = _chains.get(key)
+        if chain is None:
+            chain = _chains[key] = prompt | (
+                chat_model
+                if schema is None
+                else chat_model.with_structured_output(schema)
+            )
+        return chain
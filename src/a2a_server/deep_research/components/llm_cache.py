@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import LLMResult
+
+from .cache import SQLiteCache, get_cache
+
+# Response metadata key marking the messages of a cache hit
+CACHED_KEY = "cached"
+
+
+def is_cached(response: LLMResult) -> bool:
+    """Returns whether a model call's response was served from the LLM cache."""
+    messages = [
+        getattr(generation, "message", None)
+        for generations in response.generations
+        for generation in generations
+    ]
+    return bool(messages) and all(
+        message is not None and message.response_metadata.get(CACHED_KEY, False)
+        for message in messages
+    )
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    An exact-match LLM response cache stored in a SQLiteCache.
+
+    Chat models pass the rendered prompt messages and an `llm_string` describing the
+    model, its parameters (model name, temperature, ...) and any bound tools, which is
+    how structured output schemas are requested. Entries are addressed by a hash of
+    both, so a change to any of them is a cache miss. The cached generations keep the
+    original messages, including tool calls, so structured output parsers rebuild the
+    same pydantic objects on a hit. Token usage is dropped from hits, which are marked
+    in their response metadata so callbacks can tell them from model calls.
+    """
+
+    def __init__(self, cache: SQLiteCache):
+        self.cache = cache
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.cache.get(self._key(prompt, llm_string))
+        if value is None:
+            return None
+
+        generations: RETURN_VAL_TYPE = loads(value)
+        for generation in generations:
+            # A hit uses no tokens, so it must not count against the token quotas
+            message = getattr(generation, "message", None)
+            if message is not None and hasattr(message, "usage_metadata"):
+                message.usage_metadata = None
+                message.response_metadata = {
+                    **message.response_metadata,
+                    CACHED_KEY: True,
+                }
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.cache.set(self._key(prompt, llm_string), dumps(list(return_val)))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+
+_llm_caches: Dict[str, SQLiteLLMCache] = {}
+_llm_caches_lock = threading.Lock()
+
+
+def get_llm_cache(
+    path: str, ttl_seconds: float = 0, max_entries: int = 0
+) -> SQLiteLLMCache:
+    """Returns the process-wide LLM cache stored at `path`, updating its limits."""
+    cache = get_cache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+    with _llm_caches_lock:
+        llm_cache = _llm_caches.get(path)
+        if llm_cache is None:
+            llm_cache = _llm_caches[path] = SQLiteLLMCache(cache)
+        return llm_cache
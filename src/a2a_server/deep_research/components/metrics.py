@@ -0,0 +1,346 @@
+import asyncio
+import bisect
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.errors import GraphBubbleUp
+
+if TYPE_CHECKING:
+    # The server's web framework, only needed to serve the metrics endpoint
+    from starlette.requests import Request
+    from starlette.responses import PlainTextResponse
+
+LabelValues = Tuple[str, ...]
+# A collector returns (name, type, help, {label values: value}, label names) samples
+Sample = Tuple[str, str, str, Dict[LabelValues, float], Sequence[str]]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing value per combination of label values."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = dict(self.values)
+        return [
+            f"{self.name}{_format_labels(self.labels, label_values)} "
+            f"{_format_value(value)}"
+            for label_values, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per combination of label values."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: the count of each bucket (not cumulative), the sum and count
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(label_values)
+            if entry is None:
+                entry = self.values[label_values] = (
+                    [0] * (len(self.buckets) + 1),
+                    [0.0, 0.0],
+                )
+            counts, totals = entry
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        with self.lock:
+            values = {
+                label_values: (list(counts), list(totals))
+                for label_values, (counts, totals) in self.values.items()
+            }
+        lines = []
+        for label_values, (counts, (total, count)) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labels, label_values, le=_format_value(bound)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {_format_value(count)}")
+        return lines
+
+
+Metric = TypeVar("Metric", Counter, Histogram)
+
+
+class MetricsRegistry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+
+    Counters and histograms are updated as work happens, which only costs a dict update
+    under a lock. Statistics that components already keep, like cache hits, are read by
+    collectors only when the metrics are rendered, so they cost nothing until scraped.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: List[Any] = []
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+        self.lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        with self.lock:
+            self.collectors.append(collector)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics)
+            collectors = list(self.collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, type, help, values, labels in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type}")
+                lines.extend(
+                    f"{name}{_format_labels(labels, label_values)} "
+                    f"{_format_value(value)}"
+                    for label_values, value in sorted(values.items())
+                )
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Metric) -> Metric:
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+
+def stats_collector(
+    prefix: str,
+    labels: Sequence[str],
+    get_stats: Callable[[], Mapping[LabelValues, Mapping[str, float]]],
+    descriptions: Dict[str, Tuple[str, str]],
+) -> Callable[[], Iterable[Sample]]:
+    """
+    Builds a collector exposing the `stats()` of components as metrics.
+
+    `get_stats` returns the stats of each component by its label values and
+    `descriptions` maps the exposed stats keys to their metric type and help. Counters
+    get a _total suffix.
+    """
+
+    def collect() -> Iterable[Sample]:
+        stats = get_stats()
+        for key, (type, help) in descriptions.items():
+            name = f"{prefix}_{key}_total" if type == "counter" else f"{prefix}_{key}"
+            values = {
+                label_values: component_stats[key]
+                for label_values, component_stats in stats.items()
+            }
+            yield name, type, help, values, labels
+
+    return collect
+
+
+REGISTRY = MetricsRegistry()
+
+
+async def handle_metrics_endpoint(request: "Request") -> "PlainTextResponse":
+    """Serves the process metrics in the Prometheus text format."""
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(
+        await asyncio.to_thread(REGISTRY.render),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+NODE_DURATION = REGISTRY.histogram(
+    "agent_node_duration_seconds", "Wall time of each graph node run", ["node"]
+)
+NODE_ERRORS = REGISTRY.counter(
+    "agent_node_errors_total", "Graph node runs that raised an error", ["node"]
+)
+LLM_DURATION = REGISTRY.histogram(
+    "agent_llm_duration_seconds", "Wall time of each chat model call", ["node"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "agent_llm_tokens_total", "Tokens used by chat model calls", ["node", "type"]
+)
+LLM_ERRORS = REGISTRY.counter(
+    "agent_llm_errors_total", "Chat model calls that raised an error", ["node"]
+)
+RETRIES = REGISTRY.counter(
+    "agent_retries_total", "Retries of runnables configured with retries"
+)
+SEARCH_DURATION = REGISTRY.histogram(
+    "agent_search_duration_seconds", "Wall time of each Tavily search", ["outcome"]
+)
+
+
+def get_token_usage(response: LLMResult) -> Dict[str, int]:
+    """Sums the input, output and total tokens reported by a model call's generations."""
+    usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    for generations in response.generations:
+        for generation in generations:
+            usage_metadata = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage_metadata:
+                for key in usage:
+                    usage[key] += usage_metadata.get(key, 0)
+    return usage
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records graph node and chat model metrics from LangChain callbacks.
+
+    Passed in the `callbacks` of a graph run, it times every node run and every chat
+    model call, attributing model calls and their tokens to the node that made them.
+    Runs are matched by run id, so one handler can be shared by concurrent runs.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.runs: Dict[UUID, Tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata, only the node has its name
+        if node is not None and kwargs.get("name") == node:
+            self.runs[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is not None:
+            NODE_DURATION.observe(time.perf_counter() - run[1], run[0])
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is not None:
+            NODE_DURATION.observe(time.perf_counter() - run[1], run[0])
+            # Interrupts and commands to a parent graph are raised, but are not errors
+            if not isinstance(error, GraphBubbleUp):
+                NODE_ERRORS.inc(run[0])
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node", "")
+        self.runs[run_id] = (node, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is None:
+            return
+        node, started_at = run
+        LLM_DURATION.observe(time.perf_counter() - started_at, node)
+        usage = get_token_usage(response)
+        if any(usage.values()):
+            LLM_TOKENS.inc(node, "input", amount=usage["input_tokens"])
+            LLM_TOKENS.inc(node, "output", amount=usage["output_tokens"])
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        run = self.runs.pop(run_id, None)
+        if run is not None:
+            LLM_DURATION.observe(time.perf_counter() - run[1], run[0])
+            LLM_ERRORS.inc(run[0])
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        RETRIES.inc()
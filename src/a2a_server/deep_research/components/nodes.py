@@ -1,8 +1,6 @@
-import os
-import time
-from typing import Dict, Literal
+import asyncio
+from typing import Dict, Hashable, List, Literal, Optional, Tuple, Union
 
-from dotenv import load_dotenv
 from langchain_core.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
@@ -10,39 +8,243 @@ from langchain_core.prompts import (
     SystemMessagePromptTemplate,
 )
 from langchain_core.runnables import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_tavily import TavilySearch
 from langgraph.types import Command, Send
 
+from .artifact_store import get_artifact_store
+from .blob_store import get_blob_store, offload_search_results
+from .budget import budget_exhausted, get_budget, get_budget_usage
+from .cache import SQLiteCache, get_cache
 from .configuration import Configuration
+from .context import pack_passages, pack_search_results
+from .dedupe import canonical_url, exclude_search_results, search_result_urls
+from .llm import get_chain
+from .passage_index import BM25Index, get_passage_index, reset_passage_index
 from .prompts import (
     FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE,
     FINALIZER_SYSTEM_PROMPT_TEMPLATE,
     QUERY_GENERATOR_SYSTEM_PROMPT_TEMPLATE,
     REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE,
     REPORT_STRUCTURE_PLANNER_SYSTEM_PROMPT_TEMPLATE,
+    RESULT_ACCUMULATOR_INCREMENTAL_SYSTEM_PROMPT_TEMPLATE,
     RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE,
     SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE,
     SECTION_KNOWLEDGE_SYSTEM_PROMPT_TEMPLATE,
+    SECTION_SUMMARIZER_SYSTEM_PROMPT_TEMPLATE,
 )
+from .query_filter import filter_queries, is_repeat
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .route_classifier import classify_route, record_route
+from .search import search_queries
 from .state import AgentState, ResearchState
 from .struct import (
     ConclusionAndReferences,
     Feedback,
     Queries,
+    Query,
     ResponseFormat,
     Route,
-    SearchResult,
     SearchResults,
+    Section,
+    SectionContent,
     Sections,
+    SectionSummary,
+    SummarizedSection,
 )
 
-load_dotenv()
+REPORT_STRUCTURE_PLANNER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            REPORT_STRUCTURE_PLANNER_SYSTEM_PROMPT_TEMPLATE
+        ),
+        MessagesPlaceholder(variable_name="messages"),
+    ]
+)
+
+HUMAN_FEEDBACK_PROMPT = ChatPromptTemplate.from_messages(
+    [MessagesPlaceholder(variable_name="messages")]
+)
+
+SECTION_FORMATTER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE
+        ),
+        MessagesPlaceholder(variable_name="messages"),
+    ]
+)
+
+SECTION_KNOWLEDGE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            SECTION_KNOWLEDGE_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(template="{section}"),
+    ]
+)
+
+QUERY_GENERATOR_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            QUERY_GENERATOR_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(
+            template="Section: {section}\nPrevious Queries: {searched_queries}\n"
+            "Reflection Feedback: {reflection_feedback}"
+        ),
+    ]
+)
+
+RESULT_ACCUMULATOR_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(template="{search_results}"),
+    ]
+)
+
+RESULT_ACCUMULATOR_INCREMENTAL_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            RESULT_ACCUMULATOR_INCREMENTAL_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(
+            template="Section: {section}\nAccumulated Content: {accumulated_content}\n"
+            "New Search Results: {search_results}"
+        ),
+    ]
+)
+
+REFLECTION_FEEDBACK_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(
+            template="Section: {section}\nAccumulated Content: {accumulated_content}"
+        ),
+    ]
+)
+
+FINAL_SECTION_FORMATTER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(
+            template="Internal Knowledge: {knowledge}\n"
+            "Search Result content: {accumulated_content}"
+        ),
+    ]
+)
+
+FINAL_SECTION_FORMATTER_WITH_PASSAGES_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(
+            template="Internal Knowledge: {knowledge}\n"
+            "Search Result content: {accumulated_content}\n"
+            "Source passages: {passages}"
+        ),
+    ]
+)
+
+SECTION_SUMMARIZER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(
+            SECTION_SUMMARIZER_SYSTEM_PROMPT_TEMPLATE
+        ),
+        HumanMessagePromptTemplate.from_template(
+            template="Section: {section}\nInternal Knowledge: {knowledge}\n"
+            "Search Result content: {accumulated_content}\n\n"
+            "Searches: {extracted_search_results}"
+        ),
+    ]
+)
+
+FINALIZER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(FINALIZER_SYSTEM_PROMPT_TEMPLATE),
+        HumanMessagePromptTemplate.from_template(
+            template="Section Contents: {final_section_content}\n\n"
+            "Searches: {extracted_search_results}"
+        ),
+    ]
+)
+
+
+def get_search_rate_limiter(configurable: Configuration) -> RateLimiter:
+    """Returns the process-wide rate limiter shared by every Tavily search."""
+    return get_rate_limiter(
+        "tavily", requests_per_minute=configurable.search_requests_per_minute
+    )
+
+
+def get_search_cache(configurable: Configuration) -> Optional[SQLiteCache]:
+    """Returns the persistent search result cache, or None when it is disabled."""
+    if not configurable.search_cache_enabled:
+        return None
+    return get_cache(
+        configurable.search_cache_path,
+        ttl_seconds=configurable.search_cache_ttl_seconds,
+        max_entries=configurable.search_cache_max_entries,
+    )
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite")
 
+def get_task_passage_index(config: RunnableConfig) -> BM25Index:
+    """Returns the passage index shared by every section of the current task."""
+    return get_passage_index(config["configurable"].get("thread_id", ""))
 
-def report_structure_planner_node(state: AgentState, config: RunnableConfig) -> Dict:
+
+def retrieve_section_passages(
+    index: BM25Index,
+    search_results: List[SearchResults],
+    section: Section,
+    configurable: Configuration,
+) -> str:
+    """
+    Retrieves the passages of `index` most relevant to each sub-section of a section.
+
+    `search_results` are indexed first, which is a no-op for pages the search node
+    already indexed and rebuilds the task's index when it was lost, for example after
+    a restart. The passages are packed into the context token budget with their sources.
+    """
+    index.add_search_results(search_results)
+    scored_passages = index.search_section(section, configurable.passage_top_k)
+    return pack_passages(
+        [passage for passage, _ in scored_passages],
+        [score for _, score in scored_passages],
+        configurable.context_token_budget,
+    )
+
+
+def extract_search_results(search_results: List[SearchResults]) -> List[dict]:
+    """Lists the url and title of every search result, leaving out their content."""
+    return [
+        {"url": search_result.url, "title": search_result.title}
+        for results in search_results
+        for search_result in results.results
+    ]
+
+
+def get_section_writer_nodes(config: RunnableConfig) -> List[str]:
+    """Returns the nodes that write a section once its research is done."""
+    configurable = Configuration.from_runnable_config(config)
+    if configurable.map_reduce_finalizer:
+        return ["final_section_formatter", "section_summarizer"]
+    return ["final_section_formatter"]
+
+
+def get_task_namespace(config: RunnableConfig) -> str:
+    """Returns the artifact store namespace of the current task, its thread id."""
+    return str(config["configurable"].get("thread_id", "default"))
+
+
+async def report_structure_planner_node(
+    state: AgentState, config: RunnableConfig
+) -> Dict:
     """
     Plans and generates the initial structure of a research report based on a given topic and outline.
 
@@ -55,26 +257,21 @@ def report_structure_planner_node(state: AgentState, config: RunnableConfig) ->
         config (RunnableConfig): Configuration object containing LLM settings like provider, model, and temperature
 
     Returns:
-        Dict: A dictionary containing the 'messages' key with the LLM's response about the report structure
+        Dict: A dictionary containing the 'messages' key with the LLM's response about the report structure,
+            and the budget usage of an earlier report cleared
     """
     configurable = Configuration.from_runnable_config(config)
 
-    report_structure_planner_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                REPORT_STRUCTURE_PLANNER_SYSTEM_PROMPT_TEMPLATE
-            ),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
+    report_structure_planner_llm = get_chain(
+        configurable, "report_structure_planner", REPORT_STRUCTURE_PLANNER_PROMPT
     )
 
-    report_structure_planner_llm = report_structure_planner_system_prompt | llm
-
-    result = report_structure_planner_llm.invoke(state)
-    return {"messages": [result]}
+    result = await report_structure_planner_llm.ainvoke(state)
+    # The report's budget usage is saved once its research starts
+    return {"messages": [result], "budget_usage": None}
 
 
-def human_feedback_node(
+async def human_feedback_node(
     state: AgentState, config: RunnableConfig
 ) -> Command[Literal["output", "section_formatter"]]:
     """
@@ -84,6 +281,10 @@ def human_feedback_node(
     If the user types 'continue', it proceeds to format the sections. Otherwise, it returns to the
     report structure planner with the feedback for revision.
 
+    With the fast path enabled, plain approvals of a report structure and short replies
+    routed before for the same message are decided locally, and only other replies are
+    sent to the LLM along with the whole conversation.
+
     Args:
         state (AgentState): The current state containing the generated report structure messages
         config (RunnableConfig): Configuration object (unused in this node)
@@ -93,8 +294,21 @@ def human_feedback_node(
             - "section_formatter" with the approved report structure
             - "report_structure_planner" with feedback for revision
     """
-    response = llm.with_structured_output(Route).invoke(state["messages"])
-    step = response.step
+    configurable = Configuration.from_runnable_config(config)
+
+    step = None
+    if configurable.human_feedback_fast_path:
+        step = classify_route(state["messages"])
+
+    if step is None:
+        human_feedback_llm = get_chain(
+            configurable, "human_feedback", HUMAN_FEEDBACK_PROMPT, Route
+        )
+
+        response = await human_feedback_llm.ainvoke(state)
+        step = response.step
+        if configurable.human_feedback_fast_path:
+            record_route(state["messages"], step)
 
     if step == "input_required":
         return Command(goto="output")
@@ -104,7 +318,7 @@ def human_feedback_node(
         )
 
 
-def output(state: AgentState, config: RunnableConfig):
+async def output(state: AgentState, config: RunnableConfig):
     """
     Returns the final report content or the last message if no final content is available.
 
@@ -129,113 +343,333 @@ def output(state: AgentState, config: RunnableConfig):
         }
 
 
-def section_formatter_node(
+def get_research_input(
+    sections: List[Section],
+    index: int,
+    section_knowledge: Dict[int, str],
+    searched_queries: Optional[List[Query]] = None,
+    search_results: Optional[List[SearchResults]] = None,
+) -> dict:
+    """
+    Builds the research agent's input for a section.
+
+    The section's knowledge is included if it was generated, and so are the queries
+    already searched for the report, which the section does not search again, with
+    their search results, which the section reuses instead.
+    """
+    research_input = {
+        "section": sections[index],
+        "section_count": len(sections),
+        "current_section_index": index,
+    }
+    if section_knowledge.get(index):
+        research_input["knowledge"] = section_knowledge[index]
+    if searched_queries:
+        research_input["task_searched_queries"] = searched_queries
+        research_input["task_search_results"] = search_results or []
+    return research_input
+
+
+def reuse_search_results(
+    search_results: List[SearchResults], queries: List[Query], threshold: float
+) -> List[SearchResults]:
+    """
+    Returns the search results of the searched queries that `queries` repeat.
+
+    Pages the results only list in `duplicate_urls` are taken from the results of the
+    query that stored them, so the repeated queries get all of their pages.
+    """
+    pages = {
+        canonical_url(result.url): result
+        for query_results in search_results
+        for result in query_results.results
+    }
+    reused = []
+    for query_results in search_results:
+        if any(is_repeat(query, [query_results.query], threshold) for query in queries):
+            reused.append(
+                SearchResults(
+                    query=query_results.query,
+                    results=query_results.results
+                    + [
+                        pages[url]
+                        for url in query_results.duplicate_urls
+                        if url in pages
+                    ],
+                )
+            )
+    return reused
+
+
+def get_section_wave_size(configurable: Configuration, section_count: int) -> int:
+    """
+    Returns how many sections are sent to the research agent together.
+
+    A step of the graph only ends once all of its sections are researched, so the
+    sections run in waves of at most `max_parallel_sections` (every section for 0).
+    The bound holds however the graph is invoked.
+    """
+    if configurable.max_parallel_sections <= 0:
+        return max(section_count, 1)
+    return configurable.max_parallel_sections
+
+
+def start_section_research(
+    sections: List[Section], configurable: Configuration, update: dict
+) -> Command:
+    """
+    Hands the formatted sections to the research agent, adding `update` to the state.
+
+    When `max_parallel_sections` is not 1, the first wave of sections is sent to the
+    research agent at once, and sections of the same wave do not know each other's
+    queries; otherwise the sections are queued and researched one after the other.
+    """
+    wave_size = get_section_wave_size(configurable, len(sections))
+    if wave_size > 1:
+        indexes = range(min(wave_size, len(sections)))
+        print(f"Processing {len(indexes)}/{len(sections)} sections in parallel...")
+        section_knowledge = update.get("section_knowledge", {})
+        return Command(
+            update={**update, "current_section_index": indexes.stop},
+            goto=[
+                Send(
+                    "research_agent",
+                    get_research_input(sections, index, section_knowledge),
+                )
+                for index in indexes
+            ],
+        )
+
+    # Initialize the sections queue and current section index
+    return Command(
+        update={**update, "current_section_index": 0},
+        goto="queue_next_section",
+    )
+
+
+async def section_formatter_node(
     state: AgentState, config: RunnableConfig
-) -> Command[Literal["queue_next_section"]]:
+) -> Command[
+    Literal["section_knowledge_batch", "queue_next_section", "research_agent"]
+]:
     """
     Formats the report structure into discrete sections for processing.
 
     This node takes the approved report structure and uses an LLM to format it into a structured
     Sections object containing individual sections and their subsections. The formatted sections
-    are saved to a JSON file for logging and initialized in the state for sequential processing.
+    are saved to the task's artifacts and initialized in the state for processing, and
+    what an earlier report on the same thread gathered, from its indexed passages to its
+    section content, summaries and search results, is dropped. When
+    `max_parallel_sections` is not 1, every section is sent to the research agent at
+    once.
 
     Args:
         state (AgentState): The current state containing the approved report structure
         config (RunnableConfig): Configuration object containing LLM and other settings
 
     Returns:
-        Command: A Command object directing flow to "queue_next_section" with:
-            - sections: List of formatted Section objects
-            - current_section_index: Initialized to 0 to begin processing
+        Command: A Command object directing flow to either:
+            - "section_knowledge_batch" with the sections when the knowledge of every
+              section is generated up front
+            - "queue_next_section" with the sections and current_section_index
+              initialized to 0
+            - "research_agent" with one Send per section when sections run in parallel
     """
 
     configurable = Configuration.from_runnable_config(config)
 
-    section_formatter_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE
-            ),
-            MessagesPlaceholder(variable_name="messages"),
-        ]
+    section_formatter_llm = get_chain(
+        configurable, "section_formatter", SECTION_FORMATTER_PROMPT, Sections
     )
-    section_formatter_llm = (
-        section_formatter_system_prompt | llm.with_structured_output(Sections)
+
+    result = await section_formatter_llm.ainvoke(state)
+
+    # Passages searched for an earlier report on the same thread must not be retrieved
+    reset_passage_index(config["configurable"].get("thread_id", ""))
+
+    get_artifact_store().write(
+        get_task_namespace(config), "sections.json", result.model_dump_json()
     )
 
-    result = section_formatter_llm.invoke(state)
+    # Nothing an earlier report on the same thread gathered may be reused
+    update = {
+        "sections": result.sections,
+        "section_knowledge": {},
+        "searched_queries": None,
+        "final_section_content": None,
+        "section_summaries": None,
+        "search_results": None,
+        "budget_usage": get_budget_usage(config),
+    }
+    if configurable.batch_section_knowledge and not budget_exhausted(config):
+        return Command(update=update, goto="section_knowledge_batch")
 
-    os.makedirs("logs", exist_ok=True)
-    with open("logs/sections.json", "w", encoding="utf-8") as f:
-        f.write(result.model_dump_json())
+    return start_section_research(result.sections, configurable, update)
 
-    # Initialize the sections queue and current section index
-    return Command(
-        update={"sections": result.sections, "current_section_index": 0},
-        goto="queue_next_section",
+
+async def section_knowledge_batch_node(
+    state: AgentState, config: RunnableConfig
+) -> Command[Literal["queue_next_section", "research_agent"]]:
+    """
+    Generates the internal knowledge of every section before any section is researched.
+
+    The section knowledge prompt is run for all sections as one batch, concurrently and
+    bounded by the shared LLM rate limiter, so each research agent starts with its
+    knowledge already in place and does not have to wait for it. The prompt is the same
+    as the one used by the section knowledge node, so both share their LLM cache
+    entries. A section whose call fails is left without knowledge and its research agent
+    generates it.
+
+    Args:
+        state (AgentState): The current state containing the formatted sections
+        config (RunnableConfig): Configuration object containing LLM and other settings
+
+    Returns:
+        Command: A Command object storing the knowledge by section index and directing
+            flow to the research agent like the section formatter does
+    """
+    configurable = Configuration.from_runnable_config(config)
+
+    section_knowledge_llm = get_chain(
+        configurable, "section_knowledge", SECTION_KNOWLEDGE_PROMPT
+    )
+
+    results = await section_knowledge_llm.abatch(
+        [{"section": section} for section in state["sections"]],
+        return_exceptions=True,
+    )
+
+    section_knowledge = {}
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"Generating the knowledge of section {index + 1} failed: {result}")
+            continue
+        section_knowledge[index] = result.content
+
+    return start_section_research(
+        state["sections"], configurable, {"section_knowledge": section_knowledge}
     )
 
 
-def queue_next_section_node(
+async def queue_next_section_node(
     state: AgentState, config: RunnableConfig
 ) -> Command[Literal["research_agent", "finalizer"]]:
     """
-    Manages the sequential processing of report sections with rate limiting.
+    Manages the sequential processing of report sections.
 
     This node controls the flow of section processing by:
     1. Tracking the current section index
-    2. Implementing delays between sections to avoid rate limits
-    3. Routing sections to the research agent for processing
-    4. Transitioning to report finalization when all sections are complete
+    2. Routing sections to the research agent for processing, together with the queries
+       the earlier sections searched, one at a time or in waves of at most
+       `max_parallel_sections`
+    3. Transitioning to report finalization when all sections are complete
+
+    Rate limits are enforced per call by the shared rate limiters rather than by
+    delaying whole sections. Once the task's budget is used up the remaining sections
+    are skipped. What the budget used so far is saved, for a resumed run to continue from.
 
     Args:
         state (AgentState): The current state containing sections and section index
-        config (RunnableConfig): Configuration object containing delay settings
+        config (RunnableConfig): Configuration object containing the section settings
 
     Returns:
         Command: A Command object directing flow to either:
-            - "research_agent" with the next section to process
-            - "finalizer" when all sections are complete
+            - "research_agent" with the next sections to process
+            - "finalizer" when all sections are complete or the budget is used up
     """
-    configurable = Configuration.from_runnable_config(config)
+    budget_usage = get_budget_usage(config)
+    exhausted = budget_exhausted(config)
+    if exhausted and state["current_section_index"] < len(state["sections"]):
+        skipped = len(state["sections"]) - state["current_section_index"]
+        print(
+            f"Budget exhausted ({exhausted}), skipping {skipped} sections. "
+            "Generating final report..."
+        )
+        return Command(update={"budget_usage": budget_usage}, goto="finalizer")
 
     if state["current_section_index"] < len(state["sections"]):
-        current_section = state["sections"][state["current_section_index"]]
-
-        if state["current_section_index"] > 0:
+        wave_size = get_section_wave_size(
+            Configuration.from_runnable_config(config), len(state["sections"])
+        )
+        indexes = range(
+            state["current_section_index"],
+            min(state["current_section_index"] + wave_size, len(state["sections"])),
+        )
+        for index in indexes:
+            section_name = state["sections"][index].section_name
             print(
-                f"Waiting {configurable.section_delay_seconds} seconds before processing next section to avoid rate limits..."
+                f"Processing section {index + 1}/{len(state['sections'])}: {section_name}"
             )
-            time.sleep(configurable.section_delay_seconds)
-
-        print(
-            f"Processing section {state['current_section_index'] + 1}/{len(state['sections'])}: {current_section.section_name}"
-        )
 
         return Command(
-            update={"current_section_index": state["current_section_index"] + 1},
-            goto=Send(
-                "research_agent",
-                {
-                    "section": current_section,
-                    "current_section_index": state["current_section_index"],
-                },
-            ),
+            update={
+                "current_section_index": indexes.stop,
+                "budget_usage": budget_usage,
+            },
+            goto=[
+                Send(
+                    "research_agent",
+                    get_research_input(
+                        state["sections"],
+                        index,
+                        state.get("section_knowledge", {}),
+                        state.get("searched_queries", []),
+                        state.get("search_results", []),
+                    ),
+                )
+                for index in indexes
+            ],
         )
     else:
         print(
             f"All {len(state['sections'])} sections have been processed. Generating final report..."
         )
-        return Command(goto="finalizer")
+        return Command(update={"budget_usage": budget_usage}, goto="finalizer")
+
+
+def route_section_research(
+    state: ResearchState, config: RunnableConfig
+) -> List[Hashable]:
+    """
+    Starts a section's research.
+
+    When the section's knowledge was generated up front it goes straight to query
+    generation. With parallel section knowledge, the internal knowledge and the first
+    queries are generated in the same step, so the section waits for the slower of the
+    two LLM calls rather than for both in turn. Otherwise the knowledge is generated
+    first.
+    """
+    if state.get("knowledge"):
+        return ["query_generator"]
+
+    configurable = Configuration.from_runnable_config(config)
+    if configurable.parallel_section_knowledge:
+        return ["section_knowledge", "query_generator"]
+    return ["section_knowledge"]
+
+
+def route_after_section_knowledge(
+    state: ResearchState, config: RunnableConfig
+) -> List[Hashable]:
+    """
+    Continues with query generation after the section knowledge, unless it already ran
+    alongside it. The knowledge is kept in the state until the final section formatter.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    if configurable.parallel_section_knowledge:
+        return []
+    return ["query_generator"]
 
 
-def section_knowledge_node(state: ResearchState, config: RunnableConfig):
+async def section_knowledge_node(state: ResearchState, config: RunnableConfig):
     """
-    Generates initial knowledge and understanding about a section before conducting research.
+    Generates initial knowledge and understanding about a section from the LLM's own
+    knowledge.
 
     This node uses an LLM to analyze the section details and generate foundational knowledge
-    that will guide the subsequent research process. It processes the section information
-    through a system prompt to establish context and requirements.
+    that the final section formatter blends with the research. It processes the section
+    information through a system prompt to establish context and requirements, and by
+    default runs alongside the first query generation since nothing else depends on it.
 
     Args:
         state (ResearchState): The current research state containing section information
@@ -245,30 +679,31 @@ def section_knowledge_node(state: ResearchState, config: RunnableConfig):
         dict: A dictionary containing the generated knowledge with key:
             - knowledge (str): The LLM-generated understanding and context for the section
     """
+    if budget_exhausted(config):
+        return {"knowledge": ""}
+
     configurable = Configuration.from_runnable_config(config)
 
-    section_knowledge_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                SECTION_KNOWLEDGE_SYSTEM_PROMPT_TEMPLATE
-            ),
-            HumanMessagePromptTemplate.from_template(template="{section}"),
-        ]
+    section_knowledge_llm = get_chain(
+        configurable, "section_knowledge", SECTION_KNOWLEDGE_PROMPT
     )
-    section_knowledge_llm = section_knowledge_system_prompt | llm
 
-    result = section_knowledge_llm.invoke(state)
+    result = await section_knowledge_llm.ainvoke(state)
 
     return {"knowledge": result.content}
 
 
-def query_generator_node(state: ResearchState, config: RunnableConfig):
+async def query_generator_node(state: ResearchState, config: RunnableConfig):
     """
     Generates search queries based on the current section content and research state.
 
     This node uses an LLM to generate targeted search queries for gathering information about
     the current section. It takes into account any previous queries that have been searched
     and feedback from reflection to avoid redundancy and improve query relevance.
+    Generated queries that are near duplicates of queries already searched, for this
+    section or for an earlier section of the report, are dropped before searching, and
+    the search results of the earlier sections' queries they repeat are reused.
+    Sections researched in parallel only know their own queries.
 
     Args:
         state (ResearchState): The current research state containing section information,
@@ -277,25 +712,19 @@ def query_generator_node(state: ResearchState, config: RunnableConfig):
 
     Returns:
         dict: A dictionary containing:
-            - generated_queries (List[Query]): The newly generated search queries
+            - generated_queries (List[Query]): The newly generated search queries that
+              were not suppressed as near duplicates
             - searched_queries (List[Query]): Updated list of all searched queries
+            - search_results (List[SearchResults]): The earlier sections' search results
+              for the suppressed queries
     """
+    if budget_exhausted(config):
+        return {"generated_queries": []}
+
     configurable = Configuration.from_runnable_config(config)
 
-    query_generator_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                QUERY_GENERATOR_SYSTEM_PROMPT_TEMPLATE.format(
-                    max_queries=configurable.max_queries
-                )
-            ),
-            HumanMessagePromptTemplate.from_template(
-                template="Section: {section}\nPrevious Queries: {searched_queries}\nReflection Feedback: {reflection_feedback}"
-            ),
-        ]
-    )
-    query_generator_llm = query_generator_system_prompt | llm.with_structured_output(
-        Queries
+    query_generator_llm = get_chain(
+        configurable, "query_generator", QUERY_GENERATOR_PROMPT, Queries
     )
 
     state["reflection_feedback"] = state.get(
@@ -303,18 +732,38 @@ def query_generator_node(state: ResearchState, config: RunnableConfig):
     )
     state["searched_queries"] = state.get("searched_queries", [])
 
-    result = query_generator_llm.invoke(state)
+    result = await query_generator_llm.ainvoke(
+        {**state, "max_queries": configurable.max_queries}
+    )
 
-    return {"generated_queries": result.queries, "searched_queries": result.queries}
+    queries, suppressed = filter_queries(
+        result.queries,
+        state["searched_queries"] + state.get("task_searched_queries", []),
+        threshold=configurable.query_similarity_threshold,
+    )
+
+    return {
+        "generated_queries": queries,
+        "searched_queries": queries,
+        "search_results": reuse_search_results(
+            state.get("task_search_results", []),
+            suppressed,
+            configurable.query_similarity_threshold,
+        ),
+    }
 
 
-def tavily_search_node(state: ResearchState, config: RunnableConfig):
+async def tavily_search_node(state: ResearchState, config: RunnableConfig):
     """
     Performs web searches using the Tavily search API for each generated query.
 
     This node takes the generated queries from the previous node and executes searches
-    using the Tavily search engine. For each query, it retrieves search results up to
-    the configured search depth, extracting the URL, title, and raw content from each result.
+    using the shared Tavily client, serving repeated queries from the search cache. All
+    queries run concurrently, bounded by the configured search concurrency and timeout,
+    and for each query it retrieves search results up to the configured search depth,
+    extracting the URL, title, and raw content from each result. Unless the blob store
+    is disabled, the raw content is then moved to it so the state only carries handles.
+    Queries beyond the task's remaining search budget are not searched.
 
     Args:
         state (ResearchState): The current research state containing generated queries
@@ -325,51 +774,58 @@ def tavily_search_node(state: ResearchState, config: RunnableConfig):
         dict: A dictionary containing:
             - search_results (List[SearchResults]): List of search results for each query,
               where each SearchResults object contains the original query and a list of
-              SearchResult objects with URL, title and raw content
+              SearchResult objects with URL, title and raw content or its handle
     """
 
     configurable = Configuration.from_runnable_config(config)
 
-    tavily_client = TavilySearch(
-        topic="general",
-        # include_answer=False,
-        include_raw_content=True,
-        # include_images=False,
-        # include_image_descriptions=False,
-        # search_depth="basic",
-        # time_range="day",
-        # include_domains=None,
-        # exclude_domains=None
+    queries = state["generated_queries"]
+    budget = get_budget(config)
+    if budget is not None:
+        remaining_searches = budget.remaining_searches()
+        if remaining_searches is not None:
+            queries = queries[:remaining_searches]
+        budget.charge_searches(len(queries))
+    if not queries:
+        return {"search_results": []}
+
+    search_results = await search_queries(
+        queries,
+        max_results=configurable.search_depth,
+        rate_limiter=get_search_rate_limiter(configurable),
+        max_concurrency=configurable.search_concurrency,
+        timeout=configurable.search_timeout_seconds,
+        cache=get_search_cache(configurable),
     )
 
-    queries = state["generated_queries"]
-    search_results = []
-    for query in queries:
-        search_content = []
-        response = tavily_client.invoke(
-            {"query": query.query, "max_results": configurable.search_depth}
+    if configurable.passage_top_k > 0:
+        await asyncio.to_thread(
+            get_task_passage_index(config).add_search_results, search_results
+        )
+
+    if configurable.blob_store_enabled:
+        search_results = await asyncio.to_thread(
+            offload_search_results, search_results, get_blob_store()
         )
-        for result in response["results"]:
-            if result["raw_content"] and result["url"] and result["title"]:
-                search_content.append(
-                    SearchResult(
-                        url=result["url"],
-                        title=result["title"],
-                        raw_content=result["raw_content"],
-                    )
-                )
-        search_results.append(SearchResults(query=query, results=search_content))
 
     return {"search_results": search_results}
 
 
-def result_accumulator_node(state: ResearchState, config: RunnableConfig):
+async def result_accumulator_node(state: ResearchState, config: RunnableConfig):
     """
     Accumulates and synthesizes search results into coherent content.
 
     This node takes the search results from the previous node and uses an LLM to process
     and combine them into a unified, coherent piece of content. The LLM analyzes the
     search results and extracts relevant information to build knowledge about the section topic.
+    When passage retrieval is enabled, the LLM is given the passages that best match
+    each sub-section; otherwise, or when nothing matches, it is given the search
+    results, packed into the context token budget when one is set.
+
+    With incremental accumulation, later reflection rounds only give the LLM the pages
+    that were not accumulated yet and ask it to merge them into the existing content, so
+    the prompt does not grow with every round. A round without new pages keeps the
+    content as is, and so does any round once the task's budget is used up.
 
     Args:
         state (ResearchState): The current research state containing search results
@@ -380,27 +836,64 @@ def result_accumulator_node(state: ResearchState, config: RunnableConfig):
         dict: A dictionary containing:
             - accumulated_content (str): The synthesized content generated from processing
               the search results
+            - accumulated_urls (List[str]): The canonical URLs of the pages accumulated
+              so far
     """
+    if budget_exhausted(config):
+        return {}
+
     configurable = Configuration.from_runnable_config(config)
 
-    result_accumulator_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                RESULT_ACCUMULATOR_SYSTEM_PROMPT_TEMPLATE
-            ),
-            HumanMessagePromptTemplate.from_template(template="{search_results}"),
-        ]
-    )
-    result_accumulator_llm = result_accumulator_system_prompt | llm
+    search_results = state["search_results"]
+    accumulated_urls = search_result_urls(search_results)
 
-    result = result_accumulator_llm.invoke(state)
+    if configurable.incremental_accumulation and state.get("accumulated_content"):
+        search_results = exclude_search_results(
+            search_results, set(state.get("accumulated_urls", []))
+        )
+        if not search_results:
+            return {"accumulated_urls": accumulated_urls}
+        prompt = RESULT_ACCUMULATOR_INCREMENTAL_PROMPT
+        # Only the new pages are candidates, so they get an index of their own
+        index = BM25Index()
+    else:
+        prompt = RESULT_ACCUMULATOR_PROMPT
+        index = get_task_passage_index(config)
+
+    result_accumulator_llm = get_chain(configurable, "result_accumulator", prompt)
+
+    passages = ""
+    if configurable.passage_top_k > 0:
+        passages = await asyncio.to_thread(
+            retrieve_section_passages,
+            index,
+            search_results,
+            state["section"],
+            configurable,
+        )
+    search_results_input: Union[List[SearchResults], str] = search_results
+    if passages:
+        search_results_input = passages
+    elif configurable.context_token_budget > 0:
+        search_results_input = pack_search_results(
+            search_results, state["section"], configurable.context_token_budget
+        )
 
-    return {"accumulated_content": result.content}
+    result = await result_accumulator_llm.ainvoke(
+        {**state, "search_results": search_results_input}
+    )
+
+    return {
+        "accumulated_content": result.content,
+        "accumulated_urls": accumulated_urls,
+    }
 
 
-def reflection_feedback_node(
+async def reflection_feedback_node(
     state: ResearchState, config: RunnableConfig
-) -> Command[Literal["final_section_formatter", "query_generator"]]:
+) -> Command[
+    Literal["final_section_formatter", "section_summarizer", "query_generator"]
+]:
     """
     Evaluates the quality and completeness of accumulated research content and determines next steps.
 
@@ -416,29 +909,24 @@ def reflection_feedback_node(
 
     Returns:
         Command: A Command object directing the flow to either:
-            - final_section_formatter: If content is sufficient or max reflections reached
+            - final_section_formatter: If content is sufficient or max reflections
+              reached, together with section_summarizer when the finalizer reduces
+              section summaries
             - query_generator: If content needs improvement and more iterations remain
             The Command includes updated reflection feedback and count in its state updates.
+            Once the task's budget is used up it goes straight to the section writers.
     """
+    if budget_exhausted(config):
+        return Command(goto=get_section_writer_nodes(config))
 
     configurable = Configuration.from_runnable_config(config)
 
-    reflection_feedback_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                REFLECTION_FEEDBACK_SYSTEM_PROMPT_TEMPLATE
-            ),
-            HumanMessagePromptTemplate.from_template(
-                template="Section: {section}\nAccumulated Content: {accumulated_content}"
-            ),
-        ]
-    )
-    reflection_feedback_llm = (
-        reflection_feedback_system_prompt | llm.with_structured_output(Feedback)
+    reflection_feedback_llm = get_chain(
+        configurable, "reflection", REFLECTION_FEEDBACK_PROMPT, Feedback
     )
 
     reflection_count = state["reflection_count"] if "reflection_count" in state else 1
-    result = reflection_feedback_llm.invoke(state)
+    result = await reflection_feedback_llm.ainvoke(state)
     feedback = result.feedback
 
     if (
@@ -451,7 +939,7 @@ def reflection_feedback_node(
                 "reflection_feedback": feedback,
                 "reflection_count": reflection_count,
             },
-            goto="final_section_formatter",
+            goto=get_section_writer_nodes(config),
         )
     else:
         return Command(
@@ -463,13 +951,15 @@ def reflection_feedback_node(
         )
 
 
-def final_section_formatter_node(state: ResearchState, config: RunnableConfig):
+async def final_section_formatter_node(state: ResearchState, config: RunnableConfig):
     """
     Formats the final content for a section of the research report.
 
     This node uses an LLM to take the accumulated research content and internal knowledge
     about the section, and format it into a cohesive, well-structured section of the report.
-    The formatted content is both saved to a log file and returned as part of the state.
+    The formatted content is saved to the task's artifacts and returned in the state.
+    Once the task's budget is used up the accumulated content, or the internal
+    knowledge when nothing was accumulated, is used as is under the section title.
 
     Args:
         state (ResearchState): The current research state containing the section info,
@@ -481,41 +971,153 @@ def final_section_formatter_node(state: ResearchState, config: RunnableConfig):
     """
 
     configurable = Configuration.from_runnable_config(config)
+    # Tokens of sections formatted in parallel interleave when streamed, so the model's
+    # run is tagged with the section it writes
+    llm_config: RunnableConfig = {
+        "metadata": {"section_index": state["current_section_index"]}
+    }
+
+    if budget_exhausted(config):
+        content = state.get("accumulated_content") or state.get("knowledge", "")
+        content = f"## {state['section'].section_name}\n\n{content}"
+    elif configurable.passage_top_k > 0:
+        final_section_formatter_llm = get_chain(
+            configurable,
+            "final_section_formatter",
+            FINAL_SECTION_FORMATTER_WITH_PASSAGES_PROMPT,
+        )
+        passages = await asyncio.to_thread(
+            retrieve_section_passages,
+            get_task_passage_index(config),
+            state["search_results"],
+            state["section"],
+            configurable,
+        )
+        result = await final_section_formatter_llm.ainvoke(
+            {**state, "passages": passages}, llm_config
+        )
+        content = result.content
+    else:
+        final_section_formatter_llm = get_chain(
+            configurable, "final_section_formatter", FINAL_SECTION_FORMATTER_PROMPT
+        )
+        result = await final_section_formatter_llm.ainvoke(state, llm_config)
+        content = result.content
+
+    section_name = state["section"].section_name.replace("/", "-")
+    get_artifact_store().write(
+        get_task_namespace(config),
+        f"section_content/{state['current_section_index']+1}. {section_name}.md",
+        content,
+    )
 
-    final_section_formatter_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(
-                FINAL_SECTION_FORMATTER_SYSTEM_PROMPT_TEMPLATE
-            ),
-            HumanMessagePromptTemplate.from_template(
-                template="Internal Knowledge: {knowledge}\nSearch Result content: {accumulated_content}"
-            ),
+    return {
+        "final_section_content": [
+            SectionContent(
+                section_index=state["current_section_index"], content=content
+            )
         ]
-    )
-    final_section_formatter_llm = final_section_formatter_system_prompt | llm
+    }
 
-    result = final_section_formatter_llm.invoke(state)
 
-    os.makedirs("logs/section_content", exist_ok=True)
+async def section_summarizer_node(state: ResearchState, config: RunnableConfig) -> dict:
+    """
+    Summarizes a section for the finalizer and selects the sources that support it.
 
-    with open(
-        f"logs/section_content/{state['current_section_index']+1}. {state['section'].section_name}.md",
-        "a",
-        encoding="utf-8",
-    ) as f:
-        f.write(f"{result.content}")
+    This node runs in the same step as the final section formatter and from the same
+    internal knowledge and accumulated content, so summarizing does not delay the
+    section. The summary and its references stand in for the section and its search
+    results when the finalizer writes the conclusion, which keeps the finalizer's prompt
+    short however long the report grows.
 
-    return {"final_section_content": [result.content]}
+    Args:
+        state (ResearchState): The current research state containing the section info,
+            internal knowledge, accumulated content and search results
+        config (RunnableConfig): Configuration object containing LLM and summary
+            settings
 
+    Returns:
+        dict: A dictionary containing the summary in the 'section_summaries' key, or
+            nothing once the task's budget is used up
+    """
+    if budget_exhausted(config):
+        return {}
 
-def finalizer_node(state: AgentState, config: RunnableConfig):
+    configurable = Configuration.from_runnable_config(config)
+
+    section_summarizer_llm = get_chain(
+        configurable, "section_summarizer", SECTION_SUMMARIZER_PROMPT, SectionSummary
+    )
+
+    result = await section_summarizer_llm.ainvoke(
+        {
+            **state,
+            "knowledge": state.get("knowledge", ""),
+            "accumulated_content": state.get("accumulated_content", ""),
+            "extracted_search_results": extract_search_results(
+                state.get("search_results", [])
+            ),
+            "max_words": max(
+                50,
+                configurable.finalizer_summary_words // state.get("section_count", 1),
+            ),
+            "max_references": configurable.section_summary_references,
+        }
+    )
+
+    return {
+        "section_summaries": [
+            SummarizedSection(
+                section_index=state["current_section_index"],
+                summary=result.summary,
+                references=result.references[: configurable.section_summary_references],
+            )
+        ]
+    }
+
+
+def reduce_section_summaries(
+    state: AgentState, section_contents: List[SectionContent]
+) -> Tuple[List[str], List[str]]:
+    """
+    Returns the finalizer's section and search result input from the section summaries.
+
+    Summaries are matched to the sections by section index, the latest one winning,
+    and a section without a summary is given in full. The selected references are
+    deduplicated.
+    """
+    summaries = {
+        summary.section_index: summary for summary in state.get("section_summaries", [])
+    }
+    sections = []
+    references: Dict[str, None] = {}
+    for section_content in section_contents:
+        summary = summaries.get(section_content.section_index)
+        if summary is None:
+            sections.append(section_content.content)
+            continue
+        sections.append(summary.summary)
+        for reference in summary.references:
+            references.setdefault(reference, None)
+    return sections, list(references)
+
+
+async def finalizer_node(state: AgentState, config: RunnableConfig):
     """
     Finalizes the research report by generating a conclusion, references, and combining all sections.
 
     This node takes the accumulated section content and search results from the agent state and:
-    1. Uses an LLM to generate a conclusion and curated list of references
-    2. Combines all section content into a single markdown document
-    3. Saves the final report to a file
+    1. Orders the section content by section index, as sections may finish in any order
+    2. Uses an LLM to generate a conclusion and curated list of references
+    3. Combines all section content into a single markdown document
+    4. Saves the final report to a file
+
+    When the finalizer reduces section summaries, the LLM is given each section's
+    summary and the references it selected instead of the full section content and every
+    search result. A section without a summary is given in full.
+
+    Once the task's budget is used up the LLM is skipped, and the report ends with a
+    note that the research was cut short and the search results as references.
 
     Args:
         state (AgentState): The current agent state containing all section content and search results
@@ -523,43 +1125,68 @@ def finalizer_node(state: AgentState, config: RunnableConfig):
 
     Returns:
         dict: A dictionary containing the complete report content in the 'final_report_content' key
+            and the conclusion and references alone in the 'report_conclusion' key
     """
 
     configurable = Configuration.from_runnable_config(config)
 
-    extracted_search_results = []
-    for search_results in state["search_results"]:
-        for search_result in search_results.results:
-            extracted_search_results.append(
-                {"url": search_result.url, "title": search_result.title}
-            )
-
-    finalizer_system_prompt = ChatPromptTemplate.from_messages(
-        [
-            SystemMessagePromptTemplate.from_template(FINALIZER_SYSTEM_PROMPT_TEMPLATE),
-            HumanMessagePromptTemplate.from_template(
-                template="Section Contents: {final_section_content}\n\nSearches: {extracted_search_results}"
-            ),
-        ]
-    )
-    finalizer_llm = finalizer_system_prompt | llm.with_structured_output(
-        ConclusionAndReferences
+    section_contents = sorted(
+        state["final_section_content"],
+        key=lambda section_content: section_content.section_index,
     )
+    final_section_content = [
+        section_content.content for section_content in section_contents
+    ]
+
+    extracted_search_results = extract_search_results(state["search_results"])
+
+    exhausted = budget_exhausted(config)
+    if exhausted:
+        references: Dict[str, str] = {}
+        for search_result in extracted_search_results:
+            references.setdefault(
+                search_result["url"],
+                f"{search_result['title']}: {search_result['url']}",
+            )
+        result = ConclusionAndReferences(
+            conclusion=f"## Conclusion\n\nThe research was stopped early because the "
+            f"task's {exhausted} budget was used up, so this report only covers what "
+            "was gathered until then.",
+            references=list(references.values()),
+        )
+    else:
+        finalizer_llm = get_chain(
+            configurable, "finalizer", FINALIZER_PROMPT, ConclusionAndReferences
+        )
 
-    result = finalizer_llm.invoke(
-        {**state, "extracted_search_results": extracted_search_results}
-    )
+        search_results_input: Union[List[str], List[dict]]
+        if configurable.map_reduce_finalizer:
+            final_section_input, search_results_input = reduce_section_summaries(
+                state, section_contents
+            )
+        else:
+            final_section_input = final_section_content
+            search_results_input = extracted_search_results
+
+        result = await finalizer_llm.ainvoke(
+            {
+                **state,
+                "final_section_content": final_section_input,
+                "extracted_search_results": search_results_input,
+            }
+        )
 
-    final_report = "\n\n".join(
-        [section_content for section_content in state["final_section_content"]]
-    )
-    final_report += "\n\n" + result.conclusion
-    final_report += "\n\n# References\n\n" + "\n".join(
+    report_conclusion = result.conclusion
+    report_conclusion += "\n\n# References\n\n" + "\n".join(
         ["- " + reference for reference in result.references]
     )
+    final_report = "\n\n".join(final_section_content) + "\n\n" + report_conclusion
 
-    os.makedirs("logs/reports", exist_ok=True)
-    with open(f"logs/reports/response.md", "w", encoding="utf-8") as f:
-        f.write(final_report)
+    get_artifact_store().write(
+        get_task_namespace(config), "reports/response.md", final_report
+    )
 
-    return {"final_report_content": final_report}
+    return {
+        "final_report_content": final_report,
+        "report_conclusion": report_conclusion,
+    }
@@ -0,0 +1,141 @@
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .blob_store import resolve_content
+from .context import Passage, split_passages, tokenize
+from .dedupe import canonical_url
+from .struct import SearchResults, Section
+
+
+class BM25Index:
+    """
+    An in-memory BM25 index over search result passages, built incrementally.
+
+    Pages are split into passages as they are added and each page is indexed once, by
+    canonical URL, so results can be added again after every search without growing the
+    index. Term statistics are kept up to date on insert and postings lists are only
+    walked for the query terms, so searching stays fast with thousands of passages.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_chars: int = 1200):
+        self.k1 = k1
+        self.b = b
+        self.max_chars = max_chars
+        self.passages: List[Passage] = []
+        self.lengths: List[int] = []
+        self.total_length = 0
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.urls: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def add_search_results(self, search_results: Iterable[SearchResults]) -> int:
+        """Indexes the pages not indexed yet and returns the number of new passages."""
+        added = 0
+        with self.lock:
+            for query_results in search_results:
+                for result in query_results.results:
+                    url = canonical_url(result.url)
+                    if url in self.urls:
+                        continue
+                    self.urls.add(url)
+                    content = resolve_content(result)
+                    for text in split_passages(content, self.max_chars):
+                        self._add(
+                            Passage(
+                                query=query_results.query.query,
+                                url=result.url,
+                                title=result.title,
+                                text=text,
+                                position=len(self.passages),
+                            )
+                        )
+                        added += 1
+        return added
+
+    def search(self, query: str, k: int) -> List[Tuple[Passage, float]]:
+        """Returns the `k` best matching passages for `query` with their scores."""
+        with self.lock:
+            if not self.passages:
+                return []
+            count = len(self.passages)
+            average_length = self.total_length / count
+
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for position, frequency in postings:
+                    norm = self.k1 * (
+                        1 - self.b + self.b * self.lengths[position] / average_length
+                    )
+                    scores[position] = scores.get(position, 0.0) + idf * (
+                        frequency * (self.k1 + 1) / (frequency + norm)
+                    )
+
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+            return [(self.passages[position], score) for position, score in best]
+
+    def search_section(self, section: Section, k: int) -> List[Tuple[Passage, float]]:
+        """
+        Returns the top `k` passages for each sub-section of `section`.
+
+        Every sub-section description is prefixed with the section name. A passage
+        matching several sub-sections is returned once with its best score.
+        """
+        best: Dict[int, Tuple[Passage, float]] = {}
+        for sub_section in section.sub_sections or [""]:
+            for passage, score in self.search(
+                f"{section.section_name} {sub_section}", k
+            ):
+                if passage.position not in best or best[passage.position][1] < score:
+                    best[passage.position] = (passage, score)
+        return sorted(
+            best.values(), key=lambda scored: (-scored[1], scored[0].position)
+        )
+
+    def _add(self, passage: Passage) -> None:
+        terms = Counter(tokenize(passage.text))
+        length = sum(terms.values())
+        self.passages.append(passage)
+        self.lengths.append(length)
+        self.total_length += length
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, []).append((passage.position, frequency))
+
+
+_indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_passage_index(thread_id: str, max_indexes: int = 64) -> BM25Index:
+    """
+    Returns the passage index of a task, creating an empty one on first use.
+
+    Indexes live in memory, keyed by the thread id of the task, and only the
+    `max_indexes` most recently used are kept. Callers add the search results from the
+    state before searching, so an index that was evicted or lost on restart is rebuilt.
+    """
+    with _indexes_lock:
+        index = _indexes.get(thread_id)
+        if index is None:
+            index = _indexes[thread_id] = BM25Index()
+            while len(_indexes) > max_indexes:
+                _indexes.popitem(last=False)
+        else:
+            _indexes.move_to_end(thread_id)
+        return index
+
+
+def reset_passage_index(thread_id: str) -> None:
+    """Drops the passage index of a task, so its next report starts from scratch."""
+    with _indexes_lock:
+        _indexes.pop(thread_id, None)
@@ -0,0 +1,122 @@
+import threading
+import zlib
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from .context import tokenize
+from .metrics import REGISTRY, stats_collector
+from .search import normalize_query
+from .struct import Query
+
+_lock = threading.Lock()
+_checked_queries = 0
+_suppressed_queries = 0
+
+
+def query_shingles(query: str, size: int = 3) -> FrozenSet[int]:
+    """
+    Returns the hashed character shingles of the words in a query.
+
+    Stopwords are dropped and every word is shingled on its own, padded with spaces, so
+    reordered words and small changes such as plurals keep most of their shingles.
+    """
+    shingles = set()
+    for word in tokenize(query):
+        padded = f" {word} "
+        for start in range(max(1, len(padded) - size + 1)):
+            shingles.add(zlib.crc32(padded[start : start + size].encode("utf-8")))
+    return frozenset(shingles)
+
+
+def similarity(left: FrozenSet[int], right: FrozenSet[int]) -> float:
+    """Returns the Jaccard similarity of two shingle sets."""
+    if not left or not right:
+        return float(left == right)
+    return len(left & right) / len(left | right)
+
+
+def _is_repeat(
+    normalized: str,
+    shingles: FrozenSet[int],
+    seen: Set[str],
+    seen_shingles: List[FrozenSet[int]],
+    threshold: float,
+) -> bool:
+    return normalized in seen or (
+        threshold > 0
+        and any(similarity(shingles, other) >= threshold for other in seen_shingles)
+    )
+
+
+def is_repeat(query: Query, searched_queries: List[Query], threshold: float) -> bool:
+    """Returns whether `filter_queries` would suppress `query` as a searched query."""
+    return _is_repeat(
+        normalize_query(query.query),
+        query_shingles(query.query),
+        {normalize_query(searched.query) for searched in searched_queries},
+        [query_shingles(searched.query) for searched in searched_queries],
+        threshold,
+    )
+
+
+def filter_queries(
+    queries: List[Query], searched_queries: List[Query], threshold: float
+) -> Tuple[List[Query], List[Query]]:
+    """
+    Drops generated queries too similar to a searched query or to an earlier one.
+
+    Queries whose shingle similarity to any of `searched_queries`, or to a query kept
+    earlier in the same batch, is at least `threshold` are suppressed. A threshold
+    of 0 keeps every query that is not an exact repeat after normalization.
+
+    Returns:
+        Tuple[List[Query], List[Query]]: The queries to search and the suppressed ones
+    """
+    global _checked_queries, _suppressed_queries
+
+    seen = {normalize_query(query.query) for query in searched_queries}
+    seen_shingles = [query_shingles(query.query) for query in searched_queries]
+    kept, suppressed = [], []
+    for query in queries:
+        normalized = normalize_query(query.query)
+        shingles = query_shingles(query.query)
+        if _is_repeat(normalized, shingles, seen, seen_shingles, threshold):
+            suppressed.append(query)
+            continue
+        seen.add(normalized)
+        seen_shingles.append(shingles)
+        kept.append(query)
+
+    with _lock:
+        _checked_queries += len(queries)
+        _suppressed_queries += len(suppressed)
+    return kept, suppressed
+
+
+def merge_queries(left: List[Query], right: List[Query]) -> List[Query]:
+    """Reducer that adds new queries to the searched ones, keeping each query once."""
+    merged = {normalize_query(query.query): query for query in left or []}
+    for query in right or []:
+        merged.setdefault(normalize_query(query.query), query)
+    return list(merged.values())
+
+
+def stats() -> Dict[str, int]:
+    """Returns how many generated queries were checked and suppressed by the process."""
+    with _lock:
+        return {
+            "checked_queries": _checked_queries,
+            "suppressed_queries": _suppressed_queries,
+        }
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_query_filter",
+        [],
+        lambda: {(): stats()},
+        {
+            "checked_queries": ("counter", "Generated queries checked for repeats"),
+            "suppressed_queries": ("counter", "Generated queries not searched again"),
+        },
+    )
+)
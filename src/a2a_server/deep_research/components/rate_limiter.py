@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from .metrics import REGISTRY, get_token_usage, stats_collector
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket refilled continuously at a fixed rate.
+
+    Callers reserve capacity up front and are told how long to wait for it, so the
+    bucket is shared between threads and event loops without holding a lock while
+    waiting. Reservations larger than the available level put the bucket into debt,
+    which later callers pay off by waiting longer.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def configure(self, capacity: float, refill_per_second: float) -> None:
+        with self.lock:
+            self._refill()
+            self.capacity = capacity
+            self.refill_per_second = refill_per_second
+            self.level = min(self.level, capacity)
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` from the bucket and returns the seconds to wait to use it."""
+        with self.lock:
+            self._refill()
+            self.level -= amount
+            if self.level >= 0:
+                return 0.0
+            return -self.level / self.refill_per_second
+
+    def wait_time(self, amount: float) -> float:
+        """Returns the seconds until `amount` is available, without taking it."""
+        with self.lock:
+            self._refill()
+            if self.level >= amount:
+                return 0.0
+            return (amount - self.level) / self.refill_per_second
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(
+            self.capacity,
+            self.level + (now - self.updated_at) * self.refill_per_second,
+        )
+        self.updated_at = now
+
+
+class RateLimiter(BaseRateLimiter):
+    """
+    Requests-per-minute and tokens-per-minute limits for a single provider.
+
+    Each acquire takes one request and waits while the tokens bucket is in debt, so
+    callers only wait once a quota is actually used up. Token usage is only known once
+    a call returns and is added afterwards with `charge`. A limit of 0 disables the
+    corresponding bucket.
+
+    The limiter can be passed as the `rate_limiter` of a chat model, which acquires
+    from it after checking the model's cache, so cache hits are never throttled.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests = self._bucket(requests_per_minute)
+        self.tokens = self._bucket(tokens_per_minute)
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def configure(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.requests = self._configure(self.requests, requests_per_minute)
+        self.tokens = self._configure(self.tokens, tokens_per_minute)
+
+    def reserve(self) -> float:
+        """Takes one request and returns the seconds to wait before making it."""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(0))
+        if wait:
+            self.waits += 1
+            self.waited_seconds += wait
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        return {"waits": self.waits, "waited_seconds": self.waited_seconds}
+
+    def charge(self, tokens: int) -> None:
+        """Records tokens used by a completed call against the tokens bucket."""
+        if self.tokens and tokens:
+            self.tokens.reserve(tokens)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Blocks the calling thread until the request fits within the limits."""
+        if not blocking and self._wait_time():
+            return False
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Waits on the event loop until the request fits within the limits."""
+        if not blocking and self._wait_time():
+            return False
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def _wait_time(self) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(0))
+        return wait
+
+    @staticmethod
+    def _bucket(per_minute: int) -> Optional[TokenBucket]:
+        if per_minute <= 0:
+            return None
+        return TokenBucket(capacity=per_minute, refill_per_second=per_minute / 60)
+
+    @classmethod
+    def _configure(
+        cls, bucket: Optional[TokenBucket], per_minute: int
+    ) -> Optional[TokenBucket]:
+        if bucket is None or per_minute <= 0:
+            return cls._bucket(per_minute)
+        if bucket.capacity != per_minute:
+            bucket.configure(capacity=per_minute, refill_per_second=per_minute / 60)
+        return bucket
+
+
+class TokenUsageCallbackHandler(BaseCallbackHandler):
+    """Charges the tokens reported by each completed model call to a rate limiter."""
+
+    def __init__(self, rate_limiter: RateLimiter):
+        self.rate_limiter = rate_limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        self.rate_limiter.charge(get_token_usage(response)["total_tokens"])
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str, requests_per_minute: int = 0, tokens_per_minute: int = 0
+) -> RateLimiter:
+    """
+    Returns the process-wide rate limiter for a provider, updating its limits.
+
+    Every session in the process shares the same limiter per provider, so the limits
+    should be set to the quota of the API key rather than of a single run.
+    """
+    with _rate_limiters_lock:
+        rate_limiter = _rate_limiters.get(provider)
+        if rate_limiter is None:
+            rate_limiter = _rate_limiters[provider] = RateLimiter(
+                requests_per_minute, tokens_per_minute
+            )
+        else:
+            rate_limiter.configure(requests_per_minute, tokens_per_minute)
+        return rate_limiter
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_rate_limit",
+        ["provider"],
+        lambda: {
+            (provider,): rate_limiter.stats()
+            for provider, rate_limiter in list(_rate_limiters.items())
+        },
+        {
+            "waits": ("counter", "Requests delayed to stay within the rate limits"),
+            "waited_seconds": ("counter", "Seconds requests were delayed in total"),
+        },
+    )
+)
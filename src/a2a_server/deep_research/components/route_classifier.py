@@ -0,0 +1,184 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, convert_to_messages
+
+from .metrics import REGISTRY, stats_collector
+
+# Words that only say the report structure is fine. A reply made of nothing else is an
+# approval; any other word, such as "but", "no" or a section name, needs the LLM.
+APPROVAL_WORDS = frozenset(
+    """
+    yes yeah yep yup ok okay sure fine good great perfect excellent nice awesome cool
+    lgtm approve approved agreed continue proceed go ahead start begin research looks
+    look sounds seems please thanks thank you
+    """.split()
+)
+# A numbered line such as "1. Introduction", "**2) Costs**" or "2.1 Panels", or a
+# markdown heading
+STRUCTURE_LINE = re.compile(
+    r"^\s*(?:#{1,6}\s+|\**\d+(?:\.\d+)*[.)]\**\s+|\**\d+(?:\.\d+)+\**\s+)\S"
+)
+# An agent message with fewer structure lines asks something rather than presenting a
+# report structure
+MIN_STRUCTURE_LINES = 3
+# Replies longer than this are too specific to be repeated and are not remembered
+MAX_REMEMBERED_REPLY_WORDS = 12
+
+
+def normalize_reply(reply: str) -> str:
+    """Lowercases a reply and reduces it to its words, dropping apostrophes."""
+    return " ".join(re.sub(r"[^\w\s]", " ", reply.replace("'", "")).lower().split())
+
+
+def is_approval(reply: str) -> bool:
+    """Returns whether a reply only approves, e.g. "continue" or "Looks good!"."""
+    words = normalize_reply(reply).split()
+    return 0 < len(words) <= 8 and all(word in APPROVAL_WORDS for word in words)
+
+
+def presents_structure(message: str) -> bool:
+    """Returns whether an agent message lays out a report structure, not questions."""
+    lines = [
+        line
+        for line in message.splitlines()
+        if STRUCTURE_LINE.match(line) and not line.rstrip().endswith("?")
+    ]
+    return len(lines) >= MIN_STRUCTURE_LINES
+
+
+def get_user_reply(messages: Sequence) -> Optional[Tuple[str, str]]:
+    """
+    Returns the agent's message the user last replied to and the reply, otherwise None.
+
+    The first message of a conversation states the topic rather than replying to a
+    report structure, so it is never classified locally.
+    """
+    messages = convert_to_messages(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            replied_to = [m for m in messages[:index] if isinstance(m, AIMessage)]
+            if not replied_to:
+                return None
+            message, reply = replied_to[-1].content, messages[index].content
+            if not isinstance(message, str) or not isinstance(reply, str):
+                return None
+            return message, reply
+    return None
+
+
+class RouteDecisionTable:
+    """
+    Remembers the routing step the LLM chose for short replies to an agent message.
+
+    Entries are keyed by a hash of the agent's message and the reply, since a reply
+    such as "yes" or "shorter please" only routes the same way when it answers the
+    same message. Identical topics get the same report structure from the LLM cache,
+    so their replies are not sent to the LLM again with the whole conversation. The
+    least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(message: str, reply: str) -> Optional[str]:
+        normalized = normalize_reply(reply)
+        if not normalized or len(normalized.split()) > MAX_REMEMBERED_REPLY_WORDS:
+            return None
+        return hashlib.sha256(f"{message}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, message: str, reply: str) -> Optional[str]:
+        key = self.key(message, reply)
+        if key is None:
+            return None
+        with self.lock:
+            step = self.entries.get(key)
+            if step is not None:
+                self.entries.move_to_end(key)
+            return step
+
+    def put(self, message: str, reply: str, step: str) -> None:
+        key = self.key(message, reply)
+        if key is None:
+            return
+        with self.lock:
+            self.entries[key] = step
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+
+_table = RouteDecisionTable()
+_lock = threading.Lock()
+_decisions = {"rule": 0, "table": 0, "llm": 0}
+
+
+def classify_route(messages: Sequence) -> Optional[str]:
+    """
+    Decides the human feedback route without the LLM when the user's reply is obvious.
+
+    Approvals of a report structure go straight to research, and replies whose route
+    was decided before for the same agent message reuse that decision. Returns None
+    when the LLM has to decide.
+    """
+    exchange = get_user_reply(messages)
+    if exchange is None:
+        return None
+    message, reply = exchange
+
+    step: Optional[str]
+    if is_approval(reply) and presents_structure(message):
+        source, step = "rule", "do_research"
+    else:
+        source, step = "table", _table.get(message, reply)
+        if step is None:
+            return None
+
+    with _lock:
+        _decisions[source] += 1
+    return step
+
+
+def record_route(messages: Sequence, step: Optional[str]) -> None:
+    """Remembers the route the LLM chose for the user's reply."""
+    with _lock:
+        _decisions["llm"] += 1
+    exchange = get_user_reply(messages)
+    if exchange is not None and step is not None:
+        _table.put(*exchange, step)
+
+
+def stats() -> Dict[str, int]:
+    """Returns how many routes were decided by each source in this process."""
+    with _lock:
+        return {
+            "rule_decisions": _decisions["rule"],
+            "table_decisions": _decisions["table"],
+            "llm_decisions": _decisions["llm"],
+            "table_entries": len(_table),
+        }
+
+
+REGISTRY.add_collector(
+    stats_collector(
+        "agent_human_feedback",
+        [],
+        lambda: {(): stats()},
+        {
+            "rule_decisions": ("counter", "Replies routed by the approval rules"),
+            "table_decisions": ("counter", "Replies routed by the decision table"),
+            "llm_decisions": ("counter", "Replies routed by the LLM"),
+            "table_entries": ("gauge", "Replies in the decision table"),
+        },
+    )
+)
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import List, Optional
+
+from langchain_tavily import TavilySearch
+
+from .cache import SQLiteCache
+from .metrics import SEARCH_DURATION
+from .rate_limiter import RateLimiter
+from .struct import Query, SearchResult, SearchResults
+
+logger = logging.getLogger(__name__)
+
+_search_client: Optional[TavilySearch] = None
+_search_client_lock = threading.Lock()
+
+
+def get_search_client() -> TavilySearch:
+    """
+    Returns the Tavily client shared by every node and session in the process.
+
+    The client is created on first use so importing the graph does not require the
+    Tavily API key to be set.
+    """
+    global _search_client
+    with _search_client_lock:
+        if _search_client is None:
+            _search_client = TavilySearch(
+                topic="general",
+                # include_answer=False,
+                include_raw_content=True,
+                # include_images=False,
+                # include_image_descriptions=False,
+                # search_depth="basic",
+                # time_range="day",
+                # include_domains=None,
+                # exclude_domains=None
+            )
+        return _search_client
+
+
+def set_search_client(client: Optional[TavilySearch]) -> None:
+    """
+    Replaces the shared Tavily client, None creates a new one on next use.
+
+    Any object with Tavily's `ainvoke({"query": ..., "max_results": ...})` interface
+    can be used, so benchmarks and tests can search without network access.
+    """
+    global _search_client
+    with _search_client_lock:
+        _search_client = client
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes case, punctuation and whitespace, so equivalent queries match."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+async def search(
+    query: Query,
+    max_results: int,
+    rate_limiter: RateLimiter,
+    timeout: float,
+    cache: Optional[SQLiteCache] = None,
+) -> SearchResults:
+    """
+    Runs a single Tavily search and keeps the results that have content.
+
+    When a cache is given, results are looked up by the normalized query and
+    `max_results` first and stored there after a successful search. The request to
+    Tavily is cancelled after `timeout` seconds. Every search is timed by its outcome.
+    """
+    started_at = time.perf_counter()
+    cache_key = f"{normalize_query(query.query)}|{max_results}"
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            SEARCH_DURATION.observe(time.perf_counter() - started_at, "cache_hit")
+            return SearchResults.model_validate_json(cached).model_copy(
+                update={"query": query}
+            )
+
+    await rate_limiter.aacquire()
+    try:
+        response = await asyncio.wait_for(
+            get_search_client().ainvoke(
+                {"query": query.query, "max_results": max_results}
+            ),
+            timeout=timeout,
+        )
+        if "error" in response:
+            raise RuntimeError(response["error"])
+    except asyncio.TimeoutError:
+        SEARCH_DURATION.observe(time.perf_counter() - started_at, "timeout")
+        raise
+    except Exception:
+        SEARCH_DURATION.observe(time.perf_counter() - started_at, "error")
+        raise
+    SEARCH_DURATION.observe(time.perf_counter() - started_at, "ok")
+
+    search_content = []
+    for result in response.get("results", []):
+        if result["raw_content"] and result["url"] and result["title"]:
+            search_content.append(
+                SearchResult(
+                    url=result["url"],
+                    title=result["title"],
+                    raw_content=result["raw_content"],
+                )
+            )
+    search_results = SearchResults(query=query, results=search_content)
+    if cache is not None:
+        await asyncio.to_thread(cache.set, cache_key, search_results.model_dump_json())
+    return search_results
+
+
+async def search_queries(
+    queries: List[Query],
+    max_results: int,
+    rate_limiter: RateLimiter,
+    max_concurrency: int,
+    timeout: float,
+    cache: Optional[SQLiteCache] = None,
+) -> List[SearchResults]:
+    """
+    Runs the searches for all queries concurrently.
+
+    At most `max_concurrency` searches run at once and each one is given at most
+    `timeout` seconds. A query that fails or times out contributes an empty
+    SearchResults so it does not hold up or break the rest of the step.
+
+    Returns:
+        List[SearchResults]: One SearchResults per query, in the order of `queries`
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def bounded_search(query: Query) -> SearchResults:
+        async with semaphore:
+            try:
+                return await search(query, max_results, rate_limiter, timeout, cache)
+            except asyncio.TimeoutError:
+                logger.warning(f"Search for '{query.query}' timed out after {timeout}s")
+            except Exception as e:
+                logger.warning(f"Search for '{query.query}' failed: {e}")
+            return SearchResults(query=query, results=[])
+
+    return list(await asyncio.gather(*(bounded_search(query) for query in queries)))
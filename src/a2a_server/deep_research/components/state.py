@@ -1,21 +1,47 @@
 import operator
-from typing import Annotated, List, TypedDict
+from typing import Annotated, Any, Callable, Dict, List, Optional, TypedDict
 
 from langgraph.graph.message import add_messages
 
-from .struct import Feedback, Query, ResponseFormat, SearchResults, Section
+from .dedupe import merge_search_results
+from .query_filter import merge_queries
+from .struct import (
+    Feedback,
+    Query,
+    ResponseFormat,
+    SearchResults,
+    Section,
+    SectionContent,
+    SummarizedSection,
+)
+
+
+def resettable(reducer: Callable[[Any, Any], List]) -> Callable[[Any, Any], List]:
+    """Wraps a list reducer so that writing None empties the list, for a new report."""
+
+    def reduce(left: Any, right: Any) -> List:
+        if right is None:
+            return []
+        return reducer(left, right)
+
+    return reduce
 
 
 class ResearchState(TypedDict):
     section: Section
+    section_count: int
     knowledge: str
     reflection_feedback: Feedback
     generated_queries: List[Query]
-    searched_queries: Annotated[List[Query], operator.add]
-    search_results: Annotated[List[SearchResults], operator.add]
+    searched_queries: Annotated[List[Query], merge_queries]
+    task_searched_queries: List[Query]
+    task_search_results: List[SearchResults]
+    search_results: Annotated[List[SearchResults], merge_search_results]
     accumulated_content: str
+    accumulated_urls: List[str]
     reflection_count: int
-    final_section_content: List[str]
+    final_section_content: List[SectionContent]
+    section_summaries: List[SummarizedSection]
     current_section_index: int
 
 
@@ -23,8 +49,13 @@ class AgentState(TypedDict):
     messages: Annotated[list, operator.add]
     report_structure: str
     sections: List[Section]
+    section_knowledge: Dict[int, str]
     current_section_index: int
-    final_section_content: Annotated[List[str], operator.add]
-    search_results: Annotated[List[SearchResults], operator.add]
+    searched_queries: Annotated[List[Query], resettable(merge_queries)]
+    final_section_content: Annotated[List[SectionContent], resettable(operator.add)]
+    section_summaries: Annotated[List[SummarizedSection], resettable(operator.add)]
+    search_results: Annotated[List[SearchResults], resettable(merge_search_results)]
     structured_response: ResponseFormat
     final_report_content: str
+    report_conclusion: str
+    budget_usage: Optional[Dict[str, Any]]
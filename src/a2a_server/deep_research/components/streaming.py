@@ -0,0 +1,41 @@
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class TextCoalescer:
+    """
+    Buffers streamed LLM tokens and releases them in larger chunks.
+
+    Each stream, for example one node of one section, has its own buffer. A buffer is
+    released once it holds `chunk_chars` characters or `interval_seconds` have passed
+    since that stream last released text, so a fast model produces a bounded number of
+    events instead of one per token.
+    """
+
+    def __init__(self, chunk_chars: int, interval_seconds: float):
+        self.chunk_chars = chunk_chars
+        self.interval_seconds = interval_seconds
+        self.buffers: Dict[Hashable, str] = {}
+        self.released_at: Dict[Hashable, float] = {}
+
+    def add(self, key: Hashable, text: str) -> Optional[str]:
+        """Adds text to a stream and returns the buffered text once it is due."""
+        now = time.monotonic()
+        buffer = self.buffers.get(key, "") + text
+        released_at = self.released_at.setdefault(key, now)
+        if (
+            len(buffer) >= self.chunk_chars
+            or now - released_at >= self.interval_seconds
+        ):
+            self.buffers[key] = ""
+            self.released_at[key] = now
+            return buffer
+        self.buffers[key] = buffer
+        return None
+
+    def flush(self) -> List[Tuple[Hashable, str]]:
+        """Releases the text left in every buffer."""
+        released = [(key, buffer) for key, buffer in self.buffers.items() if buffer]
+        self.buffers.clear()
+        self.released_at.clear()
+        return released
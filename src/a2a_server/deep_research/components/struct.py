@@ -1,4 +1,4 @@
-from typing import List, Literal, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -28,7 +28,16 @@ class Queries(BaseModel):
 class SearchResult(BaseModel):
     url: str = Field(..., description="The url of the search result")
     title: str = Field(..., description="The title of the search result")
-    raw_content: str = Field(..., description="The raw content of the search result")
+    raw_content: Optional[str] = Field(
+        default=None,
+        description=(
+            "The raw content of the search result, unless it was moved to the blob "
+            "store"
+        ),
+    )
+    content_ref: Optional[str] = Field(
+        default=None, description="The blob store handle of the raw content"
+    )
 
 
 class SearchResults(BaseModel):
@@ -36,6 +45,10 @@ class SearchResults(BaseModel):
         ..., description="The search query that was used to retrieve the raw content"
     )
     results: List[SearchResult] = Field(..., description="The search results")
+    duplicate_urls: List[str] = Field(
+        default_factory=list,
+        description="Canonical urls of results already stored under an earlier query",
+    )
 
 
 class Feedback(BaseModel):
@@ -45,10 +58,51 @@ class Feedback(BaseModel):
     )
 
 
+class SectionContent(BaseModel):
+    section_index: int = Field(
+        ..., description="The position of the section in the report structure"
+    )
+    content: str = Field(..., description="The formatted content of the section")
+
+
+class SectionSummary(BaseModel):
+    summary: str = Field(
+        ...,
+        description=(
+            "A short summary of the section's key findings, used in place of the "
+            "section when the conclusion is written"
+        ),
+    )
+    references: List[str] = Field(
+        ...,
+        description=(
+            "The few search results that best support the summary, each formatted as "
+            "'Title - URL'"
+        ),
+    )
+
+
+class SummarizedSection(BaseModel):
+    section_index: int = Field(
+        ..., description="The position of the section in the report structure"
+    )
+    summary: str = Field(..., description="The summary of the section")
+    references: List[str] = Field(
+        ..., description="The references selected for the summary"
+    )
+
+
 class SectionOutput(BaseModel):
-    final_section_content: List[str] = Field(
+    final_section_content: List[SectionContent] = Field(
         ..., description="The final section content"
     )
+    section_summaries: List[SummarizedSection] = Field(
+        default_factory=list,
+        description="The section summary, when the finalizer reduces section summaries",
+    )
+    searched_queries: List[Query] = Field(
+        default_factory=list, description="The queries searched for the section"
+    )
     search_results: List[SearchResults] = Field(..., description="The search results")
 
 
@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    query TEXT NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state);
+"""
+
+
+@dataclass
+class TaskRecord:
+    task_id: str
+    session_id: str
+    query: str
+    state: str
+    updated_at: float
+
+
+class TaskRegistry:
+    """
+    Maps A2A tasks to the LangGraph thread that runs them, in a local SQLite file.
+
+    The thread id of a task is its session id, so together with a durable checkpointer
+    the registry lets a restarted server find the tasks that were still working when it
+    stopped and continue their runs from the last checkpoint. Finished tasks that have
+    not been updated for `ttl_seconds` are deleted when the registry is opened (0 keeps
+    them).
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 0):
+        self.path = path
+        self.lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        if ttl_seconds > 0:
+            self.connection.execute(
+                "DELETE FROM tasks WHERE state != 'working' AND updated_at < ?",
+                (time.time() - ttl_seconds,),
+            )
+        self.connection.commit()
+
+    def save(self, task_id: str, session_id: str, query: str, state: str) -> None:
+        """Records a task and the query it is running, replacing an earlier record."""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?)",
+                (task_id, session_id, query, state, time.time()),
+            )
+            self.connection.commit()
+
+    def set_state(self, task_id: str, state: str) -> None:
+        with self.lock:
+            self.connection.execute(
+                "UPDATE tasks SET state = ?, updated_at = ? WHERE task_id = ?",
+                (state, time.time(), task_id),
+            )
+            self.connection.commit()
+
+    def get(self, task_id: str) -> Optional[TaskRecord]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return None if row is None else TaskRecord(*row)
+
+    def list(self, state: str) -> List[TaskRecord]:
+        """Returns the tasks in `state`, least recently updated first."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT * FROM tasks WHERE state = ? ORDER BY updated_at", (state,)
+            ).fetchall()
+        return [TaskRecord(*row) for row in rows]
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+_registry: Optional[TaskRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_task_registry(default_path: str = "cache/tasks.sqlite") -> TaskRegistry:
+    """
+    Returns the process-wide task registry.
+
+    TASK_REGISTRY_PATH overrides the SQLite file tasks are recorded in, and an empty
+    value keeps them in memory, so they are not resumed after a restart.
+    TASK_REGISTRY_TTL_SECONDS sets how long finished tasks are kept.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TaskRegistry(
+                os.environ.get("TASK_REGISTRY_PATH", default_path) or ":memory:",
+                ttl_seconds=float(
+                    os.environ.get("TASK_REGISTRY_TTL_SECONDS", 7 * 86400)
+                ),
+            )
+        return _registry
@@ -11,6 +11,7 @@ from common.types import (
     MissingAPIKeyError,
 )
 from common.utils.push_notification_auth import PushNotificationSenderAuth
+from components.metrics import handle_metrics_endpoint
 from dotenv import load_dotenv
 from task_manager import AgentTaskManager
 
@@ -54,12 +55,13 @@ def main(host, port):
 
         notification_sender_auth = PushNotificationSenderAuth()
         notification_sender_auth.generate_jwk()
+        task_manager = AgentTaskManager(
+            agent=DeepResearchAgent(),
+            notification_sender_auth=notification_sender_auth,
+        )
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(
-                agent=DeepResearchAgent(),
-                notification_sender_auth=notification_sender_auth,
-            ),
+            task_manager=task_manager,
             host=host,
             port=port,
         )
@@ -69,6 +71,20 @@ def main(host, port):
             notification_sender_auth.handle_jwks_endpoint,
             methods=["GET"],
         )
+        server.app.add_route("/metrics", handle_metrics_endpoint, methods=["GET"])
+        # Tasks that were working when the server stopped continue from their last
+        # checkpoint
+        server.app.add_event_handler("startup", task_manager.resume_unfinished_tasks)
+        server.app.add_route(
+            "/tasks/{task_id}/artifacts",
+            task_manager.handle_artifacts_endpoint,
+            methods=["GET"],
+        )
+        server.app.add_route(
+            "/tasks/{task_id}/artifacts/{name:path}",
+            task_manager.handle_artifacts_endpoint,
+            methods=["GET"],
+        )
 
         logger.info(f"Starting server on {host}:{port}")
         server.start()
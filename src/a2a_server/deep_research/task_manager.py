@@ -27,6 +27,10 @@ from common.types import (
     TextPart,
 )
 from common.utils.push_notification_auth import PushNotificationSenderAuth
+from components.artifact_store import get_artifact_store
+from components.task_registry import TaskRecord, get_task_registry
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 
 logger = logging.getLogger(__name__)
 
@@ -40,13 +44,27 @@ class AgentTaskManager(InMemoryTaskManager):
         super().__init__()
         self.agent = agent
         self.notification_sender_auth = notification_sender_auth
+        self.registry = get_task_registry()
+        # Streaming runs of this process by task id, so a task is never resumed twice
+        self.running_tasks: dict[str, asyncio.Task] = {}
 
     async def _run_streaming_agent(self, request: SendTaskStreamingRequest):
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
+        await self._stream_agent_items(
+            task_send_params.id,
+            self.agent.stream(query, task_send_params.sessionId),
+        )
+
+    async def _stream_agent_items(
+        self, task_id: str, items: AsyncIterable[dict]
+    ) -> None:
+        """Sends the items streamed by the agent to the task's store and subscribers."""
+        report_chunks = 0
+        task_state = TaskState.WORKING
 
         try:
-            async for item in self.agent.stream(query, task_send_params.sessionId):
+            async for item in items:
                 is_task_complete = item["is_task_complete"]
                 require_user_input = item["require_user_input"]
                 artifact = None
@@ -54,6 +72,45 @@ class AgentTaskManager(InMemoryTaskManager):
                 parts = [{"type": "text", "text": item["content"]}]
                 end_stream = False
 
+                if item.get("is_artifact_chunk"):
+                    # Finished parts of the report are streamed as chunks of a single
+                    # artifact; the task store only keeps the complete report.
+                    await self.enqueue_events_for_sse(
+                        task_id,
+                        TaskArtifactUpdateEvent(
+                            id=task_id,
+                            artifact=Artifact(
+                                parts=parts,
+                                index=0,
+                                append=report_chunks > 0,
+                                lastChunk=item["last_chunk"],
+                                metadata=item.get("metadata"),
+                            ),
+                        ),
+                    )
+                    report_chunks += 1
+                    continue
+
+                if item.get("is_text_chunk"):
+                    # Text streamed while a node is generating is only sent to
+                    # subscribers, so partial output does not pile up in the history.
+                    await self.enqueue_events_for_sse(
+                        task_id,
+                        TaskStatusUpdateEvent(
+                            id=task_id,
+                            status=TaskStatus(
+                                state=TaskState.WORKING,
+                                message=Message(
+                                    role="agent",
+                                    parts=parts,
+                                    metadata=item["metadata"],
+                                ),
+                            ),
+                            final=False,
+                        ),
+                    )
+                    continue
+
                 if not is_task_complete and not require_user_input:
                     task_state = TaskState.WORKING
                     message = Message(role="agent", parts=parts)
@@ -63,40 +120,50 @@ class AgentTaskManager(InMemoryTaskManager):
                     end_stream = True
                 else:
                     task_state = TaskState.COMPLETED
-                    artifact = Artifact(parts=parts, index=0, append=False)
+                    artifact = Artifact(
+                        parts=parts,
+                        index=0,
+                        append=False,
+                        metadata=item.get("metadata"),
+                    )
                     end_stream = True
 
                 task_status = TaskStatus(state=task_state, message=message)
                 latest_task = await self.update_store(
-                    task_send_params.id,
+                    task_id,
                     task_status,
                     None if artifact is None else [artifact],
                 )
                 await self.send_task_notification(latest_task)
 
-                if artifact:
+                if artifact and not report_chunks:
                     task_artifact_update_event = TaskArtifactUpdateEvent(
-                        id=task_send_params.id, artifact=artifact
+                        id=task_id, artifact=artifact
                     )
                     await self.enqueue_events_for_sse(
-                        task_send_params.id, task_artifact_update_event
+                        task_id, task_artifact_update_event
                     )
 
                 task_update_event = TaskStatusUpdateEvent(
-                    id=task_send_params.id, status=task_status, final=end_stream
-                )
-                await self.enqueue_events_for_sse(
-                    task_send_params.id, task_update_event
+                    id=task_id, status=task_status, final=end_stream
                 )
+                await self.enqueue_events_for_sse(task_id, task_update_event)
 
         except Exception as e:
             logger.error(f"An error occurred while streaming the response: {e}")
+            task_state = TaskState.FAILED
             await self.enqueue_events_for_sse(
-                task_send_params.id,
+                task_id,
                 InternalError(
                     message=f"An error occurred while streaming the response: {e}"
                 ),
             )
+        finally:
+            self.running_tasks.pop(task_id, None)
+            # A run cancelled by the server shutting down stays working, so it is
+            # resumed after the restart
+            if task_state != TaskState.WORKING:
+                await asyncio.to_thread(self.registry.set_state, task_id, task_state)
 
     def _validate_request(
         self, request: SendTaskRequest | SendTaskStreamingRequest
@@ -150,10 +217,14 @@ class AgentTaskManager(InMemoryTaskManager):
 
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
+        await self._register_task(task_send_params, query)
         try:
             agent_response = await self.agent.invoke(query, task_send_params.sessionId)
         except Exception as e:
             logger.error(f"Error invoking agent: {e}")
+            await asyncio.to_thread(
+                self.registry.set_state, task_send_params.id, TaskState.FAILED
+            )
             raise ValueError(f"Error invoking agent: {e}")
         return await self._process_agent_response(request, agent_response)
 
@@ -181,7 +252,12 @@ class AgentTaskManager(InMemoryTaskManager):
             task_send_params: TaskSendParams = request.params
             sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)
 
-            asyncio.create_task(self._run_streaming_agent(request))
+            await self._register_task(
+                task_send_params, self._get_user_query(task_send_params)
+            )
+            self.running_tasks[task_send_params.id] = asyncio.create_task(
+                self._run_streaming_agent(request)
+            )
 
             return self.dequeue_events_for_sse(
                 request.id, task_send_params.id, sse_event_queue
@@ -214,14 +290,88 @@ class AgentTaskManager(InMemoryTaskManager):
             )
         else:
             task_status = TaskStatus(state=TaskState.COMPLETED)
-            artifact = Artifact(parts=parts)
+            artifact = Artifact(parts=parts, metadata=agent_response.get("metadata"))
         task = await self.update_store(
             task_id, task_status, None if artifact is None else [artifact]
         )
+        await asyncio.to_thread(self.registry.set_state, task_id, task_status.state)
         task_result = self.append_task_history(task, history_length)
         await self.send_task_notification(task)
         return SendTaskResponse(id=request.id, result=task_result)
 
+    async def _register_task(
+        self, task_send_params: TaskSendParams, query: str
+    ) -> None:
+        """Durably records which session runs the task, so it can be resumed."""
+        await asyncio.to_thread(
+            self.registry.save,
+            task_send_params.id,
+            task_send_params.sessionId,
+            query,
+            TaskState.WORKING,
+        )
+
+    async def resume_unfinished_tasks(self) -> None:
+        """
+        Resumes the tasks that were still working when the server last stopped.
+
+        Each task continues its LangGraph run from the session's last checkpoint, so
+        sections finished before the restart are not researched again. Clients can
+        follow a resumed task with tasks/resubscribe.
+        """
+        records = await asyncio.to_thread(self.registry.list, TaskState.WORKING)
+        for record in records:
+            await self._resume_task(record)
+
+    async def _resume_task(self, record: TaskRecord) -> None:
+        async with self.lock:
+            if record.task_id not in self.tasks:
+                self.tasks[record.task_id] = Task(
+                    id=record.task_id,
+                    sessionId=record.session_id,
+                    status=TaskStatus(state=TaskState.WORKING),
+                    history=[Message(role="user", parts=[TextPart(text=record.query)])],
+                )
+            if record.task_id in self.running_tasks:
+                return
+            logger.info(
+                f"Resuming task {record.task_id} of session {record.session_id}"
+            )
+            self.running_tasks[record.task_id] = asyncio.create_task(
+                self._stream_agent_items(
+                    record.task_id,
+                    self.agent.resume(record.query, record.session_id),
+                )
+            )
+
+    async def _restore_task(self, record: TaskRecord) -> Task:
+        """Adds a task finished by an earlier process back to the task store."""
+        async with self.lock:
+            task = self.tasks.get(record.task_id)
+        if task is not None:
+            return task
+
+        artifacts = None
+        if record.state == TaskState.COMPLETED:
+            config = self.agent.get_config(record.session_id)
+            await self.agent.get_saved_state(config)
+            agent_response = await self.agent.get_agent_response(config)
+            artifacts = [
+                Artifact(
+                    parts=[{"type": "text", "text": agent_response["content"]}],
+                    metadata=agent_response.get("metadata"),
+                )
+            ]
+        task = Task(
+            id=record.task_id,
+            sessionId=record.session_id,
+            status=TaskStatus(state=record.state),
+            artifacts=artifacts,
+            history=[Message(role="user", parts=[TextPart(text=record.query)])],
+        )
+        async with self.lock:
+            return self.tasks.setdefault(record.task_id, task)
+
     def _get_user_query(self, task_send_params: TaskSendParams) -> str:
         part = task_send_params.message.parts[0]
         if not isinstance(part, TextPart):
@@ -244,7 +394,22 @@ class AgentTaskManager(InMemoryTaskManager):
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
         task_id_params: TaskIdParams = request.params
         try:
-            sse_event_queue = await self.setup_sse_consumer(task_id_params.id, True)
+            # A task recorded by an earlier process is resumed, or restored once
+            # finished, so its subscribers can follow it after a restart
+            record = await asyncio.to_thread(self.registry.get, task_id_params.id)
+            sse_event_queue = await self.setup_sse_consumer(
+                task_id_params.id, record is None
+            )
+            if record is not None and record.state == TaskState.WORKING:
+                await self._resume_task(record)
+            elif record is not None:
+                task = await self._restore_task(record)
+                await self.enqueue_events_for_sse(
+                    task_id_params.id,
+                    TaskStatusUpdateEvent(
+                        id=task_id_params.id, status=task.status, final=True
+                    ),
+                )
             return self.dequeue_events_for_sse(
                 request.id, task_id_params.id, sse_event_queue
             )
@@ -269,3 +434,34 @@ class AgentTaskManager(InMemoryTaskManager):
 
         await super().set_push_notification_info(task_id, push_notification_config)
         return True
+
+    async def handle_artifacts_endpoint(self, request: Request) -> Response:
+        """
+        Serves the files a task stored in the artifact store.
+
+        Without a name the response lists the task's artifacts, with one it returns the
+        artifact's content. Artifacts are stored per session, so every task of a session
+        sees the same files. Tasks of an earlier process are looked up in the task
+        registry, so their files are served after a restart.
+        """
+        task_id = request.path_params["task_id"]
+        async with self.lock:
+            task = self.tasks.get(task_id)
+        if task is not None:
+            session_id = task.sessionId
+        else:
+            record = await asyncio.to_thread(self.registry.get, task_id)
+            if record is None:
+                return JSONResponse({"error": "Task not found"}, status_code=404)
+            session_id = record.session_id
+
+        store = get_artifact_store()
+        name = request.path_params.get("name")
+        if not name:
+            names = await asyncio.to_thread(store.list, session_id)
+            return JSONResponse({"artifacts": names})
+
+        content = await asyncio.to_thread(store.read, session_id, name)
+        if content is None:
+            return JSONResponse({"error": "Artifact not found"}, status_code=404)
+        return PlainTextResponse(content)
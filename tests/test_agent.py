@@ -0,0 +1,253 @@
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+from typing import Any, AsyncIterator, List, Optional
+from unittest import mock
+
+from fakes import FakeChatModel, FakeSearchClient
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+# The agent is a script importing its components by their top-level names
+DEEP_RESEARCH_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "src", "a2a_server", "deep_research"
+)
+
+ENVIRONMENT = {
+    "CHECKPOINT_PATH": "",
+    "MAX_PARALLEL_SECTIONS": "0",
+    "LLM_CACHE_ENABLED": "false",
+    "SEARCH_CACHE_ENABLED": "false",
+    "BLOB_STORE_ENABLED": "false",
+    "LLM_REQUESTS_PER_MINUTE": "0",
+    "LLM_TOKENS_PER_MINUTE": "0",
+    "SEARCH_REQUESTS_PER_MINUTE": "0",
+}
+
+
+def import_agent_modules() -> tuple:
+    """Imports the agent script and the components it uses, as the server does."""
+    if DEEP_RESEARCH_DIR not in sys.path:
+        sys.path.insert(0, DEEP_RESEARCH_DIR)
+    with mock.patch.dict(os.environ, ENVIRONMENT):
+        # The agent turns tracing on when imported, which the patch undoes
+        agent = importlib.import_module("agent")
+    return (
+        agent,
+        importlib.import_module("components.artifact_store"),
+        importlib.import_module("components.llm"),
+        importlib.import_module("components.search"),
+    )
+
+
+class SlowFirstSectionChatModel(FakeChatModel):
+    """
+    A fake chat model that is slower for the first section of the report.
+
+    Text answers are streamed word by word, as Gemini streams them, since only
+    streamed tokens reach the graph's messages stream.
+    """
+
+    async def _agenerate(self, messages: List[BaseMessage], *args, **kwargs):
+        if any("Section 1 " in str(message.content) for message in messages):
+            await asyncio.sleep(0.2)
+        return await super()._agenerate(messages, *args, **kwargs)
+
+    def _should_stream(self, *, async_api: bool, **kwargs: Any) -> bool:
+        # Structured output is parsed from whole tool calls
+        return not kwargs.get("tools") and super()._should_stream(
+            async_api=async_api, **kwargs
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        result = await self._agenerate(messages, stop, **kwargs)
+        message = result.generations[0].message
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            chunk = AIMessageChunk(content=word if i == 0 else " " + word)
+            if i == len(words) - 1:
+                chunk.usage_metadata = message.usage_metadata
+            yield ChatGenerationChunk(message=chunk)
+
+
+class AgentTestCase(unittest.TestCase):
+    """Builds the agent on fake chat models and a fake search client."""
+
+    sections = 3
+
+    def setUp(self) -> None:
+        agent, artifact_store, llm, search = import_agent_modules()
+
+        environment = mock.patch.dict(os.environ, ENVIRONMENT)
+        environment.start()
+        self.addCleanup(environment.stop)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = artifact_store.ArtifactStore(directory.name)
+        self.addCleanup(store.close)
+        patcher = mock.patch.object(artifact_store, "_artifact_store", store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.search_client = FakeSearchClient(latency_seconds=0, page_chars=2000)
+        search.set_search_client(self.search_client)
+        self.addCleanup(search.set_search_client, None)
+        llm.set_chat_model_factory(self.make_chat_model)
+        self.addCleanup(llm.set_chat_model_factory, None)
+
+        self.agent = agent.DeepResearchAgent()
+
+    def make_chat_model(self, model: str, temperature: float, **kwargs: Any):
+        return SlowFirstSectionChatModel(
+            latency_seconds=0,
+            tokens_per_second=1e9,
+            output_tokens=50,
+            sections=self.sections,
+            queries=1,
+            **kwargs,
+        )
+
+    def stream(self, query: str, session_id: str) -> List[dict]:
+        async def collect() -> List[dict]:
+            return [item async for item in self.agent.stream(query, session_id)]
+
+        return asyncio.run(collect())
+
+    def resume(self, query: str, session_id: str) -> List[dict]:
+        async def collect() -> List[dict]:
+            return [item async for item in self.agent.resume(query, session_id)]
+
+        return asyncio.run(collect())
+
+    def get_final_state(self, session_id: str) -> dict:
+        config = self.agent.get_config(session_id)
+        return asyncio.run(self.agent.graph.aget_state(config)).values
+
+
+class AgentStreamTest(AgentTestCase):
+    """Tests for streaming the report of a run with parallel sections."""
+
+    def test_report_chunks_follow_the_report_order(self) -> None:
+        """Test that sections finishing out of order are streamed in report order."""
+        held_back = []
+        pop_report_chunks = self.agent.pop_report_chunks
+
+        def record_held_back(finished_sections, next_section_index):
+            chunks = pop_report_chunks(finished_sections, next_section_index)
+            if finished_sections:
+                held_back.append(sorted(finished_sections))
+            return chunks
+
+        with mock.patch.object(self.agent, "pop_report_chunks", record_held_back):
+            items = self.stream("Solar power", "chunks")
+        state = self.get_final_state("chunks")
+
+        # The first section finished last, so the others had to wait for it
+        self.assertIn([1, 2], held_back)
+
+        chunks = [item for item in items if item.get("is_artifact_chunk")]
+        sections = sorted(
+            state["final_section_content"],
+            key=lambda section_content: section_content.section_index,
+        )
+        self.assertEqual(
+            [chunk["content"].lstrip("\n") for chunk in chunks[:-1]],
+            [section.content for section in sections],
+        )
+        self.assertEqual(
+            [chunk["last_chunk"] for chunk in chunks],
+            [False] * self.sections + [True],
+        )
+        self.assertIn("budget", chunks[-1]["metadata"])
+
+        self.assertTrue(items[-1]["is_task_complete"])
+        self.assertEqual(
+            "".join(chunk["content"] for chunk in chunks), items[-1]["content"]
+        )
+
+    def test_section_text_carries_the_section_index(self) -> None:
+        """Test that text streamed by parallel section formatters can be told apart."""
+        items = self.stream("Solar power", "text")
+
+        metadata = [item["metadata"] for item in items if item.get("is_text_chunk")]
+        self.assertIn({"node": "report_structure_planner"}, metadata)
+        self.assertEqual(
+            {
+                chunk_metadata["section_index"]
+                for chunk_metadata in metadata
+                if chunk_metadata["node"] == "final_section_formatter"
+            },
+            set(range(self.sections)),
+        )
+
+
+class AgentResumeTest(AgentTestCase):
+    """Tests for resuming the run of a session after the server restarted."""
+
+    def test_finished_run_is_not_repeated(self) -> None:
+        """Test that resuming a finished run returns its report without researching."""
+        report = self.stream("Solar power", "finished")[-1]
+        searches = self.search_client.calls
+
+        items = self.resume("Solar power", "finished")
+
+        self.assertEqual(self.search_client.calls, searches)
+        self.assertEqual(len(items), 1)
+        self.assertTrue(items[0]["is_task_complete"])
+        self.assertEqual(items[0]["content"], report["content"])
+        self.assertEqual(items[0]["metadata"]["budget"]["search_calls"], searches)
+
+    def test_interrupted_run_continues_with_its_budget(self) -> None:
+        """Test that a resumed run is charged with what the interrupted run spent."""
+        whole_run = self.stream("Solar power", "whole")[-1]
+
+        async def interrupt() -> None:
+            config = self.agent.get_config("interrupted")
+            inputs = {"messages": [("user", "Solar power")]}
+            async for _ in self.agent.graph.astream(
+                inputs, config, interrupt_after=["section_formatter"]
+            ):
+                pass
+
+        asyncio.run(interrupt())
+        saved_usage = self.get_final_state("interrupted")["budget_usage"]
+        self.assertGreater(saved_usage["llm_calls"], 0)
+
+        items = self.resume("Solar power", "interrupted")
+
+        self.assertTrue(items[-1]["is_task_complete"])
+        self.assertEqual(items[-1]["content"], whole_run["content"])
+        # The model calls of both runs add up to those of an uninterrupted run
+        self.assertEqual(
+            items[-1]["metadata"]["budget"]["llm_calls"],
+            whole_run["metadata"]["budget"]["llm_calls"],
+        )
+
+    def test_unsaved_run_starts_again(self) -> None:
+        """Test that a query the session has no run of is researched from the start."""
+        self.stream("Solar power", "unsaved")
+        searches = self.search_client.calls
+
+        items = self.resume("Wind power", "unsaved")
+
+        self.assertGreater(self.search_client.calls, searches)
+        self.assertTrue(items[-1]["is_task_complete"])
+        self.assertIn("Wind power", str(self.get_final_state("unsaved")["messages"]))
+
+        # A session that never saved a checkpoint is researched like a new one
+        items = self.resume("Solar power", "new")
+        self.assertTrue(items[-1]["is_task_complete"])
+
+
+if __name__ == "__main__":
+    unittest.main()
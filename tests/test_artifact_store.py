@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from a2a_server.deep_research.components import artifact_store
+from a2a_server.deep_research.components.artifact_store import ArtifactStore
+from a2a_server.deep_research.components.metrics import REGISTRY
+
+
+class ArtifactStoreTest(unittest.TestCase):
+    """Tests for the per-task artifact store."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_store(self, **kwargs) -> ArtifactStore:
+        store = ArtifactStore(self.directory.name, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def test_tasks_do_not_share_artifacts(self) -> None:
+        """Test that the same artifact name is stored separately for each task."""
+        store = self.make_store()
+        store.write("first", "reports/response.md", "First report")
+        store.write("second", "reports/response.md", "Second report")
+        self.assertEqual(store.read("first", "reports/response.md"), "First report")
+        self.assertEqual(store.read("second", "reports/response.md"), "Second report")
+        self.assertEqual(store.list("first"), ["reports/response.md"])
+        self.assertIsNone(store.read("first", "missing.md"))
+
+    def test_writes_are_batched(self) -> None:
+        """Test that only the last queued write of a file reaches the disk."""
+        store = self.make_store(flush_interval_seconds=0.2)
+        for i in range(10):
+            store.write("task", "sections.json", str(i))
+        self.assertEqual(store.read("task", "sections.json"), "9")
+        self.assertLess(store.stats()["writes"], 10)
+
+    def test_failed_writes_do_not_stop_the_writer(self) -> None:
+        """Test that an unexpected write error is logged and later writes still land."""
+        store = self.make_store()
+        with mock.patch.object(
+            store, "_write_file", side_effect=UnicodeEncodeError("utf-8", "", 0, 1, "")
+        ), self.assertLogs(artifact_store.logger, "ERROR"):
+            store.write("task", "sections.json", "lost")
+            store.flush()
+        store.write("task", "sections.json", "[]")
+        self.assertEqual(store.read("task", "sections.json"), "[]")
+        self.assertTrue(store.thread.is_alive())
+
+    def test_stats_are_exposed_as_metrics(self) -> None:
+        """Test that the process-wide store reports its stats as metrics."""
+        store = self.make_store()
+        store.write("task", "sections.json", "[]")
+        store.flush()
+        with mock.patch.object(artifact_store, "_artifact_store", store):
+            lines = REGISTRY.render().splitlines()
+        self.assertIn(
+            f'agent_artifact_store_writes_total{{path="{store.root}"}} 1', lines
+        )
+        self.assertIn(f'agent_artifact_store_queued{{path="{store.root}"}} 0', lines)
+
+    def test_compressed_artifacts(self) -> None:
+        """Test that compressed artifacts are stored gzipped and read back as text."""
+        store = self.make_store(compress=True)
+        store.write("task", "reports/response.md", "Report " * 100)
+        self.assertEqual(store.read("task", "reports/response.md"), "Report " * 100)
+        self.assertEqual(store.list("task"), ["reports/response.md"])
+        path = os.path.join(self.directory.name, "task", "reports", "response.md.gz")
+        self.assertLess(os.path.getsize(path), 100)
+
+    def test_names_stay_inside_the_task(self) -> None:
+        """Test that artifact names and task ids can not escape the store."""
+        store = self.make_store()
+        with self.assertRaises(ValueError):
+            store.write("task", "../other/response.md", "Report")
+        self.assertIsNone(store.read("task", "../../etc/passwd"))
+        store.write("../task", "response.md", "Report")
+        self.assertEqual(store.list("../task"), ["response.md"])
+        store.write("..", "response.md", "Report")
+        store.flush()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["_.", "_._task"])
+
+
+if __name__ == "__main__":
+    unittest.main()
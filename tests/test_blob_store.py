@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from a2a_server.deep_research.components import blob_store
+from a2a_server.deep_research.components.blob_store import (
+    BlobStore,
+    offload_search_results,
+    resolve_content,
+)
+from a2a_server.deep_research.components.dedupe import merge_search_results
+from a2a_server.deep_research.components.metrics import REGISTRY
+from a2a_server.deep_research.components.struct import (
+    Query,
+    SearchResult,
+    SearchResults,
+)
+
+
+class BlobStoreTest(unittest.TestCase):
+    """Tests for the content-addressed blob store."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.store = BlobStore(self.directory.name, max_cached_chars=10)
+        patcher = mock.patch.object(blob_store, "_blob_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_content_is_stored_once(self) -> None:
+        """Test that equal content gets the same handle and is written once."""
+        handle = self.store.put("some page content")
+        self.assertEqual(self.store.put("some page content"), handle)
+        self.assertNotEqual(self.store.put("other page content"), handle)
+        self.assertEqual(self.store.stats()["writes"], 2)
+
+    def test_content_is_read_back_from_disk(self) -> None:
+        """Test that a new store on the same directory returns the stored content."""
+        handle = self.store.put("ünïcode page content")
+        self.assertIn(handle, self.store)
+        store = BlobStore(self.directory.name)
+        self.assertEqual(store.get(handle), "ünïcode page content")
+        self.assertEqual(store.get(handle), "ünïcode page content")
+        self.assertEqual(store.stats()["reads"], 1)
+        self.assertEqual(store.stats()["hits"], 1)
+        with self.assertRaises(KeyError):
+            store.get("0" * 64)
+
+    def test_stats_are_exposed_as_metrics(self) -> None:
+        """Test that the process-wide store reports its stats as metrics."""
+        self.store.put("some page content")
+        lines = REGISTRY.render().splitlines()
+        self.assertIn(
+            f'agent_blob_store_writes_total{{path="{self.directory.name}"}} 1', lines
+        )
+
+    def test_search_results_keep_only_handles(self) -> None:
+        """Test that offloaded results resolve to their content and still dedupe."""
+        search_results = [
+            SearchResults(
+                query=Query(query="first"),
+                results=[
+                    SearchResult(
+                        url="https://a.com", title="A", raw_content="Same text"
+                    )
+                ],
+            ),
+            SearchResults(
+                query=Query(query="second"),
+                results=[
+                    SearchResult(
+                        url="https://b.com", title="B", raw_content="same  text"
+                    )
+                ],
+            ),
+        ]
+        offloaded = offload_search_results(search_results, self.store)
+        result = offloaded[0].results[0]
+        self.assertIsNone(result.raw_content)
+        self.assertEqual(resolve_content(result), "Same text")
+        self.assertNotIn("Same text", offloaded[0].model_dump_json())
+
+        merged = merge_search_results([], offloaded)
+        self.assertEqual(merged[1].results, [])
+        self.assertEqual(merged[1].duplicate_urls, ["https://b.com"])
+
+    def test_missing_content_resolves_to_empty(self) -> None:
+        """Test that a result whose blob was deleted is treated as empty."""
+        (result,) = offload_search_results(
+            [
+                SearchResults(
+                    query=Query(query="first"),
+                    results=[
+                        SearchResult(url="https://a.com", title="A", raw_content="Gone")
+                    ],
+                )
+            ],
+            self.store,
+        )[0].results
+        os.remove(self.store.path(result.content_ref))
+        self.store.cached.clear()
+        with self.assertLogs(blob_store.logger, "WARNING"):
+            self.assertEqual(resolve_content(result), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
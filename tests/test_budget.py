@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from a2a_server.deep_research.components.budget import (
+    Budget,
+    attach_budget,
+    budget_exhausted,
+    get_budget,
+)
+from a2a_server.deep_research.components.cache import SQLiteCache
+from a2a_server.deep_research.components.llm_cache import SQLiteLLMCache
+
+
+class BudgetTest(unittest.TestCase):
+    """Tests for per-task token, call and time budgets."""
+
+    def test_model_calls_and_tokens_are_charged(self) -> None:
+        """Test that a model run with the budget attached counts its call and tokens."""
+        model = GenericFakeChatModel(
+            messages=iter(
+                [
+                    AIMessage(
+                        content="answer",
+                        usage_metadata={
+                            "input_tokens": 7,
+                            "output_tokens": 3,
+                            "total_tokens": 10,
+                        },
+                    )
+                ]
+            )
+        )
+        budget = Budget(max_tokens=10)
+        config = attach_budget({"configurable": {"thread_id": "1"}}, budget)
+        self.assertIs(get_budget(config), budget)
+        self.assertEqual(config["configurable"]["thread_id"], "1")
+        self.assertIsNone(budget_exhausted(config))
+
+        model.invoke("question", config)
+
+        usage = budget.usage()
+        self.assertEqual(usage["tokens"], 10)
+        self.assertEqual(usage["llm_calls"], 1)
+        self.assertEqual(budget_exhausted(config), "tokens")
+
+    def test_cached_responses_are_not_charged(self) -> None:
+        """Test that a response served from the LLM cache is neither a call nor tokens."""
+        with tempfile.TemporaryDirectory() as directory:
+            llm_cache = SQLiteLLMCache(
+                SQLiteCache(os.path.join(directory, "llm.sqlite"))
+            )
+            message = AIMessage(
+                content="answer",
+                usage_metadata={
+                    "input_tokens": 7,
+                    "output_tokens": 3,
+                    "total_tokens": 10,
+                },
+            )
+            model = GenericFakeChatModel(messages=iter([message]), cache=llm_cache)
+            budget = Budget()
+            config = attach_budget({}, budget)
+
+            model.invoke("question", config)
+            model.invoke("question", config)
+
+            self.assertEqual(llm_cache.stats()["hits"], 1)
+            usage = budget.usage()
+            self.assertEqual(usage["tokens"], 10)
+            self.assertEqual(usage["llm_calls"], 1)
+
+    def test_restored_usage_is_charged(self) -> None:
+        """Test that a resumed run continues from what the interrupted run spent."""
+        with mock.patch("time.monotonic", return_value=100.0):
+            interrupted = Budget(max_llm_calls=5, max_seconds=30)
+            interrupted.charge_searches(2)
+            interrupted.llm_calls = 4
+            interrupted.tokens = 50
+        with mock.patch("time.monotonic", return_value=120.0):
+            usage = interrupted.usage()
+
+        with mock.patch("time.monotonic", return_value=1000.0):
+            resumed = Budget(max_llm_calls=5, max_seconds=30)
+            resumed.restore(usage)
+        with mock.patch("time.monotonic", return_value=1009.0):
+            self.assertIsNone(resumed.exhausted_reason())
+            self.assertEqual(resumed.usage()["elapsed_seconds"], 29.0)
+            self.assertEqual(resumed.usage()["tokens"], 50)
+            self.assertEqual(resumed.usage()["search_calls"], 2)
+        with mock.patch("time.monotonic", return_value=1010.0):
+            self.assertEqual(resumed.exhausted_reason(), "deadline")
+        resumed.llm_calls += 1
+        self.assertEqual(resumed.exhausted_reason(), "llm_calls")
+
+    def test_searches_are_limited(self) -> None:
+        """Test that searches are charged against the remaining search budget."""
+        budget = Budget(max_search_calls=3)
+        self.assertEqual(budget.remaining_searches(), 3)
+        budget.charge_searches(2)
+        self.assertEqual(budget.remaining_searches(), 1)
+        self.assertIsNone(budget.exhausted_reason())
+        budget.charge_searches(1)
+        self.assertEqual(budget.remaining_searches(), 0)
+        self.assertEqual(budget.exhausted_reason(), "search_calls")
+
+        self.assertIsNone(Budget().remaining_searches())
+
+    def test_deadline(self) -> None:
+        """Test that the budget runs out once its wall-clock limit has passed."""
+        with mock.patch("time.monotonic", return_value=100.0):
+            budget = Budget(max_seconds=30)
+        with mock.patch("time.monotonic", return_value=129.0):
+            self.assertIsNone(budget.exhausted_reason())
+        with mock.patch("time.monotonic", return_value=130.0):
+            self.assertEqual(budget.exhausted_reason(), "deadline")
+            self.assertEqual(budget.usage()["elapsed_seconds"], 30.0)
+
+    def test_runs_without_a_budget_are_unlimited(self) -> None:
+        """Test that nodes see no exhausted limit when no budget is attached."""
+        self.assertIsNone(get_budget({"configurable": {}}))
+        self.assertIsNone(budget_exhausted({}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import operator
+import os
+import tempfile
+import unittest
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from a2a_server.deep_research.components.blob_store import BlobStore
+from a2a_server.deep_research.components.checkpoint import SQLiteSaver
+from a2a_server.deep_research.components.metrics import REGISTRY
+from a2a_server.deep_research.components.struct import SearchResult
+
+
+class CounterState(TypedDict):
+    steps: Annotated[List[int], operator.add]
+
+
+class PageState(TypedDict):
+    pages: Annotated[List[SearchResult], operator.add]
+
+
+def build_graph():
+    builder = StateGraph(CounterState)
+    builder.add_node("first", lambda state: {"steps": [1]})
+    builder.add_node("second", lambda state: {"steps": [2]})
+    builder.add_edge(START, "first")
+    builder.add_edge("first", "second")
+    builder.add_edge("second", END)
+    return builder
+
+
+class SQLiteSaverTest(unittest.TestCase):
+    """Tests for the SQLite checkpointer."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "checkpoints.sqlite")
+        self.config = {"configurable": {"thread_id": "thread"}}
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def make_saver(self, **kwargs) -> SQLiteSaver:
+        saver = SQLiteSaver(self.path, maintenance_interval_seconds=0, **kwargs)
+        self.addCleanup(saver.close)
+        return saver
+
+    def test_state_survives_a_restart(self) -> None:
+        """Test that a new saver on the same file continues the thread."""
+        build_graph().compile(checkpointer=self.make_saver()).invoke(
+            {"steps": [0]}, self.config
+        )
+        graph = build_graph().compile(checkpointer=self.make_saver())
+        self.assertEqual(graph.get_state(self.config).values["steps"], [0, 1, 2])
+        graph.invoke({"steps": [0]}, self.config)
+        self.assertEqual(
+            graph.get_state(self.config).values["steps"], [0, 1, 2, 0, 1, 2]
+        )
+
+    def test_async_methods_match_sync_methods(self) -> None:
+        """Test that the graph runs the same through the async methods."""
+        graph = build_graph().compile(checkpointer=self.make_saver())
+
+        async def run() -> List[int]:
+            await graph.ainvoke({"steps": [0]}, self.config)
+            return (await graph.aget_state(self.config)).values["steps"]
+
+        self.assertEqual(asyncio.run(run()), [0, 1, 2])
+        self.assertEqual(len(list(graph.get_state_history(self.config))), 4)
+
+    def test_old_checkpoints_are_pruned(self) -> None:
+        """Test that only the last checkpoints of a thread are kept."""
+        saver = self.make_saver(max_checkpoints=2)
+        graph = build_graph().compile(checkpointer=saver)
+        for _ in range(3):
+            graph.invoke({"steps": [0]}, self.config)
+
+        self.assertEqual(len(list(saver.list(self.config))), 2)
+        self.assertEqual(saver.stats()["pruned_checkpoints"], 10)
+        self.assertEqual(len(graph.get_state(self.config).values["steps"]), 9)
+
+        saver.run_maintenance()
+        self.assertGreater(saver.stats()["collected_blobs"], 0)
+        self.assertEqual(len(graph.get_state(self.config).values["steps"]), 9)
+
+    def test_idle_threads_expire(self) -> None:
+        """Test that maintenance deletes threads older than the TTL."""
+        saver = self.make_saver(thread_ttl_seconds=60)
+        build_graph().compile(checkpointer=saver).invoke({"steps": [0]}, self.config)
+        saver.run_maintenance()
+        self.assertEqual(saver.stats()["threads"], 1)
+
+        saver.thread_ttl_seconds = 1e-9
+        saver.run_maintenance()
+        stats = saver.stats()
+        self.assertEqual(stats["threads"], 0)
+        self.assertEqual(stats["blobs"], 0)
+        self.assertEqual(stats["expired_threads"], 1)
+
+    def test_unreferenced_blob_store_blobs_are_deleted(self) -> None:
+        """Test that maintenance deletes the blobs no checkpoint refers to any more."""
+        store = BlobStore(os.path.join(self.directory.name, "blobs"))
+        saver = self.make_saver(
+            thread_ttl_seconds=60, blob_store=store, blob_grace_seconds=0
+        )
+        kept = store.put("kept page")
+        orphan = store.put("orphan page")
+        builder = StateGraph(PageState)
+        builder.add_node(
+            "search",
+            lambda state: {
+                "pages": [
+                    SearchResult(url="https://a.com", title="A", content_ref=kept)
+                ]
+            },
+        )
+        builder.add_edge(START, "search")
+        builder.compile(checkpointer=saver).invoke({"pages": []}, self.config)
+
+        saver.run_maintenance()
+        self.assertIn(kept, store)
+        self.assertNotIn(orphan, store)
+        self.assertEqual(store.stats()["deleted"], 1)
+
+        # Recent blobs may belong to a step that is not checkpointed yet
+        saver.blob_grace_seconds = 60
+        recent = store.put("recent page")
+        saver.run_maintenance()
+        self.assertIn(recent, store)
+
+        saver.thread_ttl_seconds = 1e-9
+        saver.blob_grace_seconds = 0
+        saver.run_maintenance()
+        self.assertNotIn(kept, store)
+        self.assertNotIn(recent, store)
+
+    def test_stats_are_exposed_as_metrics(self) -> None:
+        """Test that open savers report their stats until they are closed."""
+        saver = self.make_saver()
+        build_graph().compile(checkpointer=saver).invoke({"steps": [0]}, self.config)
+
+        lines = REGISTRY.render().splitlines()
+        self.assertIn(f'agent_checkpoint_threads{{path="{self.path}"}} 1', lines)
+        self.assertIn(
+            f'agent_checkpoint_maintenance_runs_total{{path="{self.path}"}} 0', lines
+        )
+
+        saver.close()
+        self.assertNotIn(self.path, REGISTRY.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
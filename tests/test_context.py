@@ -0,0 +1,77 @@
+import unittest
+
+from a2a_server.deep_research.components.context import (
+    estimate_tokens,
+    pack_search_results,
+    split_passages,
+)
+from a2a_server.deep_research.components.struct import (
+    Query,
+    SearchResult,
+    SearchResults,
+    Section,
+)
+
+
+class SplitPassagesTest(unittest.TestCase):
+    """Tests for splitting raw content into passages."""
+
+    def test_short_paragraphs_are_merged(self) -> None:
+        """Test that paragraphs are merged up to the passage size."""
+        passages = split_passages("One.\n\nTwo.\n\nThree.", max_chars=10)
+        self.assertEqual(passages, ["One. Two.", "Three."])
+
+    def test_long_paragraphs_are_split(self) -> None:
+        """Test that no passage is much longer than the passage size."""
+        text = " ".join(f"Sentence number {index}." for index in range(100))
+        passages = split_passages(text, max_chars=200)
+        self.assertGreater(len(passages), 1)
+        self.assertTrue(all(len(passage) <= 200 for passage in passages))
+        self.assertEqual(" ".join(passages), text)
+
+
+class PackSearchResultsTest(unittest.TestCase):
+    """Tests for packing search results into a token budget."""
+
+    def setUp(self) -> None:
+        self.section = Section(
+            section_name="Solar power",
+            sub_sections=["Efficiency of photovoltaic panels"],
+        )
+        relevant = "Photovoltaic panels convert sunlight with an efficiency near 22%."
+        filler = "The weather in the city was mild and cloudy for most of the week."
+        self.search_results = [
+            SearchResults(
+                query=Query(query="solar panel efficiency"),
+                results=[
+                    SearchResult(
+                        url="https://example.com/weather",
+                        title="Weather",
+                        raw_content="\n\n".join([filler] * 20),
+                    ),
+                    SearchResult(
+                        url="https://example.com/solar",
+                        title="Solar",
+                        raw_content=relevant,
+                    ),
+                ],
+            )
+        ]
+
+    def test_relevant_passages_are_kept_with_their_source(self) -> None:
+        """Test that the most relevant passage fills a small budget first."""
+        packed = pack_search_results(self.search_results, self.section, budget=30)
+        self.assertIn("Photovoltaic panels", packed)
+        self.assertIn("Source: Solar (https://example.com/solar)", packed)
+        self.assertIn("Query: solar panel efficiency", packed)
+        self.assertNotIn("weather", packed.lower())
+
+    def test_packed_context_fits_the_budget(self) -> None:
+        """Test that the packed passages stay within the token budget."""
+        packed = pack_search_results(self.search_results, self.section, budget=200)
+        self.assertLessEqual(estimate_tokens(packed), 250)
+        self.assertIn("Photovoltaic panels", packed)
+
+
+if __name__ == "__main__":
+    unittest.main()
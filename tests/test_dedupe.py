@@ -0,0 +1,112 @@
+import unittest
+
+from a2a_server.deep_research.components.dedupe import (
+    canonical_url,
+    exclude_search_results,
+    merge_search_results,
+    search_result_urls,
+)
+from a2a_server.deep_research.components.struct import (
+    Query,
+    SearchResult,
+    SearchResults,
+)
+
+
+def make_search_results(query: str, *pages: tuple) -> SearchResults:
+    return SearchResults(
+        query=Query(query=query),
+        results=[
+            SearchResult(url=url, title=url, raw_content=content)
+            for url, content in pages
+        ],
+    )
+
+
+class CanonicalUrlTest(unittest.TestCase):
+    """Tests for URL canonicalization."""
+
+    def test_equivalent_urls_are_equal(self) -> None:
+        """Test that case, www, fragments, tracking and slashes are ignored."""
+        self.assertEqual(
+            canonical_url("HTTPS://www.Example.com:443/page/?b=2&utm_source=x&a=1#top"),
+            canonical_url("https://example.com/page?a=1&b=2"),
+        )
+
+    def test_different_pages_are_different(self) -> None:
+        """Test that the path and meaningful parameters are kept."""
+        self.assertNotEqual(
+            canonical_url("https://example.com/page?id=1"),
+            canonical_url("https://example.com/page?id=2"),
+        )
+
+
+class MergeSearchResultsTest(unittest.TestCase):
+    """Tests for the search results reducer."""
+
+    def test_pages_are_stored_once_across_queries(self) -> None:
+        """Test that a page found by a later query is only referenced by its URL."""
+        merged = merge_search_results(
+            [make_search_results("first", ("https://example.com/a", "Page A"))],
+            [
+                make_search_results(
+                    "second",
+                    ("https://www.example.com/a/", "Page A"),
+                    ("https://example.com/b", "Page B"),
+                )
+            ],
+        )
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(len(merged[0].results), 1)
+        self.assertEqual(
+            [result.url for result in merged[1].results], ["https://example.com/b"]
+        )
+        self.assertEqual(merged[1].duplicate_urls, ["https://example.com/a"])
+
+    def test_mirrored_content_is_stored_once(self) -> None:
+        """Test that the same content under another URL is treated as a duplicate."""
+        merged = merge_search_results(
+            [make_search_results("first", ("https://example.com/a", "Same  text"))],
+            [make_search_results("first", ("https://mirror.org/a", "same text"))],
+        )
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(len(merged[0].results), 1)
+        self.assertEqual(merged[0].duplicate_urls, ["https://mirror.org/a"])
+
+    def test_merging_stored_results_changes_nothing(self) -> None:
+        """Test that the reducer is idempotent."""
+        stored = merge_search_results(
+            [],
+            [
+                make_search_results("first", ("https://example.com/a", "Page A")),
+                make_search_results("second", ("https://example.com/a", "Page A")),
+            ],
+        )
+        self.assertEqual(merge_search_results(stored, stored), stored)
+
+
+class ExcludeSearchResultsTest(unittest.TestCase):
+    """Tests for selecting the pages that were not accumulated yet."""
+
+    def test_only_new_pages_are_kept(self) -> None:
+        """Test that pages with an excluded URL and empty queries are dropped."""
+        search_results = [
+            make_search_results("first", ("https://example.com/a", "Page A")),
+            make_search_results(
+                "second",
+                ("https://example.com/b", "Page B"),
+                ("https://example.com/c", "Page C"),
+            ),
+        ]
+        remaining = exclude_search_results(
+            search_results,
+            set(search_result_urls(search_results[:1])) | {"https://example.com/b"},
+        )
+        self.assertEqual(len(remaining), 1)
+        self.assertEqual(
+            [result.url for result in remaining[0].results], ["https://example.com/c"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
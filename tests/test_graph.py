@@ -0,0 +1,423 @@
+import asyncio
+import tempfile
+import unittest
+from typing import Any, Dict, List, Set, Tuple
+from unittest import mock
+from uuid import UUID
+
+from fakes import FakeChatModel, FakeSearchClient, make_text
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from a2a_server.deep_research.components import artifact_store
+from a2a_server.deep_research.components.artifact_store import ArtifactStore
+from a2a_server.deep_research.components.graph import builder
+from a2a_server.deep_research.components.llm import set_chat_model_factory
+from a2a_server.deep_research.components.nodes import (
+    query_generator_node,
+    reduce_section_summaries,
+    route_after_section_knowledge,
+    route_section_research,
+)
+from a2a_server.deep_research.components.passage_index import get_passage_index
+from a2a_server.deep_research.components.search import set_search_client
+from a2a_server.deep_research.components.struct import SectionContent, SummarizedSection
+
+
+class NodeRunRecorder(BaseCallbackHandler):
+    """
+    Records the name of every graph node run, in the order they start.
+
+    The runs are also kept with the namespace of their graph and their step, so
+    nodes of one section's research agent can be told apart from the others, and the
+    prompts of chat model calls are kept with the node that made them. The most
+    research agents running at the same time is kept in `max_research_agents`.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.nodes: List[str] = []
+        self.steps: List[Tuple[str, str, int]] = []
+        self.prompts: List[Tuple[str, str]] = []
+        self.research_agents: Set[UUID] = set()
+        self.max_research_agents = 0
+
+    def on_chain_start(
+        self,
+        serialized: Any,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Dict[str, Any] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self.nodes.append(node)
+            self.steps.append(
+                (metadata.get("checkpoint_ns", ""), node, metadata["langgraph_step"])
+            )
+            if node == "research_agent":
+                self.research_agents.add(run_id)
+                self.max_research_agents = max(
+                    self.max_research_agents, len(self.research_agents)
+                )
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.research_agents.discard(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.research_agents.discard(run_id)
+
+    def on_chat_model_start(
+        self,
+        serialized: Any,
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: Dict[str, Any] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        prompt = "\n".join(str(message.content) for message in messages[0])
+        self.prompts.append((node, prompt))
+
+    def first_steps(self, node: str) -> Dict[str, int]:
+        """Returns the step of the first run of `node` in each graph namespace."""
+        steps = {}
+        for namespace, run_node, step in self.steps:
+            if run_node == node:
+                steps.setdefault(namespace, step)
+        return steps
+
+
+class FailingBatchKnowledgeChatModel(FakeChatModel):
+    """A fake chat model failing the second section's call in the knowledge batch."""
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ):
+        node = run_manager.metadata.get("langgraph_node") if run_manager else None
+        if node == "section_knowledge_batch" and any(
+            "Section 2 " in str(message.content) for message in messages
+        ):
+            raise ConnectionError("connection reset")
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+class RepeatedQueryChatModel(FakeChatModel):
+    """A fake chat model generating the same search query for every section."""
+
+    def _structured_output(self, name: str, seed: str) -> Dict[str, Any]:
+        if name == "Queries":
+            return {"queries": [{"query": "shared solar query"}]}
+        return super()._structured_output(name, seed)
+
+
+class GraphTestCase(unittest.TestCase):
+    """Runs the research graph offline on the benchmark's fake model and search."""
+
+    sections = 3
+    chat_model = FakeChatModel
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = ArtifactStore(directory.name)
+        self.addCleanup(store.close)
+        patcher = mock.patch.object(artifact_store, "_artifact_store", store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.search_client = FakeSearchClient(latency_seconds=0, page_chars=2000)
+        set_search_client(self.search_client)
+        self.addCleanup(set_search_client, None)
+        set_chat_model_factory(self.make_chat_model)
+        self.addCleanup(set_chat_model_factory, None)
+
+        self.graph = builder.compile(checkpointer=MemorySaver())
+        self.recorder = NodeRunRecorder()
+
+    def make_chat_model(self, model: str, temperature: float, **kwargs: Any):
+        return self.chat_model(
+            latency_seconds=0,
+            tokens_per_second=1e9,
+            output_tokens=50,
+            sections=self.sections,
+            queries=1,
+            **kwargs,
+        )
+
+    def make_config(self, thread_id: str = "test", **configurable: Any) -> dict:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "max_queries": 1,
+                "search_depth": 1,
+                "num_reflections": 1,
+                "llm_cache_enabled": False,
+                "search_cache_enabled": False,
+                "blob_store_enabled": False,
+                "llm_requests_per_minute": 0,
+                "llm_tokens_per_minute": 0,
+                "search_requests_per_minute": 0,
+                **configurable,
+            },
+            "callbacks": [self.recorder],
+        }
+
+    def run_report(self, config: dict, topic: str = "Solar power") -> dict:
+        """Runs a report to completion and returns the final state."""
+
+        async def run() -> dict:
+            await self.graph.ainvoke({"messages": [("user", topic)]}, config)
+            return (await self.graph.aget_state(config)).values
+
+        state = asyncio.run(run())
+        self.assertEqual(state["structured_response"].status, "completed")
+        return state
+
+
+class GraphTest(GraphTestCase):
+    """Tests for running the report's sections serially and in parallel."""
+
+    def test_sections_are_finalized_once_in_order(self) -> None:
+        """Test that every mode runs the finalizer once, with sections in order."""
+        for max_parallel_sections in (1, 0, 2):
+            with self.subTest(max_parallel_sections=max_parallel_sections):
+                self.recorder.nodes.clear()
+                state = self.run_report(
+                    self.make_config(
+                        f"sections-{max_parallel_sections}",
+                        max_parallel_sections=max_parallel_sections,
+                    )
+                )
+
+                self.assertEqual(self.recorder.nodes.count("finalizer"), 1)
+                self.assertEqual(
+                    self.recorder.nodes.count("final_section_formatter"),
+                    self.sections,
+                )
+                sections = sorted(
+                    state["final_section_content"],
+                    key=lambda section_content: section_content.section_index,
+                )
+                self.assertEqual(
+                    [section.section_index for section in sections],
+                    list(range(self.sections)),
+                )
+                positions = [
+                    state["final_report_content"].index(section.content)
+                    for section in sections
+                ]
+                self.assertEqual(positions, sorted(positions))
+
+    def test_parallel_sections_are_bounded(self) -> None:
+        """Test that at most `max_parallel_sections` sections are researched at once."""
+        for max_parallel_sections, expected in ((1, 1), (0, self.sections), (2, 2)):
+            with self.subTest(max_parallel_sections=max_parallel_sections):
+                self.recorder.max_research_agents = 0
+                self.run_report(
+                    self.make_config(
+                        f"bounded-{max_parallel_sections}",
+                        max_parallel_sections=max_parallel_sections,
+                    )
+                )
+
+                self.assertEqual(self.recorder.max_research_agents, expected)
+                self.assertFalse(self.recorder.research_agents)
+                self.assertEqual(
+                    self.recorder.nodes.count("research_agent"), self.sections
+                )
+                self.recorder.nodes.clear()
+
+    def test_new_report_does_not_retrieve_earlier_passages(self) -> None:
+        """Test that a second report on a thread starts with an empty passage index."""
+        config = self.make_config("two-reports")
+        self.run_report(config, "Solar power")
+        first_urls = set(get_passage_index("two-reports").urls)
+        self.assertTrue(first_urls)
+
+        self.run_report(config, "Wind power")
+        second_urls = get_passage_index("two-reports").urls
+        self.assertTrue(second_urls)
+        self.assertTrue(first_urls.isdisjoint(second_urls))
+
+    def test_queries_searched_by_earlier_sections_are_not_repeated(self) -> None:
+        """Test that the report's searched queries reach and filter later sections."""
+        state = self.run_report(self.make_config("queries"))
+        self.assertEqual(len(state["searched_queries"]), self.search_client.calls)
+
+        section = {"section": state["sections"][1]}
+        first = asyncio.run(query_generator_node(dict(section), self.make_config()))
+        self.assertTrue(first["generated_queries"])
+        second = asyncio.run(
+            query_generator_node(
+                {**section, "task_searched_queries": first["generated_queries"]},
+                self.make_config(),
+            )
+        )
+        self.assertEqual(second["generated_queries"], [])
+
+        # A new report on the thread starts without the earlier report's queries
+        state = self.run_report(self.make_config("queries"), "Wind power")
+        self.assertEqual(len(state["searched_queries"]), self.sections)
+
+    def test_repeated_queries_reuse_earlier_search_results(self) -> None:
+        """Test that a section gets the content of a query an earlier section ran."""
+        self.chat_model = RepeatedQueryChatModel
+        # Without passage retrieval nothing else brings back the earlier pages
+        self.run_report(self.make_config("repeated", passage_top_k=0))
+
+        self.assertEqual(self.search_client.calls, 1)
+        page = make_text("shared solar query|0|0", 120)[:200]
+        prompts = [
+            prompt
+            for node, prompt in self.recorder.prompts
+            if node == "result_accumulator"
+        ]
+        self.assertGreaterEqual(len(prompts), self.sections)
+        for prompt in prompts:
+            self.assertIn(page, prompt)
+
+
+class SectionKnowledgeTest(GraphTestCase):
+    """Tests for generating the internal knowledge of each section."""
+
+    def test_routes_follow_the_parallel_flag(self) -> None:
+        """Test that the first queries only wait for the knowledge when not parallel."""
+        for parallel, first, after in (
+            (True, ["section_knowledge", "query_generator"], []),
+            (False, ["section_knowledge"], ["query_generator"]),
+        ):
+            with self.subTest(parallel_section_knowledge=parallel):
+                config = self.make_config(parallel_section_knowledge=parallel)
+                self.assertEqual(route_section_research({}, config), first)
+                self.assertEqual(route_after_section_knowledge({}, config), after)
+                # Knowledge generated up front goes straight to query generation
+                self.assertEqual(
+                    route_section_research({"knowledge": "Known"}, config),
+                    ["query_generator"],
+                )
+
+    def test_knowledge_runs_alongside_the_first_queries(self) -> None:
+        """Test that knowledge and first queries share a step only when parallel."""
+        for parallel in (True, False):
+            with self.subTest(parallel_section_knowledge=parallel):
+                self.recorder.steps.clear()
+                self.run_report(
+                    self.make_config(
+                        f"knowledge-{parallel}",
+                        max_parallel_sections=1,
+                        parallel_section_knowledge=parallel,
+                    )
+                )
+
+                knowledge_steps = self.recorder.first_steps("section_knowledge")
+                query_steps = self.recorder.first_steps("query_generator")
+                self.assertEqual(len(knowledge_steps), self.sections)
+                self.assertEqual(query_steps.keys(), knowledge_steps.keys())
+                for namespace, step in knowledge_steps.items():
+                    self.assertEqual(
+                        query_steps[namespace], step if parallel else step + 1
+                    )
+
+
+class BatchSectionKnowledgeTest(GraphTestCase):
+    """Tests for generating the knowledge of every section before the research."""
+
+    def test_research_agents_reuse_the_batch_knowledge(self) -> None:
+        """Test that no research agent generates knowledge the batch already has."""
+        state = self.run_report(self.make_config("batch", batch_section_knowledge=True))
+
+        self.assertEqual(self.recorder.nodes.count("section_knowledge_batch"), 1)
+        self.assertEqual(self.recorder.nodes.count("section_knowledge"), 0)
+        self.assertEqual(set(state["section_knowledge"]), set(range(self.sections)))
+
+    def test_failed_batch_calls_fall_back_to_the_research_agent(self) -> None:
+        """Test that a section whose batch call failed generates its own knowledge."""
+        self.chat_model = FailingBatchKnowledgeChatModel
+        state = self.run_report(
+            self.make_config("batch-failure", batch_section_knowledge=True)
+        )
+
+        self.assertEqual(set(state["section_knowledge"]), {0, 2})
+        self.assertEqual(self.recorder.nodes.count("section_knowledge"), 1)
+        self.assertEqual(
+            self.recorder.nodes.count("final_section_formatter"), self.sections
+        )
+
+
+class MapReduceFinalizerTest(GraphTestCase):
+    """Tests for writing the conclusion from the section summaries."""
+
+    def test_summaries_are_matched_by_section_index(self) -> None:
+        """Test that each summary stands in for its own section when one is missing."""
+        sections, references = reduce_section_summaries(
+            {
+                "section_summaries": [
+                    SummarizedSection(
+                        section_index=2, summary="Third", references=["B", "A"]
+                    ),
+                    SummarizedSection(
+                        section_index=0, summary="First", references=["A"]
+                    ),
+                ]
+            },
+            [
+                SectionContent(section_index=0, content="First section"),
+                SectionContent(section_index=1, content="Second section"),
+                SectionContent(section_index=2, content="Third section"),
+            ],
+        )
+        self.assertEqual(sections, ["First", "Second section", "Third"])
+        self.assertEqual(references, ["A", "B"])
+
+        # A section skipped by the budget leaves no gap in the matching
+        sections, _ = reduce_section_summaries(
+            {
+                "section_summaries": [
+                    SummarizedSection(section_index=2, summary="Third", references=[])
+                ]
+            },
+            [
+                SectionContent(section_index=0, content="First section"),
+                SectionContent(section_index=2, content="Third section"),
+            ],
+        )
+        self.assertEqual(sections, ["First section", "Third"])
+
+    def test_finalizer_only_reduces_the_current_report(self) -> None:
+        """Test that a second report on a thread concludes from its own summaries."""
+        config = self.make_config(
+            "map-reduce", map_reduce_finalizer=True, max_parallel_sections=0
+        )
+        first = self.run_report(config, "Solar power")
+        self.recorder.prompts.clear()
+        second = self.run_report(config, "Wind power")
+
+        for state in (first, second):
+            self.assertEqual(len(state["final_section_content"]), self.sections)
+            self.assertEqual(
+                sorted(summary.section_index for summary in state["section_summaries"]),
+                list(range(self.sections)),
+            )
+
+        (prompt,) = [
+            prompt for node, prompt in self.recorder.prompts if node == "finalizer"
+        ]
+        for summary in second["section_summaries"]:
+            self.assertIn(summary.summary, prompt)
+        for summary in first["section_summaries"]:
+            self.assertNotIn(summary.summary, prompt)
+        for section_content in second["final_section_content"]:
+            self.assertNotIn(section_content.content, prompt)
+            self.assertIn(section_content.content, second["final_report_content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
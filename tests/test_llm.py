@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from a2a_server.deep_research.components import llm
+from a2a_server.deep_research.components.configuration import Configuration
+
+
+def create_fake_chat_model(model: str, temperature: float, **kwargs):
+    return GenericFakeChatModel(
+        messages=iter([]), metadata={"temperature": temperature}
+    )
+
+
+class LLMRegistryTest(unittest.TestCase):
+    """Tests for the shared chat model and chain registry."""
+
+    def setUp(self) -> None:
+        patcher = mock.patch.object(llm, "create_chat_model", create_fake_chat_model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(llm._chat_models.clear)
+        self.addCleanup(llm._chains.clear)
+        self.prompt = ChatPromptTemplate.from_messages([("human", "{topic}")])
+
+    def test_clients_are_shared_per_model_and_temperature(self) -> None:
+        """Test that one client is built per temperature and then reused."""
+        configurable = Configuration(temperature=0.2, llm_cache_enabled=False)
+        first = llm.get_llm(configurable, "query_generator")
+        self.assertIs(llm.get_llm(configurable, "reflection"), first)
+        self.assertEqual(first.metadata["temperature"], 0.2)
+
+        warmer = llm.get_llm(
+            Configuration(temperature=0.9, llm_cache_enabled=False), "reflection"
+        )
+        self.assertIsNot(warmer, first)
+        self.assertEqual(warmer.metadata["temperature"], 0.9)
+
+    def test_chains_are_built_once(self) -> None:
+        """Test that the same node and prompt reuse the composed chain."""
+        configurable = Configuration(llm_cache_enabled=False)
+        chain = llm.get_chain(configurable, "section_knowledge", self.prompt)
+        self.assertIs(
+            llm.get_chain(configurable, "section_knowledge", self.prompt), chain
+        )
+
+        other_prompt = ChatPromptTemplate.from_messages([("human", "{section}")])
+        self.assertIsNot(
+            llm.get_chain(configurable, "section_knowledge", other_prompt), chain
+        )
+
+    def test_chat_model_factory_can_be_replaced(self) -> None:
+        """Test that a replaced factory builds new clients until it is reset."""
+        configurable = Configuration(llm_cache_enabled=False)
+        default = llm.get_llm(configurable, "reflection")
+
+        llm.set_chat_model_factory(
+            lambda model, temperature, **kwargs: GenericFakeChatModel(
+                messages=iter([]), metadata={"factory": "replaced"}
+            )
+        )
+        self.addCleanup(llm.set_chat_model_factory, None)
+        replaced = llm.get_llm(configurable, "reflection")
+        self.assertEqual(replaced.metadata, {"factory": "replaced"})
+
+        llm.set_chat_model_factory(None)
+        self.assertIsNot(llm.get_llm(configurable, "reflection"), default)
+        self.assertEqual(
+            llm.get_llm(configurable, "reflection").metadata["temperature"],
+            configurable.temperature,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
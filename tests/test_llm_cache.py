@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers.openai_tools import PydanticToolsParser
+
+from a2a_server.deep_research.components.cache import SQLiteCache
+from a2a_server.deep_research.components.llm_cache import SQLiteLLMCache
+from a2a_server.deep_research.components.struct import Queries, Query
+
+
+class SQLiteLLMCacheTest(unittest.TestCase):
+    """Tests for the exact-match LLM response cache."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.llm_cache = SQLiteLLMCache(
+            SQLiteCache(os.path.join(self.directory.name, "llm.sqlite"))
+        )
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_repeated_prompt_is_served_from_cache(self) -> None:
+        """Test that the model is only called once for the same prompt."""
+        model = GenericFakeChatModel(
+            messages=iter([AIMessage(content="first")]), cache=self.llm_cache
+        )
+        self.assertEqual(model.invoke("hello").content, "first")
+        self.assertEqual(model.invoke("hello").content, "first")
+        self.assertEqual(self.llm_cache.stats()["hits"], 1)
+
+    def test_different_prompt_is_a_miss(self) -> None:
+        """Test that a different prompt reaches the model."""
+        model = GenericFakeChatModel(
+            messages=iter([AIMessage(content="first"), AIMessage(content="second")]),
+            cache=self.llm_cache,
+        )
+        model.invoke("hello")
+        self.assertEqual(model.invoke("goodbye").content, "second")
+
+    def test_structured_output_round_trips(self) -> None:
+        """Test that cached tool calls parse back into the same pydantic objects."""
+        message = AIMessage(
+            content="",
+            tool_calls=[
+                {
+                    "name": "Queries",
+                    "args": {"queries": [{"query": "langgraph"}]},
+                    "id": "call",
+                }
+            ],
+            usage_metadata={"input_tokens": 1, "output_tokens": 1, "total_tokens": 2},
+        )
+        model = GenericFakeChatModel(messages=iter([message]), cache=self.llm_cache)
+        chain = model | PydanticToolsParser(tools=[Queries], first_tool_only=True)
+
+        first = chain.invoke("queries please")
+        second = chain.invoke("queries please")
+        self.assertIsInstance(second, Queries)
+        self.assertEqual(second, first)
+        self.assertEqual(second.queries, [Query(query="langgraph")])
+
+    def test_hits_report_no_token_usage(self) -> None:
+        """Test that cached messages do not carry the original token usage."""
+        message = AIMessage(
+            content="first",
+            usage_metadata={"input_tokens": 1, "output_tokens": 1, "total_tokens": 2},
+        )
+        model = GenericFakeChatModel(messages=iter([message]), cache=self.llm_cache)
+        model.invoke("hello")
+        usage_metadata = model.invoke("hello").usage_metadata or {}
+        self.assertNotIn("total_tokens", usage_metadata)
+
+
+if __name__ == "__main__":
+    unittest.main()
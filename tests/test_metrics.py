@@ -0,0 +1,144 @@
+import asyncio
+import importlib.util
+import unittest
+from typing import List, TypedDict
+from unittest import mock
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+
+from a2a_server.deep_research.components import metrics
+from a2a_server.deep_research.components.metrics import (
+    MetricsCallbackHandler,
+    MetricsRegistry,
+    handle_metrics_endpoint,
+    stats_collector,
+)
+
+
+class MessagesState(TypedDict):
+    messages: List[str]
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    """Tests for rendering metrics in the Prometheus text format."""
+
+    def test_counters_and_histograms_are_rendered(self) -> None:
+        """Test that samples are rendered with escaped labels and cumulative buckets."""
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Calls", ["node"])
+        histogram = registry.histogram("duration_seconds", "Duration", buckets=[1, 5])
+        counter.inc('say "hi"')
+        counter.inc('say "hi"', amount=2)
+        histogram.observe(0.5)
+        histogram.observe(3)
+        histogram.observe(10)
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE calls_total counter", lines)
+        self.assertIn('calls_total{node="say \\"hi\\""} 3', lines)
+        self.assertIn("# TYPE duration_seconds histogram", lines)
+        self.assertIn('duration_seconds_bucket{le="1"} 1', lines)
+        self.assertIn('duration_seconds_bucket{le="5"} 2', lines)
+        self.assertIn('duration_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("duration_seconds_sum 13.5", lines)
+        self.assertIn("duration_seconds_count 3", lines)
+
+    def test_collectors_are_read_when_rendering(self) -> None:
+        """Test that component stats are only read when the metrics are rendered."""
+        registry = MetricsRegistry()
+        stats = {"hits": 0, "entries": 0}
+        registry.add_collector(
+            stats_collector(
+                "cache",
+                ["path"],
+                lambda: {("search.sqlite",): dict(stats)},
+                {"hits": ("counter", "Hits"), "entries": ("gauge", "Entries")},
+            )
+        )
+        stats.update(hits=4, entries=2)
+
+        lines = registry.render().splitlines()
+        self.assertIn('cache_hits_total{path="search.sqlite"} 4', lines)
+        self.assertIn("# TYPE cache_entries gauge", lines)
+        self.assertIn('cache_entries{path="search.sqlite"} 2', lines)
+
+
+class MetricsCallbackHandlerTest(unittest.TestCase):
+    """Tests for recording node and model metrics from graph callbacks."""
+
+    def test_nodes_and_model_calls_are_recorded(self) -> None:
+        """Test that node runs are timed and model tokens attributed to the node."""
+        model = GenericFakeChatModel(
+            messages=iter(
+                [
+                    AIMessage(
+                        content="answer",
+                        usage_metadata={
+                            "input_tokens": 7,
+                            "output_tokens": 3,
+                            "total_tokens": 10,
+                        },
+                    )
+                ]
+            )
+        )
+
+        def ask(state: MessagesState) -> dict:
+            return {"messages": [model.invoke(state["messages"][0]).content]}
+
+        def fail(state: MessagesState) -> dict:
+            raise ValueError("failed")
+
+        builder = StateGraph(MessagesState)
+        builder.add_node("metrics_test_ask", ask)
+        builder.add_node("metrics_test_fail", fail)
+        builder.add_edge(START, "metrics_test_ask")
+        builder.add_edge("metrics_test_ask", "metrics_test_fail")
+        builder.add_edge("metrics_test_fail", END)
+
+        handler = MetricsCallbackHandler()
+        with self.assertRaises(ValueError):
+            builder.compile().invoke(
+                {"messages": ["question"]}, {"callbacks": [handler]}
+            )
+
+        lines = metrics.REGISTRY.render().splitlines()
+        self.assertIn(
+            'agent_node_duration_seconds_count{node="metrics_test_ask"} 1', lines
+        )
+        self.assertIn(
+            'agent_node_duration_seconds_count{node="metrics_test_fail"} 1', lines
+        )
+        self.assertIn('agent_node_errors_total{node="metrics_test_fail"} 1', lines)
+        self.assertIn(
+            'agent_llm_duration_seconds_count{node="metrics_test_ask"} 1', lines
+        )
+        self.assertIn(
+            'agent_llm_tokens_total{node="metrics_test_ask",type="input"} 7', lines
+        )
+        self.assertIn(
+            'agent_llm_tokens_total{node="metrics_test_ask",type="output"} 3', lines
+        )
+        self.assertEqual(handler.runs, {})
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("starlette"),
+    "The A2A server dependencies are not installed",
+)
+class MetricsEndpointTest(unittest.TestCase):
+    """Tests for the /metrics endpoint shared by the agent servers."""
+
+    def test_registry_is_served_as_prometheus_text(self) -> None:
+        """Test that the endpoint returns the rendered process registry."""
+        response = asyncio.run(handle_metrics_endpoint(mock.Mock()))
+        self.assertEqual(
+            response.media_type, "text/plain; version=0.0.4; charset=utf-8"
+        )
+        self.assertIn(b"# TYPE agent_node_errors_total counter", response.body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from a2a_server.deep_research.components.passage_index import (
+    BM25Index,
+    get_passage_index,
+    reset_passage_index,
+)
+from a2a_server.deep_research.components.struct import (
+    Query,
+    SearchResult,
+    SearchResults,
+    Section,
+)
+
+
+def make_search_results(query: str, *pages: tuple) -> SearchResults:
+    return SearchResults(
+        query=Query(query=query),
+        results=[
+            SearchResult(url=url, title=url, raw_content=content)
+            for url, content in pages
+        ],
+    )
+
+
+class BM25IndexTest(unittest.TestCase):
+    """Tests for the BM25 passage index."""
+
+    def setUp(self) -> None:
+        self.index = BM25Index()
+        self.index.add_search_results(
+            [
+                make_search_results(
+                    "energy",
+                    (
+                        "https://example.com/solar",
+                        "Solar panels turn sunlight into power.",
+                    ),
+                    ("https://example.com/wind", "Wind turbines turn wind into power."),
+                    (
+                        "https://example.com/food",
+                        "Bread is baked from flour and water.",
+                    ),
+                )
+            ]
+        )
+
+    def test_search_ranks_matching_passages_first(self) -> None:
+        """Test that the passage sharing the rarest terms ranks first."""
+        results = self.index.search("solar sunlight", k=2)
+        self.assertEqual(results[0][0].url, "https://example.com/solar")
+        self.assertEqual(len(results), 1)
+
+    def test_pages_are_indexed_once(self) -> None:
+        """Test that adding the same pages again does not grow the index."""
+        added = self.index.add_search_results(
+            [make_search_results("other", ("https://www.example.com/solar/", "Solar"))]
+        )
+        self.assertEqual(added, 0)
+        self.assertEqual(len(self.index), 3)
+
+    def test_search_section_queries_each_sub_section(self) -> None:
+        """Test that every sub-section contributes its own top passages."""
+        section = Section(
+            section_name="Renewables", sub_sections=["Solar panels", "Wind turbines"]
+        )
+        urls = {passage.url for passage, _ in self.index.search_section(section, k=1)}
+        self.assertEqual(
+            urls, {"https://example.com/solar", "https://example.com/wind"}
+        )
+
+
+class GetPassageIndexTest(unittest.TestCase):
+    """Tests for the per-task index registry."""
+
+    def test_indexes_are_kept_per_thread(self) -> None:
+        """Test that each thread id gets its own index."""
+        self.assertIs(get_passage_index("thread-a"), get_passage_index("thread-a"))
+        self.assertIsNot(get_passage_index("thread-a"), get_passage_index("thread-b"))
+
+    def test_reset_drops_the_thread_index(self) -> None:
+        """Test that a reset thread gets a new, empty index."""
+        index = get_passage_index("thread-c")
+        index.add_search_results(
+            [make_search_results("solar", ("https://a.example", "Solar cells"))]
+        )
+        reset_passage_index("thread-c")
+        self.assertIsNot(get_passage_index("thread-c"), index)
+        self.assertEqual(len(get_passage_index("thread-c")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from a2a_server.deep_research.components import query_filter
+from a2a_server.deep_research.components.query_filter import (
+    filter_queries,
+    merge_queries,
+)
+from a2a_server.deep_research.components.struct import Query
+
+
+def make_queries(*queries: str) -> list:
+    return [Query(query=query) for query in queries]
+
+
+class FilterQueriesTest(unittest.TestCase):
+    """Tests for near-duplicate query suppression."""
+
+    def test_paraphrases_of_searched_queries_are_suppressed(self) -> None:
+        """Test that reordered and pluralized queries are not searched again."""
+        kept, suppressed = filter_queries(
+            make_queries("Solar energy benefits", "history of solar energy"),
+            make_queries("benefit of solar energy"),
+            threshold=0.7,
+        )
+        self.assertEqual([query.query for query in kept], ["history of solar energy"])
+        self.assertEqual(
+            [query.query for query in suppressed], ["Solar energy benefits"]
+        )
+
+    def test_duplicates_within_a_batch_are_suppressed(self) -> None:
+        """Test that a batch does not search the same query twice."""
+        kept, suppressed = filter_queries(
+            make_queries("wind power cost", "Wind power costs!"), [], threshold=0.7
+        )
+        self.assertEqual(len(kept), 1)
+        self.assertEqual(len(suppressed), 1)
+
+    def test_zero_threshold_only_drops_exact_repeats(self) -> None:
+        """Test that a threshold of 0 disables the similarity check."""
+        kept, _ = filter_queries(
+            make_queries("solar energy benefits", "Benefits of solar energy?"),
+            make_queries("benefits of solar energy"),
+            threshold=0,
+        )
+        self.assertEqual([query.query for query in kept], ["solar energy benefits"])
+
+    def test_suppressed_queries_are_counted(self) -> None:
+        """Test that the process-wide counters include suppressed queries."""
+        before = query_filter.stats()
+        filter_queries(make_queries("a query", "a query"), [], threshold=0.7)
+        after = query_filter.stats()
+        self.assertEqual(after["checked_queries"] - before["checked_queries"], 2)
+        self.assertEqual(after["suppressed_queries"] - before["suppressed_queries"], 1)
+
+
+class MergeQueriesTest(unittest.TestCase):
+    """Tests for the searched queries reducer."""
+
+    def test_queries_are_kept_once_in_order(self) -> None:
+        """Test that repeated queries are merged and the order is kept."""
+        merged = merge_queries(
+            make_queries("first", "second"), make_queries("Second?", "third")
+        )
+        self.assertEqual(
+            [query.query for query in merged], ["first", "second", "third"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
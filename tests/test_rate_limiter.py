@@ -0,0 +1,92 @@
+import asyncio
+import time
+import unittest
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from a2a_server.deep_research.components.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    TokenUsageCallbackHandler,
+    get_rate_limiter,
+)
+
+
+class TokenBucketTest(unittest.TestCase):
+    """Tests for the TokenBucket reservation logic."""
+
+    def test_reserve_within_capacity_does_not_wait(self) -> None:
+        """Test that reservations within the bucket level return no wait."""
+        bucket = TokenBucket(capacity=10, refill_per_second=1)
+        for _ in range(10):
+            self.assertEqual(bucket.reserve(1), 0.0)
+
+    def test_reserve_beyond_capacity_waits_for_refill(self) -> None:
+        """Test that an exhausted bucket reports the time needed to refill."""
+        bucket = TokenBucket(capacity=2, refill_per_second=1)
+        bucket.reserve(2)
+        self.assertAlmostEqual(bucket.reserve(1), 1.0, places=1)
+        self.assertAlmostEqual(bucket.reserve(1), 2.0, places=1)
+
+
+class RateLimiterTest(unittest.TestCase):
+    """Tests for RateLimiter and the process-wide registry."""
+
+    def test_disabled_limits_never_wait(self) -> None:
+        """Test that limits of 0 disable the buckets."""
+        rate_limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+        for _ in range(1000):
+            rate_limiter.charge(10_000)
+            self.assertEqual(rate_limiter.reserve(), 0.0)
+
+    def test_token_debt_delays_next_request(self) -> None:
+        """Test that charged tokens beyond the quota delay the next request."""
+        rate_limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=60)
+        self.assertEqual(rate_limiter.reserve(), 0.0)
+        rate_limiter.charge(66)
+        self.assertAlmostEqual(rate_limiter.reserve(), 6.0, places=1)
+        self.assertEqual(rate_limiter.waits, 1)
+
+    def test_non_blocking_acquire_fails_when_exhausted(self) -> None:
+        """Test that a non-blocking acquire does not take an exhausted request."""
+        rate_limiter = RateLimiter(requests_per_minute=1)
+        self.assertTrue(rate_limiter.acquire(blocking=False))
+        self.assertFalse(rate_limiter.acquire(blocking=False))
+
+    def test_aacquire_waits_on_event_loop(self) -> None:
+        """Test that async acquisition sleeps only once the quota is used up."""
+        rate_limiter = RateLimiter(requests_per_minute=600)
+        for _ in range(600):
+            rate_limiter.reserve()
+
+        start = time.monotonic()
+        asyncio.run(rate_limiter.aacquire())
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_usage_callback_charges_total_tokens(self) -> None:
+        """Test that the callback charges the tokens reported by a model call."""
+        rate_limiter = RateLimiter(tokens_per_minute=100)
+        message = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": 80,
+                "output_tokens": 40,
+                "total_tokens": 120,
+            },
+        )
+        TokenUsageCallbackHandler(rate_limiter).on_llm_end(
+            LLMResult(generations=[[ChatGeneration(message=message)]])
+        )
+        self.assertLess(rate_limiter.tokens.level, 0)
+
+    def test_registry_shares_limiter_per_provider(self) -> None:
+        """Test that the registry returns the same limiter and applies new limits."""
+        rate_limiter = get_rate_limiter("test-provider", requests_per_minute=10)
+        same = get_rate_limiter("test-provider", requests_per_minute=20)
+        self.assertIs(rate_limiter, same)
+        self.assertEqual(same.requests.capacity, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
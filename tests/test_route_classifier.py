@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+from langchain_core.messages import AIMessage
+
+from a2a_server.deep_research.components import route_classifier
+from a2a_server.deep_research.components.route_classifier import (
+    RouteDecisionTable,
+    classify_route,
+    is_approval,
+    presents_structure,
+    record_route,
+)
+
+STRUCTURE = "Here is the structure:\n1. Introduction\n2. Early cells\n3. Costs\nOk?"
+
+
+def make_conversation(*replies: str, structure: str = STRUCTURE) -> list:
+    messages = [("user", "The history of solar power")]
+    for reply in replies:
+        messages += [AIMessage(content=structure), ("user", reply)]
+    return messages + [AIMessage(content=structure)]
+
+
+class RouteClassifierTest(unittest.TestCase):
+    """Tests for routing replies to the report structure without the LLM."""
+
+    def setUp(self) -> None:
+        patcher = mock.patch.object(route_classifier, "_table", RouteDecisionTable())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_approvals(self) -> None:
+        """Test that only replies made of approval words are approvals."""
+        for reply in (
+            "continue",
+            "Looks good, go ahead!",
+            "LGTM",
+            "Sounds good, thanks",
+        ):
+            self.assertTrue(is_approval(reply), reply)
+        for reply in (
+            "",
+            "no",
+            "looks good but add costs",
+            "go ahead with part 2",
+            "that's the report to do",
+        ):
+            self.assertFalse(is_approval(reply), reply)
+
+    def test_structures(self) -> None:
+        """Test that numbered lines and headings are a structure, questions not."""
+        self.assertTrue(presents_structure(STRUCTURE))
+        self.assertTrue(presents_structure("## Introduction\n## Costs\n## Outlook"))
+        self.assertTrue(presents_structure("**1. Intro**\n2.1 Cells\n2.2 Panels"))
+        self.assertFalse(presents_structure("Who is the report for?"))
+        self.assertFalse(
+            presents_structure(
+                "1. Who is the report for?\n2. How long should it be?\n"
+                "3. Which period should it cover?"
+            )
+        )
+
+    def test_approval_is_routed_to_research(self) -> None:
+        """Test that an approval skips the LLM but the opening topic never does."""
+        self.assertEqual(
+            classify_route(make_conversation("yes, proceed")), "do_research"
+        )
+        self.assertIsNone(classify_route([("user", "ok")]))
+        self.assertIsNone(classify_route(make_conversation("add a section on costs")))
+
+    def test_approval_needs_a_structure(self) -> None:
+        """Test that agreeing to a question instead of a structure needs the LLM."""
+        question = "Should the report focus on residential or industrial solar power?"
+        self.assertIsNone(classify_route(make_conversation("yes", structure=question)))
+
+    def test_llm_decisions_are_remembered_for_short_replies(self) -> None:
+        """Test that a short reply reuses the LLM's route and a long one does not."""
+        short = make_conversation("Add a section on costs.")
+        record_route(short, "input_required")
+        self.assertEqual(
+            classify_route(make_conversation("add a section on costs")),
+            "input_required",
+        )
+
+        long = make_conversation(" ".join(["word"] * 20))
+        record_route(long, "do_research")
+        self.assertIsNone(classify_route(long))
+
+    def test_llm_decisions_are_remembered_for_the_same_message(self) -> None:
+        """Test that a remembered route is only reused for the same agent message."""
+        record_route(make_conversation("shorter please"), "input_required")
+        other = "1. Background\n2. Modern panels\n3. Outlook"
+        self.assertIsNone(
+            classify_route(make_conversation("shorter please", structure=other))
+        )
+        self.assertEqual(
+            classify_route(make_conversation("shorter please")), "input_required"
+        )
+
+    def test_table_evicts_least_recently_used(self) -> None:
+        """Test that the table keeps at most its size, evicting the oldest lookup."""
+        table = RouteDecisionTable(max_entries=2)
+        table.put(STRUCTURE, "first", "do_research")
+        table.put(STRUCTURE, "second", "input_required")
+        table.get(STRUCTURE, "first")
+        table.put(STRUCTURE, "third", "do_research")
+        self.assertEqual(table.get(STRUCTURE, "first"), "do_research")
+        self.assertIsNone(table.get(STRUCTURE, "second"))
+        self.assertEqual(len(table), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import time
+import unittest
+
+from a2a_server.deep_research.components.rate_limiter import RateLimiter
+from a2a_server.deep_research.components.search import (
+    search_queries,
+    set_search_client,
+)
+from a2a_server.deep_research.components.struct import Query
+
+
+class ScriptedSearchClient:
+    """Stands in for TavilySearch, hanging or failing for some queries."""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+
+    async def ainvoke(self, params: dict) -> dict:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.05)
+            if params["query"] == "hangs":
+                await asyncio.sleep(60)
+            if params["query"] == "raises":
+                raise ConnectionError("connection reset")
+            if params["query"] == "errors":
+                return {"error": "quota exceeded"}
+            return {
+                "results": [
+                    {
+                        "url": f"https://example.com/{params['query']}",
+                        "title": params["query"],
+                        "raw_content": f"Content for {params['query']}",
+                    }
+                ]
+            }
+        finally:
+            self.running -= 1
+
+
+class SearchQueriesTest(unittest.TestCase):
+    """Tests for running a step's searches concurrently."""
+
+    def setUp(self) -> None:
+        self.client = ScriptedSearchClient()
+        set_search_client(self.client)
+        self.addCleanup(set_search_client, None)
+
+    def search(self, queries: list, max_concurrency: int = 5, timeout: float = 1):
+        return asyncio.run(
+            search_queries(
+                [Query(query=query) for query in queries],
+                max_results=1,
+                rate_limiter=RateLimiter(),
+                max_concurrency=max_concurrency,
+                timeout=timeout,
+            )
+        )
+
+    def test_failed_queries_do_not_affect_the_others(self) -> None:
+        """Test that a hanging or failing query only empties its own results."""
+        started_at = time.perf_counter()
+        results = self.search(["first", "hangs", "raises", "errors", "last"])
+
+        self.assertLess(time.perf_counter() - started_at, 5)
+        self.assertEqual(
+            [search_results.query.query for search_results in results],
+            ["first", "hangs", "raises", "errors", "last"],
+        )
+        self.assertEqual(
+            [len(search_results.results) for search_results in results],
+            [1, 0, 0, 0, 1],
+        )
+
+    def test_searches_run_concurrently_within_the_limit(self) -> None:
+        """Test that searches overlap but never exceed the concurrency limit."""
+        started_at = time.perf_counter()
+        results = self.search([f"query {i}" for i in range(6)], max_concurrency=3)
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.client.max_running, 3)
+        # Two rounds of three searches rather than six searches in turn
+        self.assertLess(time.perf_counter() - started_at, 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from a2a_server.deep_research.components import search
+from a2a_server.deep_research.components.cache import SQLiteCache
+from a2a_server.deep_research.components.rate_limiter import RateLimiter
+from a2a_server.deep_research.components.struct import Query, SearchResults
+
+
+class FakeSearchClient:
+    """Stands in for TavilySearch and counts the searches it serves."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def ainvoke(self, params: dict) -> dict:
+        self.calls += 1
+        return {
+            "results": [
+                {
+                    "url": f"https://example.com/{index}",
+                    "title": f"Result {index}",
+                    "raw_content": f"Content for {params['query']}",
+                }
+                for index in range(params["max_results"])
+            ]
+        }
+
+
+class SQLiteCacheTest(unittest.TestCase):
+    """Tests for the persistent SQLite cache."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.sqlite")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_get_and_set_count_hits_and_misses(self) -> None:
+        """Test that lookups are counted as hits and misses."""
+        cache = SQLiteCache(self.path)
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_entries_persist_across_instances(self) -> None:
+        """Test that entries are stored on disk."""
+        SQLiteCache(self.path).set("key", "value")
+        self.assertEqual(SQLiteCache(self.path).get("key"), "value")
+
+    def test_expired_entries_are_misses(self) -> None:
+        """Test that entries older than the TTL are dropped."""
+        cache = SQLiteCache(self.path, ttl_seconds=0.01)
+        cache.set("key", "value")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        """Test that the size bound evicts the least recently used entry."""
+        cache = SQLiteCache(self.path, max_entries=2)
+        cache.set("a", "1")
+        time.sleep(0.01)
+        cache.set("b", "2")
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+class SearchCacheTest(unittest.TestCase):
+    """Tests for the search cache in front of the Tavily client."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SQLiteCache(os.path.join(self.directory.name, "search.sqlite"))
+        self.client = FakeSearchClient()
+        self.rate_limiter = RateLimiter()
+        self.previous_client = search._search_client
+        search._search_client = self.client
+
+    def tearDown(self) -> None:
+        search._search_client = self.previous_client
+        self.directory.cleanup()
+
+    def test_normalize_query(self) -> None:
+        """Test that case, punctuation and whitespace are normalized."""
+        self.assertEqual(
+            search.normalize_query("  What is   LangGraph?! "), "what is langgraph"
+        )
+
+    def search(self, query: str, max_results: int) -> SearchResults:
+        return asyncio.run(
+            search.search(
+                Query(query=query),
+                max_results,
+                self.rate_limiter,
+                timeout=5,
+                cache=self.cache,
+            )
+        )
+
+    def test_equivalent_queries_are_served_from_cache(self) -> None:
+        """Test that a normalized repeat of a query does not reach the client."""
+        first = self.search("LangGraph agents", 2)
+        second = self.search("langgraph   agents?", 2)
+        self.assertEqual(self.client.calls, 1)
+        self.assertEqual(second.results, first.results)
+        self.assertEqual(second.query.query, "langgraph   agents?")
+
+    def test_max_results_is_part_of_the_key(self) -> None:
+        """Test that a different number of results is searched again."""
+        self.search("LangGraph agents", 2)
+        self.search("LangGraph agents", 3)
+        self.assertEqual(self.client.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
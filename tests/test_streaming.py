@@ -0,0 +1,34 @@
+import time
+import unittest
+
+from a2a_server.deep_research.components.streaming import TextCoalescer
+
+
+class TextCoalescerTest(unittest.TestCase):
+    """Tests for coalescing streamed tokens into chunks."""
+
+    def test_text_is_released_in_chunks(self) -> None:
+        """Test that tokens are held back until the chunk size is reached."""
+        coalescer = TextCoalescer(chunk_chars=10, interval_seconds=60)
+        released = [coalescer.add("node", token) for token in ["abc"] * 7]
+        self.assertEqual(released, [None, None, None, "abcabcabcabc", None, None, None])
+        self.assertEqual(coalescer.flush(), [("node", "abcabcabc")])
+
+    def test_text_is_released_after_the_interval(self) -> None:
+        """Test that a slow stream is released once the interval has passed."""
+        coalescer = TextCoalescer(chunk_chars=1000, interval_seconds=0.01)
+        self.assertIsNone(coalescer.add("node", "a"))
+        time.sleep(0.02)
+        self.assertEqual(coalescer.add("node", "b"), "ab")
+
+    def test_streams_are_buffered_separately(self) -> None:
+        """Test that text from different streams is never mixed."""
+        coalescer = TextCoalescer(chunk_chars=4, interval_seconds=60)
+        self.assertIsNone(coalescer.add("first", "ab"))
+        self.assertIsNone(coalescer.add("second", "cd"))
+        self.assertEqual(coalescer.add("first", "ef"), "abef")
+        self.assertEqual(coalescer.flush(), [("second", "cd")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+import asyncio
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+from typing import AsyncIterator, List
+from unittest import mock
+
+# The task manager is a script importing its modules by their top-level names
+DEEP_RESEARCH_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "src", "a2a_server", "deep_research"
+)
+
+
+def import_task_manager():
+    if DEEP_RESEARCH_DIR not in sys.path:
+        sys.path.insert(0, DEEP_RESEARCH_DIR)
+    with mock.patch.dict(os.environ, {"CHECKPOINT_PATH": ""}):
+        return importlib.import_module("task_manager")
+
+
+def make_report_chunk(content: str, last_chunk: bool, metadata=None) -> dict:
+    return {
+        "is_task_complete": False,
+        "require_user_input": False,
+        "content": content,
+        "is_artifact_chunk": True,
+        "last_chunk": last_chunk,
+        "metadata": metadata,
+    }
+
+
+async def iterate(items: List[dict]) -> AsyncIterator[dict]:
+    for item in items:
+        yield item
+
+
+@unittest.skipUnless(
+    importlib.util.find_spec("common") and importlib.util.find_spec("starlette"),
+    "The A2A server dependencies are not installed",
+)
+class TaskManagerTestCase(unittest.TestCase):
+    """Builds a task manager on an in-memory task registry and a mock agent."""
+
+    def setUp(self) -> None:
+        self.module = import_task_manager()
+        registry_module = importlib.import_module("components.task_registry")
+        self.registry = registry_module.TaskRegistry(":memory:")
+        self.addCleanup(self.registry.close)
+        patcher = mock.patch.object(
+            self.module, "get_task_registry", return_value=self.registry
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.manager = self.module.AgentTaskManager(
+            agent=mock.Mock(), notification_sender_auth=mock.Mock()
+        )
+        self.manager.enqueue_events_for_sse = mock.AsyncMock()
+        self.manager.update_store = mock.AsyncMock(return_value=mock.Mock())
+        self.manager.send_task_notification = mock.AsyncMock()
+
+
+class StreamAgentItemsTest(TaskManagerTestCase):
+    """Tests for sending the report chunks streamed by the agent to subscribers."""
+
+    def sent_events(self, event_type: type) -> list:
+        return [
+            call.args[1]
+            for call in self.manager.enqueue_events_for_sse.call_args_list
+            if isinstance(call.args[1], event_type)
+        ]
+
+    def test_report_chunks_are_appended_to_one_artifact(self) -> None:
+        """Test that chunks share an artifact, appending after the first one."""
+        self.registry.save("task", "session", "Solar power", "working")
+        report = "# One\n\n# Two\n\nConclusion"
+        items = [
+            make_report_chunk("# One", last_chunk=False),
+            make_report_chunk("\n\n# Two", last_chunk=False),
+            make_report_chunk(
+                "\n\nConclusion", last_chunk=True, metadata={"budget": {}}
+            ),
+            {
+                "is_task_complete": True,
+                "require_user_input": False,
+                "content": report,
+                "metadata": {"budget": {}},
+            },
+        ]
+
+        asyncio.run(self.manager._stream_agent_items("task", iterate(items)))
+
+        artifacts = [
+            event.artifact
+            for event in self.sent_events(self.module.TaskArtifactUpdateEvent)
+        ]
+        self.assertEqual(
+            ["".join(part.text for part in artifact.parts) for artifact in artifacts],
+            ["# One", "\n\n# Two", "\n\nConclusion"],
+        )
+        self.assertEqual([artifact.index for artifact in artifacts], [0, 0, 0])
+        self.assertEqual(
+            [artifact.append for artifact in artifacts], [False, True, True]
+        )
+        self.assertEqual(
+            [artifact.lastChunk for artifact in artifacts], [False, False, True]
+        )
+        self.assertEqual(artifacts[-1].metadata, {"budget": {}})
+
+        # The task store keeps the complete report as a single artifact
+        status, stored_artifacts = self.manager.update_store.call_args.args[1:]
+        self.assertEqual(status.state, self.module.TaskState.COMPLETED)
+        self.assertEqual(stored_artifacts[0].parts[0].text, report)
+        status_events = self.sent_events(self.module.TaskStatusUpdateEvent)
+        self.assertTrue(status_events[-1].final)
+        self.assertEqual(self.registry.get("task").state, "completed")
+
+
+class ResumeTasksTest(TaskManagerTestCase):
+    """Tests for resuming and restoring the tasks of an earlier process."""
+
+    def test_working_tasks_are_resumed_once(self) -> None:
+        """Test that a working task is resumed from its session, and only once."""
+        self.registry.save("task", "session", "Solar power", "working")
+        self.registry.save("done", "session", "Wind power", "completed")
+        self.manager.agent.resume = mock.Mock(
+            return_value=iterate(
+                [
+                    {
+                        "is_task_complete": True,
+                        "require_user_input": False,
+                        "content": "Report",
+                    }
+                ]
+            )
+        )
+
+        async def resume() -> None:
+            await self.manager.resume_unfinished_tasks()
+            # A subscriber reconnecting while the task runs does not resume it again
+            await self.manager._resume_task(self.registry.get("task"))
+            await asyncio.gather(*self.manager.running_tasks.values())
+
+        asyncio.run(resume())
+
+        self.manager.agent.resume.assert_called_once_with("Solar power", "session")
+        self.assertEqual(self.manager.tasks["task"].sessionId, "session")
+        self.assertNotIn("done", self.manager.tasks)
+        self.assertEqual(self.registry.get("task").state, "completed")
+        self.assertEqual(self.manager.running_tasks, {})
+
+    def test_finished_tasks_are_restored(self) -> None:
+        """Test that a finished task is added back with its report, without a run."""
+        self.registry.save("task", "session", "Solar power", "completed")
+        self.manager.agent.get_saved_state = mock.AsyncMock()
+        self.manager.agent.get_agent_response = mock.AsyncMock(
+            return_value={
+                "is_task_complete": True,
+                "require_user_input": False,
+                "content": "Report",
+                "metadata": {"budget": {"llm_calls": 3}},
+            }
+        )
+
+        task = asyncio.run(self.manager._restore_task(self.registry.get("task")))
+
+        self.manager.agent.resume.assert_not_called()
+        self.manager.agent.get_config.assert_called_once_with("session")
+        # The budget usage saved by the run is reported with its report
+        self.manager.agent.get_saved_state.assert_awaited_once_with(
+            self.manager.agent.get_config.return_value
+        )
+        self.assertEqual(task.status.state, self.module.TaskState.COMPLETED)
+        self.assertEqual(task.artifacts[0].parts[0].text, "Report")
+        self.assertEqual(task.artifacts[0].metadata, {"budget": {"llm_calls": 3}})
+        self.assertEqual(task.history[0].parts[0].text, "Solar power")
+        self.assertIs(
+            asyncio.run(self.manager._restore_task(self.registry.get("task"))), task
+        )
+
+
+class ArtifactsEndpointTest(TaskManagerTestCase):
+    """Tests for serving the files tasks stored in the artifact store."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        artifact_store = importlib.import_module("components.artifact_store")
+        self.store = artifact_store.ArtifactStore(directory.name)
+        self.addCleanup(self.store.close)
+        patcher = mock.patch.object(artifact_store, "_artifact_store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, **path_params: str):
+        request = mock.Mock(path_params=path_params)
+        return asyncio.run(self.manager.handle_artifacts_endpoint(request))
+
+    def test_tasks_of_an_earlier_process_are_served_from_disk(self) -> None:
+        """Test that a finished task not in memory still serves its artifacts."""
+        self.registry.save("task", "session", "Solar power", "completed")
+        self.store.write("session", "reports/response.md", "Report")
+
+        response = self.get(task_id="task")
+        self.assertEqual(
+            json.loads(response.body), {"artifacts": ["reports/response.md"]}
+        )
+        response = self.get(task_id="task", name="reports/response.md")
+        self.assertEqual(response.body, b"Report")
+        self.assertNotIn("task", self.manager.tasks)
+
+        self.assertEqual(self.get(task_id="unknown").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from a2a_server.deep_research.components.task_registry import TaskRegistry
+
+
+class TaskRegistryTest(unittest.TestCase):
+    """Tests for the durable task to session mapping."""
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "tasks.sqlite")
+
+    def make_registry(self, **kwargs) -> TaskRegistry:
+        registry = TaskRegistry(self.path, **kwargs)
+        self.addCleanup(registry.close)
+        return registry
+
+    def test_working_tasks_survive_a_restart(self) -> None:
+        """Test that a new registry on the same file lists the unfinished tasks."""
+        registry = self.make_registry()
+        registry.save("first", "session-1", "solar power", "working")
+        registry.save("second", "session-2", "wind power", "working")
+        registry.set_state("first", "completed")
+        registry.close()
+
+        registry = self.make_registry()
+        working = registry.list("working")
+        self.assertEqual([record.task_id for record in working], ["second"])
+        self.assertEqual(working[0].session_id, "session-2")
+        self.assertEqual(working[0].query, "wind power")
+        self.assertEqual(registry.get("first").state, "completed")
+        self.assertIsNone(registry.get("missing"))
+
+    def test_old_finished_tasks_are_deleted(self) -> None:
+        """Test that only finished tasks past the TTL are deleted on opening."""
+        registry = self.make_registry()
+        with mock.patch("time.time", return_value=time.time() - 100):
+            registry.save("finished", "session-1", "solar power", "completed")
+            registry.save("working", "session-2", "wind power", "working")
+        registry.close()
+
+        registry = self.make_registry(ttl_seconds=50)
+        self.assertIsNone(registry.get("finished"))
+        self.assertIsNotNone(registry.get("working"))
+
+
+if __name__ == "__main__":
+    unittest.main()